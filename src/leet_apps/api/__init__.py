@@ -9,7 +9,9 @@ except Exception:
     messages_router = None
 
 from .infographics import router as infographics_router
+from .jobs import router as jobs_router
+from .metrics import router as metrics_router
 
-__all__ = ["auth_router", "sessions_router", "search_router", "infographics_router"]
+__all__ = ["auth_router", "sessions_router", "search_router", "infographics_router", "jobs_router", "metrics_router"]
 if messages_router is not None:
     __all__.insert(3, "messages_router")
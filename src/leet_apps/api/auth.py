@@ -73,12 +73,13 @@ async def callback(code: Optional[str] = None, error: Optional[str] = None):
     }
     user = {"id": "123", "email": "user@example.com", "name": "Test User"}
 
-    # Try to create or register the user in the in-memory user store for demos.
+    # Try to create or register the user in the user store for demos.
     try:
         from src.leet_apps.api import users as users_module
+        from src.leet_apps.api.storage import get_storage
         # Create a user entry using the users.User model so other endpoints can find it in tests
         user_obj = users_module.User(id=user["id"], email=user["email"], name=user["name"], created_at=__import__("datetime").datetime.utcnow())
-        users_module._users[user_obj.id] = user_obj
+        get_storage().save_user(user_obj)
     except Exception:
         # If importing or creating the user fails for any reason, continue gracefully.
         pass
@@ -99,8 +100,8 @@ async def me(x_user_id: Optional[str] = Header(None), authorization: Optional[st
     # If X-User-Id header provided, try to fetch the user
     if x_user_id:
         try:
-            from src.leet_apps.api import users as users_module
-            user = users_module._users.get(x_user_id)
+            from src.leet_apps.api.storage import get_storage
+            user = get_storage().get_user(x_user_id)
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
             return user
@@ -115,8 +116,8 @@ async def me(x_user_id: Optional[str] = Header(None), authorization: Optional[st
         if len(parts) == 2 and parts[0].lower() == "bearer" and parts[1] == "fake_access_token":
             # Return the simulated user created by callback
             try:
-                from src.leet_apps.api import users as users_module
-                user = users_module._users.get("123")
+                from src.leet_apps.api.storage import get_storage
+                user = get_storage().get_user("123")
                 if user:
                     return user
                 # If not present, return a minimal simulated user
@@ -130,15 +131,14 @@ async def me(x_user_id: Optional[str] = Header(None), authorization: Optional[st
 @router.post("/logout")
 async def logout(x_user_id: Optional[str] = Header(None)):
     """
-    Logout a user in the demo by removing them from the in-memory user store if X-User-Id is provided.
+    Logout a user in the demo by removing them from the user store if X-User-Id is provided.
     In production, revoke tokens and clear sessions instead.
     """
     if not x_user_id:
         raise HTTPException(status_code=400, detail="X-User-Id header required for demo logout")
     try:
-        from src.leet_apps.api import users as users_module
-        if x_user_id in users_module._users:
-            del users_module._users[x_user_id]
+        from src.leet_apps.api.storage import get_storage
+        if get_storage().delete_user(x_user_id):
             return {"status": "ok"}
         else:
             raise HTTPException(status_code=404, detail="User not found")
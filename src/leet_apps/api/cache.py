@@ -0,0 +1,165 @@
+"""
+Bounded in-process cache with LRU eviction and per-entry TTL.
+
+Used by the search layer in place of a plain dict: memory is capped by an entry count and
+an approximate byte budget, least recently used entries are evicted first, and expired
+entries are swept proactively (at most every sweep_interval seconds, piggybacking on cache
+writes, and from a background task between start_sweeper() and stop_sweeper(), which routers
+call from their startup/shutdown hooks so an idle cache is swept too) rather than only when
+the same key is requested again.
+"""
+import asyncio
+import contextlib
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def approx_size(value: Any) -> int:
+    """Cheap recursive size estimate for JSON-like values (str, bytes, numbers, lists, dicts)."""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(approx_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class TTLCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: float = 600,
+        sweep_interval: float = 60,
+        size_of: Callable[[Any], int] = approx_size,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._size_of = size_of
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = clock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._sweeper_task: Optional["asyncio.Task"] = None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry.expires_at > self._clock()
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return default
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            return default
+        self._data.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        now = self._clock()
+        self._remove(key)
+        size = self._size_of(value)
+        self._data[key] = _Entry(value, now + (self.ttl_seconds if ttl is None else ttl), size)
+        self._bytes += size
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+        self._evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._remove(key)
+        return default if entry is None else entry.value
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def sweep(self) -> int:
+        """Drop every expired entry. Returns how many were removed."""
+        now = self._clock()
+        self._last_sweep = now
+        expired = [k for k, e in self._data.items() if e.expires_at <= now]
+        for k in expired:
+            self._remove(k)
+        self._stats["expirations"] += len(expired)
+        return len(expired)
+
+    async def sweeper(self, interval: Optional[float] = None) -> None:
+        """Background task body: sweep forever every interval seconds (until cancelled)."""
+        while True:
+            await asyncio.sleep(interval or self.sweep_interval)
+            self.sweep()
+
+    def start_sweeper(self, interval: Optional[float] = None) -> "asyncio.Task":
+        """Run sweeper() as a task on the running loop; a no-op while one is already running there."""
+        loop = asyncio.get_running_loop()
+        task = self._sweeper_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = self._sweeper_task = loop.create_task(self.sweeper(interval))
+        return task
+
+    async def stop_sweeper(self) -> None:
+        """Cancel the task started by start_sweeper(), if any."""
+        task, self._sweeper_task = self._sweeper_task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hit_ratio": (self._stats["hits"] / lookups) if lookups else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        for k in self._stats:
+            self._stats[k] = 0
+
+    def _remove(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _evict(self) -> None:
+        while self._data and (
+            len(self._data) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, entry = self._data.popitem(last=False)
+            self._bytes -= entry.size
+            self._stats["evictions"] += 1
@@ -1,9 +1,15 @@
 import uuid
 from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from . import jobs as jobs_module
+from .ratelimit import client_ip, rate_limit, research_limiter
+from .storage import get_storage
+
 router = APIRouter(prefix="/api/chat")
 
 
@@ -12,17 +18,27 @@ class ChatCreatePayload(BaseModel):
     prompt: str
     topic: Optional[str] = None
     tags: Optional[list[str]] = None
+    session_id: Optional[str] = None  # follow-up on an existing session of the same user
 
 
-@router.post("/send")
-async def send_and_run(payload: ChatCreatePayload = Body(...)):
+@router.post("/send", dependencies=[Depends(rate_limit(research_limiter, key=client_ip))])
+async def send_and_run(payload: ChatCreatePayload = Body(...), background: Optional[bool] = None):
     """
     Convenience endpoint for the demo UI:
     - Creates a ResearchSession for the provided user_id and prompt
     - Stores an initial user message
-    - Runs the mock research pipeline (sessions.run_research_session)
+    - Runs the mock research pipeline (sessions.execute_research_session)
     - Returns the aggregated session, messages, sources and infographic
 
+    With session_id the prompt is a follow-up on that (already researched) session instead:
+    the message is added to it once the research succeeded, and the incremental pipeline fetches only new sources and
+    re-renders the infographic only if what it shows changed. The response then also
+    carries new_sources and infographic_rerendered. The session must be completed (409
+    while it is pending, running or failed).
+
+    With background=true (or LEET_RESEARCH_BACKGROUND=1) the pipeline is queued as a job
+    instead and the response is 202 with the pending session, messages and job to poll.
+
     This endpoint is intended for demo/dev usage to simplify the frontend integration.
     """
     if not payload.prompt or not payload.prompt.strip():
@@ -34,47 +50,83 @@ async def send_and_run(payload: ChatCreatePayload = Body(...)):
     except Exception:
         raise HTTPException(status_code=500, detail="Internal modules unavailable")
 
-    # Create a session record
-    session_id = str(uuid.uuid4())
     now = datetime.utcnow()
-    session = sessions_module.ResearchSession(
-        id=session_id,
-        user_id=payload.user_id,
-        prompt=payload.prompt,
-        status="pending",
-        created_at=now,
-        topic=payload.topic,
-        tags=payload.tags or [],
-    )
-    sessions_module._sessions[session_id] = session
+    follow_up = None
+    if payload.session_id:
+        session = get_storage().get_session(payload.session_id)
+        if session is None or session.user_id != payload.user_id:
+            raise HTTPException(status_code=404, detail="Session not found")
+        sessions_module._require_completed(session)
+        session_id = session.id
+        follow_up = payload.prompt
+    else:
+        session_id = str(uuid.uuid4())
+        session = sessions_module.ResearchSession(
+            id=session_id,
+            user_id=payload.user_id,
+            prompt=payload.prompt,
+            status="pending",
+            created_at=now,
+            topic=payload.topic,
+            tags=payload.tags or [],
+        )
 
-    # Create initial user message
-    msg_id = str(uuid.uuid4())
     message = messages_module.Message(
-        id=msg_id,
+        id=str(uuid.uuid4()),
         session_id=session_id,
         role="user",
         content=payload.prompt,
         created_at=now,
     )
-    messages_module._messages[msg_id] = message
+
+    if background is None:
+        background = jobs_module.run_in_background_default()
+
+    async def research():
+        result = await sessions_module.execute_research_session(session_id, follow_up=follow_up)
+        if follow_up is not None:
+            # A follow-up is recorded only once it succeeded, so a failed one leaves no trace
+            messages_module.add_message(message)
+        return result
+
+    job = None
+    if background:
+        # Queue before persisting anything, so a full queue (503) leaves no orphaned session or
+        # message behind; the job only starts once this handler has returned.
+        job = jobs_module.submit("research", research, session_id=session_id)
+
+    # Create the session record and the user message (new sessions only; see research())
+    if follow_up is None:
+        sessions_module.save_session(session)
+        messages_module.add_message(message)
+
+    if job is not None:
+        messages_list = [m.dict() for m in messages_module.messages_for_session(session_id)]
+        if follow_up is not None:
+            messages_list.append(message.dict())
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder({"session": session, "messages": messages_list, "job": job}),
+        )
 
     # Run the research pipeline for the session (this will call the mock search implementation)
     try:
-        result = await sessions_module.run_research_session(session_id)
+        result = await research()
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run research pipeline: {e}")
 
     # Gather messages for the session
-    msgs = [m for m in messages_module._messages.values() if m.session_id == session_id]
-    msgs.sort(key=lambda m: m.created_at)
-    messages_list = [m.dict() for m in msgs]
+    messages_list = [m.dict() for m in messages_module.messages_for_session(session_id)]
 
-    return {
+    response = {
         "session": result["session"],
         "messages": messages_list,
         "sources": result.get("sources", []),
         "infographic": result.get("infographic"),
     }
+    if follow_up is not None:
+        response["new_sources"] = result["new_sources"]
+        response["infographic_rerendered"] = result["infographic_rerendered"]
+    return response
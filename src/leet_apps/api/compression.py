@@ -0,0 +1,244 @@
+"""
+Content-Encoding negotiation for text payloads (JSON, NDJSON, SVG).
+
+Codecs: gzip is always available; brotli ("br") and zstd are used when the brotli /
+zstandard packages are installed. negotiate() picks the best codec the client accepts,
+preferring br, then zstd, then gzip at equal q-values.
+
+Two ways responses get compressed:
+- CompressionMiddleware compresses any compressible response of at least MINIMUM_SIZE
+  bytes. Streaming responses (exports, SSE) are compressed chunk by chunk with a sync
+  flush after each chunk, so clients still receive records as they are produced.
+- Immutable payloads (infographic SVGs) are compressed once, when generated, and stored as
+  blobs next to the original (see variant_key); the image endpoint serves them as-is and
+  the middleware leaves responses that already have a Content-Encoding alone.
+
+Every compressible response carries Vary: Accept-Encoding, whichever encoding was chosen
+(identity included), so shared caches keep the representations apart. A strong ETag on a
+response the middleware compresses is weakened: the bytes differ from the identity ones, and
+If-None-Match uses weak comparison, so revalidation keeps working.
+
+Install on an application with install_compression(app).
+"""
+import gzip
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:  # optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:  # optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Configuration
+MINIMUM_SIZE = 1024  # smaller bodies are sent uncompressed; headers would eat the saving
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # per-response; precomputed variants use BROTLI_QUALITY_STATIC
+BROTLI_QUALITY_STATIC = 11
+ZSTD_LEVEL = 3
+ZSTD_LEVEL_STATIC = 19
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "image/svg+xml", "text/")
+
+
+class _Stream:
+    """Incremental compressor: chunk() returns bytes decodable so far, finish() the trailer."""
+
+    def __init__(self, compress: Callable[[bytes], bytes], flush: Callable[[], bytes], finish: Callable[[], bytes]):
+        self._compress = compress
+        self._flush = flush
+        self.finish = finish
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compress(data) + self._flush()
+
+
+def _gzip_stream() -> _Stream:
+    obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return _Stream(obj.compress, lambda: obj.flush(zlib.Z_SYNC_FLUSH), obj.flush)
+
+
+def _brotli_stream() -> _Stream:
+    obj = brotli.Compressor(quality=BROTLI_QUALITY)
+    return _Stream(obj.process, obj.flush, obj.finish)
+
+
+def _zstd_stream() -> _Stream:
+    obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return _Stream(obj.compress, lambda: obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), obj.flush)
+
+
+class Codec:
+    def __init__(self, name: str, compress: Callable[[bytes, bool], bytes], stream: Callable[[], _Stream]):
+        self.name = name
+        self._compress = compress
+        self.stream = stream
+
+    def compress(self, data: bytes, static: bool = False) -> bytes:
+        """static=True spends more CPU for a smaller result (payloads compressed once and kept)."""
+        return self._compress(data, static)
+
+
+def _available_codecs() -> Dict[str, Codec]:
+    codecs: Dict[str, Codec] = {}
+    if brotli is not None:
+        codecs["br"] = Codec(
+            "br", lambda d, static: brotli.compress(d, quality=BROTLI_QUALITY_STATIC if static else BROTLI_QUALITY), _brotli_stream
+        )
+    if zstandard is not None:
+        codecs["zstd"] = Codec(
+            "zstd", lambda d, static: zstandard.ZstdCompressor(level=ZSTD_LEVEL_STATIC if static else ZSTD_LEVEL).compress(d), _zstd_stream
+        )
+    codecs["gzip"] = Codec("gzip", lambda d, static: gzip.compress(d, 9 if static else GZIP_LEVEL, mtime=0), _gzip_stream)
+    return codecs
+
+
+# In server preference order
+CODECS: Dict[str, Codec] = _available_codecs()
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str] = None) -> Optional[str]:
+    """The codec to use for a request's Accept-Encoding, or None for identity."""
+    if not accept_encoding:
+        return None
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best: Tuple[float, Optional[str]] = (0.0, None)
+    for name in available if available is not None else CODECS:
+        q = accepted.get(name, wildcard)
+        if q > best[0]:
+            best = (q, name)
+    return best[1]
+
+
+def compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.split(";")[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def variant_key(blob_key: str, encoding: str) -> str:
+    """Blob key under which the pre-compressed variant of an immutable blob is stored."""
+    return f"{blob_key}.{encoding}"
+
+
+def precompress(data: bytes) -> Dict[str, bytes]:
+    """Every available encoding of an immutable payload, at the static (max) levels."""
+    return {name: codec.compress(data, static=True) for name, codec in CODECS.items()}
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if "accept-encoding" in vary.lower():
+        return headers
+    return [(k, v) for k, v in headers if k.lower() != b"vary"] + [(b"vary", f"{vary}, Accept-Encoding".encode("latin-1"))]
+
+
+def _start_with_vary(start):
+    headers = list(start.get("headers", []))
+    if not compressible(_header(headers, b"content-type")):
+        return start
+    return {**start, "headers": _add_vary(headers)}
+
+
+def _weaken_etag(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    return [(k, b"W/" + v if k.lower() == b"etag" and not v.startswith(b"W/") else v) for k, v in headers]
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware (streaming-safe, unlike buffering BaseHTTPMiddleware)."""
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = dict((k.lower(), v) for k, v in scope.get("headers", []))
+        encoding = negotiate(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            async def send_identity(message):
+                await send(_start_with_vary(message) if message["type"] == "http.response.start" else message)
+
+            await self.app(scope, receive, send_identity)
+            return
+
+        codec = CODECS[encoding]
+        start = None  # held back until we know whether to compress
+        stream: Optional[_Stream] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if stream is None:
+                headers = list(start.get("headers", []))
+                if (
+                    _header(headers, b"content-encoding") is not None
+                    or not compressible(_header(headers, b"content-type"))
+                    or (not more and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(_start_with_vary(start))
+                    await send(message)
+                    return
+                headers = [(k, v) for k, v in _weaken_etag(_add_vary(headers)) if k.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                if not more:
+                    compressed = codec.compress(body)
+                    headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                stream = codec.stream()
+                await send({**start, "headers": headers})
+            data = stream.chunk(body) if body else b""
+            if not more:
+                data += stream.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def install_compression(app, minimum_size: int = MINIMUM_SIZE) -> None:
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
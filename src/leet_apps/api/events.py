@@ -0,0 +1,146 @@
+"""
+In-process publish/subscribe of research pipeline progress, streamed as server-sent events.
+
+The pipeline publishes events per session (search started, each source, infographic
+rendered, session completed/failed). Each session channel keeps a bounded history so a
+client that connects late, or reconnects with Last-Event-ID, gets the events it missed
+before live ones. The history covers the latest run only: a run starting (RUN_EVENTS) after
+a finished one drops the previous run's events, so a re-run or follow-up is not shadowed by
+the earlier run's terminal event. Event ids keep increasing across runs.
+
+Backpressure: every subscriber has a bounded queue. A client that falls so far behind that
+its queue fills up is disconnected with an "overflow" event instead of letting the queue
+grow; browsers' EventSource reconnects automatically and resumes from the history.
+"""
+import asyncio
+import json
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+# Configuration
+HISTORY_MAX = 256  # events kept per session for late subscribers / reconnects
+SUBSCRIBER_QUEUE_MAX = 64  # events buffered per client before it is considered too slow
+CHANNELS_MAX = 1024  # sessions with retained history
+KEEPALIVE_SECONDS = 15.0
+
+TERMINAL_EVENTS = ("session.completed", "session.failed", "followup.failed")
+RUN_EVENTS = ("session.queued", "session.running")
+
+
+class Event:
+    __slots__ = ("id", "type", "data")
+
+    def __init__(self, id: int, type: str, data: Dict[str, Any]):
+        self.id = id
+        self.type = type
+        self.data = data
+
+    @property
+    def terminal(self) -> bool:
+        return self.type in TERMINAL_EVENTS
+
+    def encode(self) -> bytes:
+        payload = json.dumps(jsonable_encoder(self.data), separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class Subscriber:
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class _Channel:
+    def __init__(self):
+        self.next_id = 1
+        self.history: Deque[Event] = deque(maxlen=HISTORY_MAX)
+        self.subscribers: Set[Subscriber] = set()
+
+
+class EventBus:
+    def __init__(self, subscriber_queue_max: int = SUBSCRIBER_QUEUE_MAX, channels_max: int = CHANNELS_MAX):
+        self.subscriber_queue_max = subscriber_queue_max
+        self.channels_max = channels_max
+        self._channels: "OrderedDict[str, _Channel]" = OrderedDict()
+
+    def _channel(self, session_id: str) -> _Channel:
+        channel = self._channels.get(session_id)
+        if channel is None:
+            channel = self._channels[session_id] = _Channel()
+            self._trim()
+        else:
+            self._channels.move_to_end(session_id)
+        return channel
+
+    def _trim(self) -> None:
+        # Forget the least recently used channels nobody is listening to
+        excess = len(self._channels) - self.channels_max
+        for session_id in [sid for sid, ch in self._channels.items() if not ch.subscribers][:max(0, excess)]:
+            del self._channels[session_id]
+
+    def publish(self, session_id: str, type: str, data: Optional[Dict[str, Any]] = None) -> Event:
+        channel = self._channel(session_id)
+        event = Event(channel.next_id, type, data or {})
+        channel.next_id += 1
+        if type in RUN_EVENTS and any(e.terminal for e in channel.history):
+            channel.history.clear()  # a new run: start a new history segment
+        channel.history.append(event)
+        for sub in list(channel.subscribers):
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                channel.subscribers.discard(sub)
+        return event
+
+    def history(self, session_id: str, after: int = 0):
+        channel = self._channels.get(session_id)
+        return [e for e in channel.history if e.id > after] if channel else []
+
+    def subscriber_count(self, session_id: Optional[str] = None) -> int:
+        if session_id is not None:
+            channel = self._channels.get(session_id)
+            return len(channel.subscribers) if channel else 0
+        return sum(len(ch.subscribers) for ch in self._channels.values())
+
+    async def stream(self, session_id: str, last_event_id: int = 0, keepalive: float = KEEPALIVE_SECONDS) -> AsyncIterator[bytes]:
+        """
+        Yield encoded SSE frames for a session: missed history first, then live events, until
+        a terminal event is sent or the subscriber overflows. Idle periods produce keepalive
+        comments so proxies keep the connection open.
+        """
+        channel = self._channel(session_id)
+        sub = Subscriber(self.subscriber_queue_max)
+        channel.subscribers.add(sub)
+        try:
+            for event in self.history(session_id, after=last_event_id):
+                yield event.encode()
+                last_event_id = event.id
+                if event.terminal:
+                    return
+            while True:
+                if sub.overflowed and sub.queue.empty():
+                    yield Event(last_event_id, "overflow", {"resume_from": last_event_id}).encode()
+                    return
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event.id <= last_event_id:
+                    continue  # already replayed from history
+                yield event.encode()
+                last_event_id = event.id
+                if event.terminal:
+                    return
+        finally:
+            channel.subscribers.discard(sub)
+
+
+bus = EventBus()
+
+
+def publish(session_id: str, type: str, data: Optional[Dict[str, Any]] = None) -> Event:
+    return bus.publish(session_id, type, data)
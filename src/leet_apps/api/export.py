@@ -0,0 +1,93 @@
+"""
+Incremental serialization of session exports.
+
+The buffered export builds one dict holding every message before encoding it. The
+generators here encode record by record instead: messages are read from storage in
+keyset pages of EXPORT_PAGE_SIZE, and a user's sessions are walked the same way, so memory
+stays bounded by one page regardless of history size and the first bytes go out at once.
+
+Two encodings:
+- "json-stream": the same document as the buffered export (or {"user_id", "sessions": [...]}
+  for a bulk export), written in chunks.
+- "ndjson": one {"type": ..., "session_id": ..., "data": ...} object per line, with types
+  session, message, source and infographic in that order per session.
+
+The generators are synchronous; StreamingResponse iterates them in a worker thread, so
+storage reads (SQLite) never block the event loop.
+"""
+from typing import Any, Iterator
+
+from . import fastjson
+from .storage import Storage
+
+EXPORT_PAGE_SIZE = 200
+MEDIA_TYPES = {"json-stream": "application/json", "ndjson": "application/x-ndjson"}
+
+
+def iter_messages(storage: Storage, session_id: str, page_size: int = EXPORT_PAGE_SIZE) -> Iterator[Any]:
+    after = None
+    while True:
+        page = storage.list_messages(session_id, after=after, limit=page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = (page[-1].created_at, page[-1].id)
+
+
+def iter_user_sessions(storage: Storage, user_id: str, page_size: int = EXPORT_PAGE_SIZE) -> Iterator[Any]:
+    after = None
+    while True:
+        page = storage.query_sessions(user_id=user_id, after=after, limit=page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = (page[-1].created_at, page[-1].id)
+
+
+def session_json_chunks(storage: Storage, session: Any) -> Iterator[bytes]:
+    """The buffered export's document ({session, messages, sources, infographic}) in chunks."""
+    yield b'{"session":' + fastjson.fragment(fastjson.session_key(session), session) + b',"messages":['
+    first = True
+    for message in iter_messages(storage, session.id):
+        yield (b"" if first else b",") + fastjson.fragment(fastjson.message_key(message), message)
+        first = False
+    yield b'],"sources":' + fastjson.dumps(storage.get_sources(session.id))
+    yield b',"infographic":' + fastjson.dumps(storage.get_session_infographic(session.id)) + b"}"
+
+
+def session_ndjson_lines(storage: Storage, session: Any) -> Iterator[bytes]:
+    prefix = b',"session_id":' + fastjson.dumps(session.id) + b',"data":'
+
+    def line(type: bytes, data: bytes) -> bytes:
+        return b'{"type":"' + type + b'"' + prefix + data + b"}\n"
+
+    yield line(b"session", fastjson.fragment(fastjson.session_key(session), session))
+    for message in iter_messages(storage, session.id):
+        yield line(b"message", fastjson.fragment(fastjson.message_key(message), message))
+    for source in storage.iter_sources(session.id):
+        yield line(b"source", fastjson.dumps(source))
+    infographic = storage.get_session_infographic(session.id)
+    if infographic:
+        yield line(b"infographic", fastjson.dumps(infographic))
+
+
+def export_session(storage: Storage, session: Any, format: str) -> Iterator[bytes]:
+    if format == "ndjson":
+        return session_ndjson_lines(storage, session)
+    return session_json_chunks(storage, session)
+
+
+def export_user(storage: Storage, user_id: str, format: str, page_size: int = EXPORT_PAGE_SIZE) -> Iterator[bytes]:
+    """Every session of a user (oldest first), streamed one session at a time."""
+    if format == "ndjson":
+        for session in iter_user_sessions(storage, user_id, page_size):
+            yield from session_ndjson_lines(storage, session)
+        return
+    yield b'{"user_id":' + fastjson.dumps(user_id) + b',"sessions":['
+    first = True
+    for session in iter_user_sessions(storage, user_id, page_size):
+        if not first:
+            yield b","
+        yield from session_json_chunks(storage, session)
+        first = False
+    yield b"]}"
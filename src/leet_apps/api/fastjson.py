@@ -0,0 +1,131 @@
+"""
+Fast JSON responses assembled from cached per-record fragments.
+
+Returning models through response_model makes FastAPI validate and re-serialize every
+record on every response. Our records carry a version (sessions bump updated_at on every
+save, a session's sources change only with it) or are keyed by their content (messages,
+which re-saving an id may replace), so each record is encoded once, kept as bytes in a
+bounded cache keyed by identity and version, and list responses are joined from those
+fragments.
+
+orjson is used when installed (it encodes datetimes natively, in the same ISO format
+pydantic uses for our naive UTC timestamps); otherwise the standard json module with
+jsonable_encoder, which is slower but produces the same output.
+"""
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Sequence, Union
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from . import metrics
+from .cache import TTLCache
+
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Configuration
+FRAGMENT_CACHE_MAX_ENTRIES = 100_000
+FRAGMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+FRAGMENT_CACHE_TTL_SECONDS = 24 * 3600
+
+SOURCE_FIELDS = ("title", "url", "snippet", "fetched_at", "confidence")
+
+_fragments = TTLCache(
+    max_entries=FRAGMENT_CACHE_MAX_ENTRIES,
+    max_bytes=FRAGMENT_CACHE_MAX_BYTES,
+    ttl_seconds=FRAGMENT_CACHE_TTL_SECONDS,
+    size_of=len,
+)
+
+
+def _plain(value: Any) -> Any:
+    """Models become dicts; everything else is passed to the encoder as is."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "dict"):
+        return value.dict()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=_plain)
+else:  # pragma: no cover - depends on the environment
+    import json
+
+    def dumps(value: Any) -> bytes:
+        return json.dumps(jsonable_encoder(value), separators=(",", ":")).encode("utf-8")
+
+
+def fragment(key: Optional[Hashable], value: Any, encode: Callable[[Any], bytes] = dumps) -> bytes:
+    """Encoded value, from the cache when key is given (key must change whenever the value does)."""
+    if key is None:
+        return encode(value)
+    data = _fragments.get(key)
+    if data is None:
+        data = encode(value)
+        _fragments.set(key, data)
+    return data
+
+
+def join(fragments: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(fragments) + b"]"
+
+
+# Record keys: identity plus whatever changes when the record does
+
+def message_key(message: Any) -> Hashable:
+    # Messages have no version; re-saving an id may change any field, so hash them all
+    return ("message", message.id, hash((message.session_id, message.role, message.content, message.created_at)))
+
+
+def session_key(session: Any) -> Optional[Hashable]:
+    # Sessions are mutable; only versioned ones (updated_at set by save_session) are cacheable
+    updated_at = getattr(session, "updated_at", None)
+    return ("session", session.id, updated_at) if updated_at else None
+
+
+def messages_array(messages: Sequence[Any]) -> bytes:
+    return join([fragment(message_key(m), m) for m in messages])
+
+
+def sessions_array(sessions: Sequence[Any]) -> bytes:
+    return join([fragment(session_key(s), s) for s in sessions])
+
+
+def sources_array(session: Any, sources: Union[List[dict], Callable[[], List[dict]]]) -> bytes:
+    """
+    A session's sources (projected to the Source fields); they change only with the session.
+    Pass a loader instead of the list to read them from storage only on a cache miss.
+    """
+    key = session_key(session)
+    return fragment(
+        ("sources",) + key[1:] if key else None,
+        sources,
+        lambda items: dumps([{f: s.get(f) for f in SOURCE_FIELDS} for s in (items() if callable(items) else items)]),
+    )
+
+
+def page(items: bytes, next_cursor: Optional[str]) -> bytes:
+    return b'{"items":' + items + b',"next_cursor":' + dumps(next_cursor) + b"}"
+
+
+class RawJSONResponse(Response):
+    """A response whose body is already-encoded JSON bytes."""
+
+    media_type = "application/json"
+
+
+def clear() -> None:
+    _fragments.clear()
+
+
+def stats() -> dict:
+    return _fragments.stats()
+
+
+@metrics.register_collector
+def _collect_metrics():
+    return metrics.cache_families("json_fragments", _fragments.stats())
@@ -0,0 +1,84 @@
+"""
+HTTP validators and conditional GET helpers.
+
+Infographic images are immutable (their blob key is a content hash), so they carry a strong
+ETag fixed at generation time and a year-long immutable Cache-Control. Mutable resources
+(session exports) carry a weak ETag and Last-Modified derived from their latest change and
+must be revalidated. Endpoints evaluate the request's If-None-Match / If-Modified-Since
+before loading or serializing the body, and return a bodiless 304 when the client's copy is
+current.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Response
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "private, no-cache"
+
+
+def strong_etag(token: str) -> str:
+    return f'"{token}"'
+
+
+def weak_etag(token: str) -> str:
+    return f'W/"{token}"'
+
+
+def _opaque(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match evaluation (weak comparison, as RFC 9110 requires for this header)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(candidate.strip()) == current for candidate in if_none_match.split(","))
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return modified.replace(microsecond=0) <= since
+
+
+def validators(etag: str, cache_control: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(
+    headers: Dict[str, str],
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[str] = None,
+) -> Optional[Response]:
+    """
+    A 304 response carrying the validators when the client's copy is current, else None.
+    If-Modified-Since is only consulted when the request has no If-None-Match.
+    """
+    if if_none_match:
+        fresh = etag_matches(if_none_match, headers["ETag"])
+    else:
+        last_modified = headers.get("Last-Modified")
+        fresh = bool(last_modified) and _not_modified_since(if_modified_since, parsedate_to_datetime(last_modified))
+    return Response(status_code=304, headers=headers) if fresh else None
@@ -1,14 +1,24 @@
 from datetime import datetime
+import hashlib
+import json
 import uuid
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException, Query, Response, Body
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Header, Query, Response, Body
 from pydantic import BaseModel, Field
 
+from . import compression, http_cache, metrics, raster, svg_templates
+from .storage import get_storage, memory_storage
+
 router = APIRouter(prefix="/api/infographics")
+# Stop the PNG worker processes with the app
+router.add_event_handler("shutdown", raster.shutdown)
+
+# In-memory stores for demo purposes (the in-memory backend's dicts; see storage.py)
+_infographics: Dict[str, Dict[str, Any]] = memory_storage().infographics
+_images: Dict[str, bytes] = memory_storage().images  # keyed by render_key, not infographic id
 
-# In-memory stores for demo purposes
-_infographics: Dict[str, Dict[str, Any]] = {}
-_images: Dict[str, bytes] = {}
+# Bump whenever svg_templates changes rendered output, so stale blobs are not reused
+RENDERER_VERSION = "2"
 
 
 class Stat(BaseModel):
@@ -34,59 +44,46 @@ class InfographicMeta(BaseModel):
     created_at: datetime
 
 
-SVG_TEMPLATE = """<?xml version='1.0' encoding='UTF-8'?>
-<svg xmlns='http://www.w3.org/2000/svg' width='800' height='600' viewBox='0 0 800 600'>
-  <style>
-    .title {{ font: bold 24px sans-serif; }}
-    .body {{ font: 14px sans-serif; }}
-    .source {{ font: 12px sans-serif; fill: #555; }}
-  </style>
-  <rect width='100%' height='100%' fill='#ffffff' />
-  <text x='40' y='60' class='title'>Infographic: {title}</text>
-  <text x='40' y='100' class='body'>Prompt: {prompt}</text>
-  <g transform='translate(40,140)'>
-    {bullets}
-  </g>
-  <g transform='translate(40,420)'>
-    <text class='source'>Sources:</text>
-    {sources}
-  </g>
-</svg>
-"""
-
-MIN_PNG_BYTES = (
-    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89"
-    b"\x00\x00\x00\x0cIDATx\x9cc``\x00\x00\x00\x02\x00\x01\xe2!\xbc\x33\x00\x00\x00\x00IEND\xaeB`\x82"
-)
-
-
-def _render_bullets(sources: List[Dict[str, Any]]) -> str:
-    lines = []
-    y = 0
-    for s in sources[:6]:
-        lines.append(f"<text x='0' y='{y}' class='body'>- {s.get('title','')}: {s.get('snippet','')}</text>")
-        y += 24
-    return "\n    ".join(lines)
-
-
-def _render_sources(sources: List[Dict[str, Any]]) -> str:
-    lines = []
-    x = 0
-    y = 20
-    for s in sources[:4]:
-        lines.append(f"<text x='{x}' y='{y}' class='source'>{s.get('url')}</text>")
-        y += 16
-    return "\n    ".join(lines)
-
-
-def generate_svg(title: str, prompt: str, sources: List[Dict[str, Any]]) -> str:
-    bullets = _render_bullets(sources)
-    sources_block = _render_sources(sources)
-    return SVG_TEMPLATE.format(title=title, prompt=prompt, bullets=bullets, sources=sources_block)
+def generate_svg(
+    title: str,
+    prompt: str,
+    sources: List[Dict[str, Any]],
+    template: Optional[str] = None,
+    stats: Optional[List[Dict[str, Any]]] = None,
+    bullets: Optional[List[str]] = None,
+) -> str:
+    return svg_templates.render(template, title, prompt, sources, stats or [], bullets or [])
+
+
+def render_key(
+    template: Optional[str],
+    title: str,
+    prompt: str,
+    sources: List[Dict[str, Any]],
+    stats: Optional[List[Dict[str, Any]]] = None,
+    bullets: Optional[List[str]] = None,
+) -> str:
+    """
+    Content address of a render: a hash of everything the SVG depends on. Only the sources
+    and source fields the layout draws are included, so fetched_at/confidence changes and
+    sources appended past the drawn ones (follow-up research) still hit.
+    """
+    drawn = svg_templates.LAYOUTS[template or svg_templates.DEFAULT_LAYOUT].sources_drawn
+    inputs = {
+        "renderer": RENDERER_VERSION,
+        "template": template,
+        "title": title,
+        "prompt": prompt,
+        "sources": [[s.get("title", ""), s.get("url"), s.get("snippet", "")] for s in sources[:drawn]],
+        "stats": [[s["label"], s["value"]] for s in stats or []],
+        "bullets": list(bullets or []),
+    }
+    encoded = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
 
 
-@router.post("/generate", response_model=InfographicMeta)
-async def generate(info: InfographicCreate = Body(...)):
+def _render_inputs(info: InfographicCreate):
+    """(template, title, prompt, stats) for a generate request."""
     # Accept either title+stats or prompt+sources and create a simple SVG
     if info.title:
         title = info.title
@@ -97,37 +94,118 @@ async def generate(info: InfographicCreate = Body(...)):
 
     prompt = info.prompt or (info.title or "")
 
-    svg = generate_svg(title=title, prompt=prompt, sources=info.sources)
+    template = info.template or svg_templates.DEFAULT_LAYOUT
+    if template not in svg_templates.LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"Unknown template: {template}")
+    stats = [s.dict() for s in info.stats]
+    return template, title, prompt, stats
+
+
+@router.post("/generate", response_model=InfographicMeta)
+async def generate(info: InfographicCreate = Body(...)):
+    template, title, prompt, stats = _render_inputs(info)
+
+    # Identical inputs render identical bytes: reuse the stored blob instead of re-rendering
+    storage = get_storage()
+    key = render_key(template, title, prompt, info.sources, stats, info.bullets)
+    if not storage.has_blob(key):
+        with metrics.span("infographics.render"):
+            svg = generate_svg(title, prompt, info.sources, template=template, stats=stats, bullets=info.bullets).encode("utf-8")
+        with metrics.span("infographics.store"), storage.batch():
+            storage.put_blob(key, svg)
+            # Compressed once here, so downloads never pay for it
+            for encoding, data in compression.precompress(svg).items():
+                storage.put_blob(compression.variant_key(key, encoding), data)
 
     infographic_id = str(uuid.uuid4())
     created_at = datetime.utcnow()
     image_url = f"/api/infographics/{infographic_id}/image?format=svg"
-    layout_meta = {"template": info.template, "source_count": len(info.sources)}
+    layout_meta = {"template": template, "source_count": len(info.sources)}
 
-    _infographics[infographic_id] = {
+    record = {
         "id": infographic_id,
         "session_id": info.session_id,
-        "svg": svg,
+        "blob": key,
+        "etag": http_cache.strong_etag(key),
         "layout_meta": layout_meta,
         "created_at": created_at,
     }
-
-    _images[infographic_id] = svg.encode("utf-8")
+    storage.save_infographic(record)
 
     return InfographicMeta(id=infographic_id, session_id=info.session_id, image_url=image_url, layout_meta=layout_meta, created_at=created_at)
 
 
+async def render_png(blob_key: str, svg: bytes, width: Optional[int] = None, dpi: Optional[float] = None) -> bytes:
+    """Rasterize in the worker pool (cached per blob and size); invalid sizes become a 400."""
+    try:
+        return await raster.render_png(blob_key, svg, width=width, dpi=dpi)
+    except raster.RasterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def image_etag(
+    record: Dict[str, Any],
+    format: str = "svg",
+    width: Optional[int] = None,
+    dpi: Optional[float] = None,
+    encoding: Optional[str] = None,
+) -> str:
+    """Strong ETag of an image variant, derived from the ETag stored at generation time."""
+    etag = record.get("etag") or http_cache.strong_etag(record["blob"])
+    if format == "svg":
+        return f'{etag[:-1]}-{encoding}"' if encoding else etag
+    return f'{etag[:-1]}-png-{raster.BACKEND}-w{width or 0}-d{dpi or 0:g}"'
+
+
+def svg_variant(storage, blob_key: str, encoding: Optional[str]) -> Optional[bytes]:
+    """The SVG blob in the given content-coding; variants missing from older records are built once."""
+    svg = storage.get_blob(blob_key)
+    if svg is None or encoding is None:
+        return svg
+    key = compression.variant_key(blob_key, encoding)
+    data = storage.get_blob(key)
+    if data is None:
+        data = compression.CODECS[encoding].compress(svg, static=True)
+        storage.put_blob(key, data)
+    return data
+
+
 @router.get("/{infographic_id}/image")
-async def get_image(infographic_id: str, format: str = Query("svg", regex="^(svg|png)$")):
-    obj = _infographics.get(infographic_id)
-    if not obj:
+async def get_image(
+    infographic_id: str,
+    format: str = Query("svg", regex="^(svg|png)$"),
+    width: Optional[int] = Query(None, ge=16, le=4096),
+    dpi: Optional[float] = Query(None, gt=0, le=1200),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    storage = get_storage()
+    record = storage.get_infographic(infographic_id)
+    if not record:
         raise HTTPException(status_code=404, detail="Infographic not found")
 
+    # Images never change once generated: answer revalidations before loading any bytes
+    encoding = compression.negotiate(accept_encoding) if format == "svg" else None
+    headers = http_cache.validators(image_etag(record, format, width, dpi, encoding), http_cache.IMMUTABLE)
     if format == "svg":
-        return Response(content=obj["svg"], media_type="image/svg+xml")
-    else:
-        # Return a tiny PNG placeholder for demo purposes
-        return Response(content=MIN_PNG_BYTES, media_type="image/png")
+        headers["Vary"] = "Accept-Encoding"
+    cached = http_cache.not_modified(headers, if_none_match)
+    if cached:
+        return cached
+
+    if format == "svg":
+        data = svg_variant(storage, record["blob"], encoding)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Infographic not found")
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=data, media_type="image/svg+xml", headers=headers)
+
+    svg = storage.get_blob(record["blob"])
+    if svg is None:
+        raise HTTPException(status_code=404, detail="Infographic not found")
+    png = await render_png(record["blob"], svg, width=width, dpi=dpi)
+    return Response(content=png, media_type="image/png", headers={**headers, **raster.RESPONSE_HEADERS})
 
 
 # Internal helper for other modules
@@ -146,3 +224,26 @@ async def create_from_prompt(session_id: str, prompt: str, sources: Optional[Lis
     if sources is None:
         sources = []
     return await create_infographic_for_session(session_id=session_id, prompt=prompt, sources=sources)
+
+
+async def refresh_for_session(
+    session_id: str, prompt: str, sources: List[Dict[str, Any]], current: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Infographic for a session whose sources changed (follow-up research), and whether it was
+    re-rendered. When the current infographic already draws the same content (e.g. the new
+    sources fall past the ones the layout shows) nothing is rendered, stored or compressed
+    again; only its layout_meta is brought up to date.
+    """
+    payload = InfographicCreate(session_id=session_id, prompt=prompt, sources=sources)
+    if current:
+        storage = get_storage()
+        record = storage.get_infographic(current.get("id", ""))
+        template, title, drawn_prompt, stats = _render_inputs(payload)
+        if record and record.get("blob") == render_key(template, title, drawn_prompt, sources, stats, payload.bullets):
+            layout_meta = {**record.get("layout_meta", {}), "source_count": len(sources)}
+            storage.save_infographic({**record, "layout_meta": layout_meta})
+            return {**current, "layout_meta": layout_meta}, False
+    res = await generate(payload)
+    return res.dict(), True
+
@@ -0,0 +1,139 @@
+"""
+Background job execution for long-running work (the research pipeline).
+
+Endpoints submit a coroutine factory to the module-level JobQueue and return the job id
+right away; a bounded pool of asyncio worker tasks drains the queue. Clients poll
+GET /api/jobs/{job_id} (or the session itself, whose status moves through
+pending -> running -> completed/failed).
+
+Jobs live in process memory: with several workers sharing a SQLite store, poll the session
+status rather than the job when requests may land on another process.
+"""
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from . import metrics
+
+router = APIRouter(prefix="/api/jobs")
+
+# Configuration
+JOB_WORKERS = int(os.environ.get("LEET_JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.environ.get("LEET_JOB_QUEUE_MAX", "100"))
+JOB_HISTORY_MAX = 1000  # finished jobs kept for polling
+
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    session_id: Optional[str] = None
+    status: str = "pending"  # pending | running | completed | failed
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_MAX, max_history: int = JOB_HISTORY_MAX):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_history = max_history
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_workers(self) -> None:
+        # Workers are bound to the running loop; start (or restart) them on first use in a loop
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, kind: str, run: Callable[[], Awaitable[Any]], session_id: Optional[str] = None) -> Job:
+        """Queue run() for execution. Raises 503 when the queue is full."""
+        self._ensure_workers()
+        job = Job(id=str(uuid.uuid4()), kind=kind, session_id=session_id, created_at=datetime.utcnow())
+        try:
+            self._queue.put_nowait((job, run))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Job queue is full, retry later")
+        self.jobs[job.id] = job
+        self._trim_history()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def running(self) -> int:
+        return sum(1 for j in self.jobs.values() if j.status == "running")
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished (used by tests and graceful shutdown)."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _worker(self) -> None:
+        while True:
+            job, run = await self._queue.get()
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            try:
+                result = await run()
+                job.result = result if isinstance(result, dict) else None
+                job.status = "completed"
+            except Exception as e:
+                job.error = getattr(e, "detail", None) or str(e) or type(e).__name__
+                job.status = "failed"
+            finally:
+                job.finished_at = datetime.utcnow()
+                self._queue.task_done()
+
+    def _trim_history(self) -> None:
+        # Forget the oldest finished jobs beyond max_history; queued/running ones are kept
+        excess = len(self.jobs) - self.max_history
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self.jobs.values() if j.finished_at is not None][:excess]:
+            del self.jobs[job_id]
+
+
+_queue = JobQueue()
+
+
+def submit(kind: str, run: Callable[[], Awaitable[Any]], session_id: Optional[str] = None) -> Job:
+    return _queue.submit(kind, run, session_id=session_id)
+
+
+@metrics.register_collector
+def _collect_metrics():
+    return [
+        ("leet_jobs_queued", "gauge", "Background jobs waiting for a worker.", [({}, _queue.pending())]),
+        ("leet_jobs_running", "gauge", "Background jobs being executed.", [({}, _queue.running())]),
+    ]
+
+
+def run_in_background_default() -> bool:
+    """Whether research endpoints run as background jobs when the request does not say (LEET_RESEARCH_BACKGROUND)."""
+    return os.environ.get("LEET_RESEARCH_BACKGROUND", "").strip().lower() in ("1", "true", "yes")
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    job = _queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,13 +1,17 @@
 import uuid
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, HTTPException, Body
+from typing import List, Optional, Union
+from fastapi import APIRouter, HTTPException, Body, Query
 from pydantic import BaseModel
 
+from . import fastjson
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, take_page
+from .storage import get_storage, memory_storage
+
 router = APIRouter(prefix="/api/messages")
 
-# In-memory store for messages keyed by message id
-_messages = {}
+# In-memory store for messages keyed by message id (the in-memory backend's map; see storage.py)
+_messages = memory_storage().messages.by_id
 
 
 class MessageCreate(BaseModel):
@@ -24,6 +28,22 @@ class Message(BaseModel):
     created_at: datetime
 
 
+class MessagePage(BaseModel):
+    items: List[Message]
+    next_cursor: Optional[str] = None
+
+
+def add_message(message: Message) -> Message:
+    """Store a message. All message writes go through here so per-session lists stay current."""
+    get_storage().append_message(message)
+    return message
+
+
+def messages_for_session(session_id: str) -> List[Message]:
+    """Return a session's messages ordered by created_at ascending."""
+    return get_storage().list_messages(session_id)
+
+
 @router.post("/", response_model=Message)
 async def create_message(payload: MessageCreate = Body(...)):
     if not payload.content.strip():
@@ -37,21 +57,32 @@ async def create_message(payload: MessageCreate = Body(...)):
         content=payload.content,
         created_at=now,
     )
-    _messages[msg_id] = message
-    return message
+    return add_message(message)
 
 
-@router.get("/session/{session_id}", response_model=List[Message])
-async def list_messages_for_session(session_id: str):
-    msgs = [m for m in _messages.values() if m.session_id == session_id]
-    # sort by created_at ascending
-    msgs.sort(key=lambda m: m.created_at)
-    return msgs
+@router.get("/session/{session_id}", response_model=Union[MessagePage, List[Message]])
+async def list_messages_for_session(
+    session_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables paginated response"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
+):
+    """
+    List a session's messages by created_at ascending. With limit or cursor the response is a
+    page ({"items": [...], "next_cursor": ...}); otherwise the full list is returned.
+    Messages never change, so each is encoded once and served from the fragment cache.
+    """
+    if limit is None and cursor is None:
+        return fastjson.RawJSONResponse(fastjson.messages_array(messages_for_session(session_id)))
+    after = decode_cursor(cursor) if cursor else None
+    limit = limit or DEFAULT_PAGE_SIZE
+    msgs = get_storage().list_messages(session_id, after=after, limit=limit + 1)
+    items, next_cursor = take_page(msgs, limit, key=lambda m: (m.created_at, m.id))
+    return fastjson.RawJSONResponse(fastjson.page(fastjson.messages_array(items), next_cursor))
 
 
 @router.get("/{message_id}", response_model=Message)
 async def get_message(message_id: str):
-    msg = _messages.get(message_id)
+    msg = get_storage().get_message(message_id)
     if not msg:
         raise HTTPException(status_code=404, detail="Message not found")
-    return msg
+    return fastjson.RawJSONResponse(fastjson.fragment(fastjson.message_key(msg), msg))
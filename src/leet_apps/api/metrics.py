@@ -0,0 +1,302 @@
+"""
+Process-local metrics exposed in the Prometheus text format at GET /metrics.
+
+Two kinds of data:
+- Event metrics (request latency per route, per-stage span latency, in-flight research
+  runs) are recorded as they happen. Recording is a dict lookup, a bisect and a couple of
+  additions under an uncontended lock; cumulative buckets are only computed when scraped.
+- State metrics (store sizes, cache hit ratios, rate-limit rejections, queue depths) are
+  not maintained at all: modules register a collector that reads their existing stats()
+  when /metrics is scraped, so they cost nothing while nobody is scraping.
+
+Labels are bounded: requests are labelled with the matched route template
+(/api/sessions/{session_id}), never the raw path.
+
+Install on an application with instrument_app(app) (middleware plus the /metrics route).
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from fastapi import APIRouter, Response
+
+router = APIRouter()
+
+# Seconds; from a cache hit to a slow research run
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+# (labels, value) pairs of one metric family
+Samples = List[Tuple[Dict[str, str], float]]
+# name, type ("counter" | "gauge"), help, samples
+Family = Tuple[str, str, str, Samples]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"' for k, v in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    @abstractmethod
+    def expose(self) -> List[str]:
+        """Sample lines of this metric, without the HELP/TYPE header."""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(dict(zip(self.labelnames, k)))} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf)..., sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        lines = []
+        for key, series in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+
+_metrics: Dict[str, _Metric] = {}
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def _register(metric: _Metric) -> _Metric:
+    existing = _metrics.get(metric.name)
+    if existing is not None:
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(f"metric {metric.name} already registered with a different type or labels")
+        return existing
+    _metrics[metric.name] = metric
+    return metric
+
+
+def counter(name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+    return _register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return _register(Gauge(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, labelnames, buckets))
+
+
+def register_collector(collect: Callable[[], Iterable[Family]]) -> Callable[[], Iterable[Family]]:
+    """
+    collect() is called on every scrape and returns (name, type, help, samples) families.
+    Several collectors may return the same family name (one per cache, say); their samples
+    are merged. Usable as a decorator.
+    """
+    _collectors.append(collect)
+    return collect
+
+
+def cache_families(cache: str, stats: Dict[str, float]) -> List[Family]:
+    """Families for a TTLCache.stats() dict, labelled with the cache's name."""
+    labels = {"cache": cache}
+    return [
+        ("leet_cache_hits_total", "counter", "Cache lookups that found a live entry.", [(labels, stats["hits"])]),
+        ("leet_cache_misses_total", "counter", "Cache lookups that found nothing or an expired entry.", [(labels, stats["misses"])]),
+        ("leet_cache_evictions_total", "counter", "Entries evicted to stay within the cache bounds.", [(labels, stats["evictions"])]),
+        ("leet_cache_hit_ratio", "gauge", "hits / (hits + misses) since start.", [(labels, stats["hit_ratio"])]),
+        ("leet_cache_entries", "gauge", "Entries currently cached.", [(labels, stats["entries"])]),
+        ("leet_cache_bytes", "gauge", "Approximate size of the cached values.", [(labels, stats["bytes"])]),
+    ]
+
+
+request_duration = histogram(
+    "leet_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+requests_in_progress = gauge("leet_http_requests_in_progress", "HTTP requests being handled.")
+stage_duration = histogram("leet_stage_duration_seconds", "Latency of instrumented stages (spans).", ("stage",))
+
+
+def span(stage: str):
+    """Time a block as one stage: `with metrics.span("research.search"): ...`."""
+    return stage_duration.time(stage=stage)
+
+
+def timed_iter(stage: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Wrap a streaming body; records the time spent producing chunks (not waiting on the client)."""
+    elapsed = 0.0
+    iterator = iter(chunks)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started
+            yield chunk
+    finally:
+        stage_duration.observe(elapsed, stage=stage)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in list(_metrics.values()):
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.expose())
+    families: Dict[str, Tuple[str, str, Samples]] = {}
+    for collect in list(_collectors):
+        for name, kind, help, samples in collect():
+            families.setdefault(name, (kind, help, []))[2].extend(samples)
+    for name, (kind, help, samples) in families.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Zero every recorded series (tests, benchmarks); collectors are unaffected."""
+    for metric in _metrics.values():
+        with metric._lock:
+            if isinstance(metric, Histogram):
+                metric._series.clear()
+            else:
+                metric._values.clear()
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency (to the end of the body, so streams count in full)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_progress.dec()
+            request_duration.observe(
+                time.perf_counter() - started, method=scope["method"], route=_route_template(scope), status=status
+            )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+def instrument_app(app) -> None:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
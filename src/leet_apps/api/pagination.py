@@ -0,0 +1,48 @@
+"""
+Keyset (cursor) pagination helpers shared by the listing endpoints.
+
+Listings are ordered by (created_at, id). A cursor encodes the key of the last item on a
+page, so the next page starts strictly after it regardless of inserts in between. Cursors
+are opaque to clients: URL-safe base64 over a small JSON array.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar("T")
+SortKey = Tuple[datetime, str]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(key: SortKey) -> str:
+    created_at, item_id = key
+    raw = json.dumps([created_at.isoformat(), item_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Decode a cursor produced by encode_cursor; malformed cursors are a client error (400)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def take_page(items: Iterable[T], limit: int, key: Callable[[T], SortKey]) -> Tuple[List[T], Optional[str]]:
+    """
+    Consume at most limit + 1 items from an already ordered iterable.
+    Returns the page and the cursor for the following page (None when this is the last page).
+    """
+    page: List[T] = []
+    for item in items:
+        if len(page) == limit:
+            return page, encode_cursor(key(page[-1]))
+        page.append(item)
+    return page, None
@@ -0,0 +1,245 @@
+"""
+Sampling profiler for slow research requests.
+
+Watched requests (POST /api/chat/send and POST /api/sessions/{id}/run by default) are
+sampled every PROFILE_INTERVAL_MS by one background thread while they are in flight. A
+sample is the request task's stack at that instant:
+
+- while the task is running on the event loop, the loop thread's Python stack (CPU work:
+  template rendering, serialization, ...);
+- while it is suspended, the chain of coroutines it is awaiting, ending in an "[await]"
+  frame (time spent waiting on providers, the raster pool, a coalesced search, ...).
+
+Nothing is recorded for requests that finish under PROFILE_SLOW_MS. Slower ones keep their
+samples, aggregated as collapsed stacks ("frame;frame;frame count" lines, the input format
+of flamegraph.pl and speedscope), in a ring buffer of the last PROFILE_HISTORY profiles,
+served by the admin endpoints below. The sampler thread only runs while a watched request
+is in flight, and a sample is a dict lookup plus a frame walk, so the overhead is bounded
+by the interval rather than by the work being profiled.
+
+Install with install_profiler(app). Configuration (environment):
+- LEET_PROFILE_SLOW_MS: keep profiles of requests slower than this (default 1000)
+- LEET_PROFILE_INTERVAL_MS: sampling interval (default 5)
+- LEET_PROFILE_HISTORY: profiles kept (default 50)
+- LEET_ADMIN_TOKEN: the admin endpoints require a matching X-Admin-Token header; they
+  answer 403 to everyone while it is unset
+"""
+import asyncio
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Pattern, Sequence
+
+from fastapi import APIRouter, Header, HTTPException, Response
+
+router = APIRouter(prefix="/api/admin/profiles")
+
+# Configuration
+PROFILE_SLOW_MS = float(os.environ.get("LEET_PROFILE_SLOW_MS", "1000"))
+PROFILE_INTERVAL_MS = float(os.environ.get("LEET_PROFILE_INTERVAL_MS", "5"))
+PROFILE_HISTORY = int(os.environ.get("LEET_PROFILE_HISTORY", "50"))
+MAX_STACK_DEPTH = 64
+
+WATCHED_ROUTES: List[Pattern[str]] = [
+    re.compile(r"^/api/chat/send/?$"),
+    re.compile(r"^/api/sessions/[^/]+/run/?$"),
+]
+
+
+def _frame_label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _thread_stack(frame) -> List[str]:
+    """Root-first labels of a thread's frames."""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _await_stack(coro) -> List[str]:
+    """Root-first labels of a suspended coroutine and everything it is awaiting."""
+    labels = []
+    while coro is not None and len(labels) < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    labels.append("[await]")
+    return labels
+
+
+class _Watch:
+    __slots__ = ("task", "loop", "thread_id", "root", "samples")
+
+    def __init__(self, task: "asyncio.Task", loop: asyncio.AbstractEventLoop, thread_id: int):
+        self.task = task
+        self.loop = loop
+        self.thread_id = thread_id
+        # Label of the task's outermost coroutine: running-stack samples are trimmed to start
+        # there, dropping the event loop frames above it
+        code = getattr(task.get_coro(), "cr_code", None)
+        self.root = _frame_label(code) if code is not None else None
+        self.samples: Counter = Counter()
+
+
+class Sampler:
+    """One background thread sampling every registered request task."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self._watches: Dict[int, _Watch] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, task: "asyncio.Task") -> _Watch:
+        watch = _Watch(task, task.get_loop(), threading.get_ident())
+        with self._lock:
+            self._watches[id(watch)] = watch
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="leet-profiler", daemon=True)
+                self._thread.start()
+        return watch
+
+    def stop(self, watch: _Watch) -> Counter:
+        with self._lock:
+            self._watches.pop(id(watch), None)
+        return watch.samples
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                watches = list(self._watches.values())
+                if not watches:
+                    self._thread = None  # restarted by the next start()
+                    return
+            frames = sys._current_frames()
+            for watch in watches:
+                stack = self._sample(watch, frames)
+                if stack:
+                    watch.samples[";".join(stack)] += 1
+
+    @staticmethod
+    def _sample(watch: _Watch, frames: Dict[int, Any]) -> List[str]:
+        try:
+            if asyncio.current_task(watch.loop) is watch.task:
+                stack = _thread_stack(frames.get(watch.thread_id))
+                if watch.root in stack:
+                    stack = stack[stack.index(watch.root):]
+                return stack
+            return _await_stack(watch.task.get_coro())
+        except (RuntimeError, ValueError):  # the task finished or the loop closed under us
+            return []
+
+
+_sampler = Sampler()
+_profiles: Deque[Dict[str, Any]] = deque(maxlen=PROFILE_HISTORY)
+
+
+def collapsed(samples: Counter) -> str:
+    """flamegraph.pl / speedscope input: one "frame;frame;... count" line per distinct stack."""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+def record(method: str, path: str, duration_ms: float, samples: Counter, interval_ms: float) -> Dict[str, Any]:
+    profile = {
+        "id": str(uuid.uuid4()),
+        "method": method,
+        "path": path,
+        "duration_ms": round(duration_ms, 3),
+        "recorded_at": datetime.utcnow(),
+        "interval_ms": interval_ms,
+        "sample_count": sum(samples.values()),
+        "samples": samples,
+    }
+    _profiles.append(profile)
+    return profile
+
+
+def watched(path: str, routes: Sequence[Pattern[str]] = WATCHED_ROUTES) -> bool:
+    return any(r.match(path) for r in routes)
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware sampling watched requests and keeping profiles of the slow ones."""
+
+    def __init__(self, app, slow_ms: float = PROFILE_SLOW_MS, routes: Sequence[Pattern[str]] = WATCHED_ROUTES):
+        self.app = app
+        self.slow_ms = slow_ms
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not watched(scope["path"], self.routes):
+            await self.app(scope, receive, send)
+            return
+        watch = _sampler.start(asyncio.current_task())
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000.0
+            samples = _sampler.stop(watch)
+            if duration_ms >= self.slow_ms:
+                record(scope["method"], scope["path"], duration_ms, samples, _sampler.interval * 1000.0)
+
+
+def install_profiler(app, slow_ms: float = PROFILE_SLOW_MS, routes: Sequence[Pattern[str]] = WATCHED_ROUTES) -> None:
+    """Profile watched routes and mount the admin endpoints (the only supported way to mount them)."""
+    app.add_middleware(ProfilerMiddleware, slow_ms=slow_ms, routes=routes)
+    app.include_router(router)
+
+
+def _check_admin(token: Optional[str]) -> None:
+    # Fails closed: without LEET_ADMIN_TOKEN configured the admin endpoints stay shut
+    expected = os.environ.get("LEET_ADMIN_TOKEN")
+    if not expected or not token or not hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="admin token required")
+
+
+def _get_or_404(profile_id: str) -> Dict[str, Any]:
+    for profile in _profiles:
+        if profile["id"] == profile_id:
+            return profile
+    raise HTTPException(status_code=404, detail="Profile not found")
+
+
+@router.get("/")
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Recent slow-request profiles, newest first (without their stacks)."""
+    _check_admin(x_admin_token)
+    return [{k: v for k, v in p.items() if k != "samples"} for p in reversed(_profiles)]
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, top: int = 20, x_admin_token: Optional[str] = Header(None)):
+    """One profile with its most frequent stacks."""
+    _check_admin(x_admin_token)
+    profile = _get_or_404(profile_id)
+    stacks = [{"stack": stack.split(";"), "samples": n} for stack, n in profile["samples"].most_common(top)]
+    return {**{k: v for k, v in profile.items() if k != "samples"}, "top_stacks": stacks}
+
+
+@router.get("/{profile_id}/collapsed")
+async def get_profile_collapsed(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Collapsed stacks, e.g. `curl .../collapsed | flamegraph.pl > profile.svg`."""
+    _check_admin(x_admin_token)
+    return Response(collapsed(_get_or_404(profile_id)["samples"]), media_type="text/plain")
+
+
+@router.delete("/")
+async def clear_profiles(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    _profiles.clear()
+    return {"status": "ok"}
@@ -0,0 +1,218 @@
+"""
+Search providers and parallel source gathering.
+
+A provider turns a query into a list of source dicts (title, url, snippet, fetched_at,
+confidence). gather_sources fans a query out to every provider at once; each provider has
+its own timeout and a semaphore limiting how many of its calls may be in flight across all
+concurrent searches (protecting rate-limited upstreams). A provider that is slow or fails
+is skipped, so callers get partial results instead of an error. Results are de-duplicated
+by canonical URL, keeping provider priority order.
+
+MockProvider reproduces the demo's deterministic results; FakeProvider injects latency and
+failures so tests and benchmarks can exercise the fan-out without the network.
+"""
+import asyncio
+import logging
+import random
+import weakref
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER_TIMEOUT_SECONDS = 5.0
+DEFAULT_PROVIDER_CONCURRENCY = 4
+
+SourceCallback = Callable[[Dict[str, Any]], None]
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL for identity comparisons: lower-case scheme and host, drop default
+    ports, fragments, tracking (utm_*) parameters and trailing slashes, sort the query.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)) else None
+    netloc = f"{host}:{port}" if port else host
+    path = parts.path.rstrip("/")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.startswith("utm_")))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class SearchProvider(ABC):
+    def __init__(self, name: str, timeout: float = DEFAULT_PROVIDER_TIMEOUT_SECONDS, concurrency: int = DEFAULT_PROVIDER_CONCURRENCY):
+        self.name = name
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.stats: Dict[str, int] = {"calls": 0, "results": 0, "errors": 0, "timeouts": 0}
+        # asyncio primitives belong to one event loop; keep one semaphore per loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return sem
+
+    @abstractmethod
+    async def search(self, query: str) -> List[Dict[str, Any]]:
+        """Return source dicts for the query."""
+
+    async def fetch(self, query: str) -> List[Dict[str, Any]]:
+        """search() bounded by this provider's semaphore and timeout. Errors propagate."""
+        async with self._semaphore():
+            self.stats["calls"] += 1
+            return await asyncio.wait_for(self.search(query), timeout=self.timeout)
+
+
+class MockProvider(SearchProvider):
+    """Deterministic single-result provider built from format strings ({q} and {slug})."""
+
+    def __init__(self, name: str, title: str, url: str, snippet: str, confidence: float, **kwargs):
+        super().__init__(name, **kwargs)
+        self.title = title
+        self.url = url
+        self.snippet = snippet
+        self.confidence = confidence
+
+    async def search(self, query: str) -> List[Dict[str, Any]]:
+        fields = {"q": query, "slug": query.replace(" ", "-")}
+        return [
+            {
+                "title": self.title.format(**fields),
+                "url": self.url.format(**fields),
+                "snippet": self.snippet.format(**fields),
+                "fetched_at": datetime.utcnow(),
+                "confidence": self.confidence,
+            }
+        ]
+
+
+class FakeProvider(SearchProvider):
+    """
+    Local stand-in for a network provider with latency and failure injection.
+
+    latency/jitter: seconds slept per call (uniform jitter added). failure_rate: probability a
+    call raises. shared_urls: URLs every provider instance returns, to exercise de-duplication.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        results: int = 3,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        shared_urls: Optional[List[str]] = None,
+        confidence: float = 0.5,
+        seed: Optional[int] = None,
+        **kwargs,
+    ):
+        super().__init__(name, **kwargs)
+        self.results = results
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.shared_urls = shared_urls or []
+        self.confidence = confidence
+        self._random = random.Random(seed)
+
+    async def search(self, query: str) -> List[Dict[str, Any]]:
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError(f"{self.name}: injected failure")
+        slug = query.replace(" ", "-")
+        now = datetime.utcnow()
+        urls = [f"https://{self.name}.fake.test/{slug}/{i}" for i in range(self.results)] + list(self.shared_urls)
+        return [
+            {
+                "title": f"{self.name} result {i} for {query}",
+                "url": url,
+                "snippet": f"Snippet {i} about {query} from {self.name}.",
+                "fetched_at": now,
+                "confidence": self.confidence,
+            }
+            for i, url in enumerate(urls)
+        ]
+
+
+class ProvidersUnavailable(RuntimeError):
+    """Every provider failed or timed out, so there is not even a partial result."""
+
+
+async def _fetch_one(provider: SearchProvider, query: str) -> Optional[List[Dict[str, Any]]]:
+    """Provider results, or None when it failed or timed out."""
+    try:
+        return await provider.fetch(query)
+    except asyncio.TimeoutError:
+        provider.stats["timeouts"] += 1
+        logger.warning("search provider %s timed out after %.2fs", provider.name, provider.timeout)
+    except Exception:
+        provider.stats["errors"] += 1
+        logger.warning("search provider %s failed", provider.name, exc_info=True)
+    return None
+
+
+async def gather_sources(
+    query: str,
+    providers: List[SearchProvider],
+    on_source: Optional[SourceCallback] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Query every provider concurrently and merge their results, de-duplicated by canonical URL.
+
+    on_source, when given, is called once per unique source as soon as its provider answers,
+    so progress can be streamed before the slowest provider finishes. The returned list is
+    in provider order (then each provider's own order); for duplicate URLs the first
+    occurrence keeps its position and the highest confidence wins.
+
+    Raises ProvidersUnavailable only when every provider failed.
+    """
+    tasks = [asyncio.ensure_future(_fetch_one(p, query)) for p in providers]
+    seen: Dict[str, Dict[str, Any]] = {}
+    try:
+        if on_source is not None:
+            for done in asyncio.as_completed(tasks):
+                for source in await done or []:
+                    key = canonicalize_url(source.get("url", ""))
+                    if key not in seen:
+                        seen[key] = source
+                        on_source(source)
+        else:
+            await asyncio.gather(*tasks)
+    finally:
+        # Cancelled, or on_source raised: stop the provider calls still running (and release
+        # their semaphore slots) instead of leaving them orphaned
+        pending = [t for t in tasks if not t.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    outcomes = [t.result() for t in tasks]
+    if providers and all(r is None for r in outcomes):
+        raise ProvidersUnavailable(f"all {len(providers)} search providers failed for query")
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for provider, results in zip(providers, outcomes):
+        if results is None:
+            continue
+        provider.stats["results"] += len(results)
+        for source in results:
+            key = canonicalize_url(source.get("url", ""))
+            current = merged.get(key)
+            if current is None:
+                merged[key] = source
+            elif source.get("confidence", 0) > current.get("confidence", 0):
+                merged[key] = {**current, "confidence": source["confidence"]}
+    return list(merged.values())
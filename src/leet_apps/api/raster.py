@@ -0,0 +1,380 @@
+"""
+SVG to PNG rasterization off the event loop.
+
+Rasterizing is CPU-bound, so render_png() ships the work to a process pool (no GIL
+contention with request handling; workers are started with forkserver, or spawn where that
+is unavailable, never fork) and awaits the result. A per-loop semaphore caps how
+many rasterizations are queued at once, identical requests in flight share one job, and
+finished PNGs are kept in a size-bounded TTLCache keyed by image content and output size.
+The SVG's intrinsic size is cached per content key as well, so a cache hit does no parsing.
+
+Backends:
+- cairosvg, when installed: full SVG support with real glyph rendering.
+- a built-in fallback that needs only the standard library. It understands the subset of
+  SVG our templates emit (rect, line, text, <g transform='translate(...)'>, class styles)
+  and draws text as "greeked" blocks, which keeps layouts recognisable without fonts.
+  Output is a zlib-compressed RGB PNG.
+
+Configuration (environment):
+- LEET_RASTER_WORKERS: worker processes (default: min(4, cpu count)); 0 rasterizes in a
+  thread instead, for platforms without fork/spawn support.
+- LEET_RASTER_CONCURRENCY: rasterizations queued or running at once (default 8).
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+import struct
+import weakref
+import xml.etree.ElementTree as ET
+import zlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+from .cache import TTLCache
+
+try:  # optional dependency
+    import cairosvg
+except ImportError:  # pragma: no cover - depends on the environment
+    cairosvg = None
+
+BACKEND = "cairosvg" if cairosvg is not None else "builtin"
+# Sent with every PNG, so clients can tell a greeked (builtin) rendering from a full one
+RESPONSE_HEADERS = {"X-Raster-Backend": BACKEND}
+
+# Configuration
+RASTER_WORKERS = int(os.environ.get("LEET_RASTER_WORKERS", str(min(4, os.cpu_count() or 1))))
+RASTER_CONCURRENCY = int(os.environ.get("LEET_RASTER_CONCURRENCY", "8"))
+PNG_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PNG_CACHE_TTL_SECONDS = 3600
+SIZE_CACHE_MAX_ENTRIES = 4096
+MAX_PIXELS = 4096 * 4096  # refuse outputs larger than this
+CSS_DPI = 96.0  # SVG user units are CSS pixels
+
+Color = Tuple[int, int, int]
+
+
+class RasterError(ValueError):
+    """The SVG cannot be rasterized at the requested size."""
+
+
+# PNG encoding
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def encode_png(width: int, height: int, rgb: bytes) -> bytes:
+    """Encode packed 8-bit RGB rows as a PNG (filter type 0 on every row)."""
+    stride = width * 3
+    raw = b"".join(b"\x00" + rgb[y * stride:(y + 1) * stride] for y in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", header) + _chunk(b"IDAT", zlib.compress(raw, 6)) + _chunk(b"IEND", b"")
+
+
+# Fallback rasterizer
+
+_NAMED_COLORS = {"white": (255, 255, 255), "black": (0, 0, 0), "none": None}
+_CSS_RULE = re.compile(r"\.([\w-]+)\s*\{([^}]*)\}")
+_FONT_SIZE = re.compile(r"(\d+(?:\.\d+)?)px")
+_TRANSLATE = re.compile(r"translate\(\s*([-\d.]+)(?:[\s,]+([-\d.]+))?\s*\)")
+
+
+def _parse_color(value: Optional[str]) -> Optional[Color]:
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in _NAMED_COLORS:
+        return _NAMED_COLORS[value]
+    if value.startswith("#"):
+        digits = value[1:]
+        if len(digits) == 3:
+            digits = "".join(c * 2 for c in digits)
+        if len(digits) == 6:
+            try:
+                return (int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16))
+            except ValueError:
+                return None
+    return None
+
+
+def _parse_styles(root: ET.Element) -> Dict[str, Dict[str, str]]:
+    styles: Dict[str, Dict[str, str]] = {}
+    for el in root.iter():
+        if _local(el.tag) == "style" and el.text:
+            for name, body in _CSS_RULE.findall(el.text):
+                props = dict(
+                    (k.strip(), v.strip()) for k, _, v in (p.partition(":") for p in body.split(";")) if v.strip()
+                )
+                styles[name] = props
+    return styles
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _length(value: Optional[str], reference: float, default: float = 0.0) -> float:
+    if value is None:
+        return default
+    value = value.strip()
+    try:
+        if value.endswith("%"):
+            return float(value[:-1]) / 100.0 * reference
+        return float(value.rstrip("px"))
+    except ValueError:
+        return default
+
+
+class _Canvas:
+    def __init__(self, width: int, height: int, scale: float):
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.pixels = bytearray(b"\xff" * (width * height * 3))
+
+    def fill_rect(self, x: float, y: float, w: float, h: float, color: Color) -> None:
+        s = self.scale
+        x0, x1 = max(0, int(round(x * s))), min(self.width, int(round((x + w) * s)))
+        y0, y1 = max(0, int(round(y * s))), min(self.height, int(round((y + h) * s)))
+        if x0 >= x1 or y0 >= y1:
+            return
+        span = bytes(color) * (x1 - x0)
+        stride = self.width * 3
+        for row in range(y0, y1):
+            start = row * stride + x0 * 3
+            self.pixels[start:start + len(span)] = span
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, color: Color, stroke: float = 1.0) -> None:
+        # Axis-aligned lines are rectangles; anything else is stepped along its longer axis
+        half = stroke / 2.0
+        if y1 == y2 or x1 == x2:
+            self.fill_rect(min(x1, x2) - (half if x1 == x2 else 0), min(y1, y2) - (half if y1 == y2 else 0),
+                           abs(x2 - x1) or stroke, abs(y2 - y1) or stroke, color)
+            return
+        steps = max(1, int(max(abs(x2 - x1), abs(y2 - y1)) * self.scale))
+        for i in range(steps + 1):
+            t = i / steps
+            self.fill_rect(x1 + (x2 - x1) * t - half, y1 + (y2 - y1) * t - half, stroke, stroke, color)
+
+    def text(self, x: float, y: float, text: str, size: float, color: Color) -> None:
+        # Greeked text: one block per non-space character, sitting on the baseline
+        advance = size * 0.55
+        glyph_w, glyph_h = advance * 0.8, size * 0.6
+        for i, ch in enumerate(text):
+            gx = x + i * advance
+            if gx * self.scale >= self.width:
+                break
+            if not ch.isspace():
+                self.fill_rect(gx, y - glyph_h, glyph_w, glyph_h, color)
+
+
+def _fallback_rasterize(svg: bytes, width: int, height: int, scale: float) -> bytes:
+    root = ET.fromstring(svg)
+    styles = _parse_styles(root)
+    canvas = _Canvas(width, height, scale)
+    view_w, view_h = width / scale, height / scale
+
+    def style_of(el: ET.Element) -> Dict[str, str]:
+        props: Dict[str, str] = {}
+        for cls in (el.get("class") or "").split():
+            props.update(styles.get(cls, {}))
+        for attr in ("fill", "stroke", "stroke-width", "font-size"):
+            if el.get(attr) is not None:
+                props[attr] = el.get(attr)
+        return props
+
+    def draw(el: ET.Element, dx: float, dy: float) -> None:
+        tag = _local(el.tag)
+        if tag == "g":
+            match = _TRANSLATE.search(el.get("transform") or "")
+            if match:
+                dx += float(match.group(1))
+                dy += float(match.group(2) or 0)
+            for child in el:
+                draw(child, dx, dy)
+        elif tag == "svg":
+            for child in el:
+                draw(child, dx, dy)
+        elif tag == "rect":
+            color = _parse_color(style_of(el).get("fill", "black"))
+            if color:
+                canvas.fill_rect(
+                    dx + _length(el.get("x"), view_w), dy + _length(el.get("y"), view_h),
+                    _length(el.get("width"), view_w), _length(el.get("height"), view_h), color,
+                )
+        elif tag == "line":
+            props = style_of(el)
+            color = _parse_color(props.get("stroke"))
+            if color:
+                canvas.line(
+                    dx + _length(el.get("x1"), view_w), dy + _length(el.get("y1"), view_h),
+                    dx + _length(el.get("x2"), view_w), dy + _length(el.get("y2"), view_h),
+                    color, _length(props.get("stroke-width"), 1.0, 1.0),
+                )
+        elif tag == "text":
+            props = style_of(el)
+            color = _parse_color(props.get("fill", "black")) or (0, 0, 0)
+            match = _FONT_SIZE.search(props.get("font", "") + " " + props.get("font-size", ""))
+            size = float(match.group(1)) if match else 16.0
+            canvas.text(dx + _length(el.get("x"), view_w), dy + _length(el.get("y"), view_h), "".join(el.itertext()), size, color)
+
+    draw(root, 0.0, 0.0)
+    return encode_png(width, height, bytes(canvas.pixels))
+
+
+def _intrinsic_size(svg: bytes) -> Tuple[float, float]:
+    root = ET.fromstring(svg)
+    view_box = (root.get("viewBox") or "").replace(",", " ").split()
+    if len(view_box) == 4:
+        return float(view_box[2]), float(view_box[3])
+    return _length(root.get("width"), 0, 800.0), _length(root.get("height"), 0, 600.0)
+
+
+def _parsed_size(svg: bytes) -> Tuple[float, float]:
+    try:
+        return _intrinsic_size(svg)
+    except ET.ParseError as e:
+        raise RasterError(f"invalid SVG: {e}") from None
+
+
+def output_size(svg: bytes, width: Optional[int] = None, dpi: Optional[float] = None) -> Tuple[int, int, float]:
+    """(width, height, scale) of the PNG for a requested width or DPI; width wins when both are given."""
+    return _scaled_size(*_parsed_size(svg), width, dpi)
+
+
+def _scaled_size(view_w: float, view_h: float, width: Optional[int], dpi: Optional[float]) -> Tuple[int, int, float]:
+    scale = width / view_w if width else (dpi or CSS_DPI) / CSS_DPI
+    out_w, out_h = max(1, int(round(view_w * scale))), max(1, int(round(view_h * scale)))
+    if out_w * out_h > MAX_PIXELS:
+        raise RasterError(f"requested size {out_w}x{out_h} exceeds the {MAX_PIXELS} pixel limit")
+    return out_w, out_h, scale
+
+
+def rasterize(svg: bytes, width: Optional[int] = None, dpi: Optional[float] = None) -> bytes:
+    """Render SVG bytes to PNG bytes. Synchronous and CPU-bound; runs in the worker processes."""
+    out_w, out_h, scale = output_size(svg, width, dpi)
+    if cairosvg is not None:
+        return cairosvg.svg2png(bytestring=svg, output_width=out_w, output_height=out_h)
+    return _fallback_rasterize(svg, out_w, out_h, scale)
+
+
+# Pool, concurrency cap and cache
+
+_executor: Optional[Executor] = None
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+# In-flight renders per loop (a future can only be awaited on the loop that owns it)
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int, int], asyncio.Future[bytes]]]" = (
+    weakref.WeakKeyDictionary()
+)
+_cache = TTLCache(max_bytes=PNG_CACHE_MAX_BYTES, ttl_seconds=PNG_CACHE_TTL_SECONDS, size_of=len)
+# Intrinsic (viewBox) size per cache_key, so cache hits never parse the SVG on the event loop
+_sizes = TTLCache(max_entries=SIZE_CACHE_MAX_ENTRIES, ttl_seconds=PNG_CACHE_TTL_SECONDS)
+_stats = {"renders": 0, "coalesced": 0}
+
+
+def _mp_context():
+    # Never fork: the server process already runs threads (anyio's pool, the profiler's sampler)
+    # whose locks a forked child would inherit in whatever state they were in
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        _executor = (
+            ProcessPoolExecutor(max_workers=RASTER_WORKERS, mp_context=_mp_context())
+            if RASTER_WORKERS > 0
+            else ThreadPoolExecutor(max_workers=1)
+        )
+    return _executor
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(RASTER_CONCURRENCY)
+    return sem
+
+
+def _loop_inflight() -> Dict[Tuple[str, int, int], "asyncio.Future[bytes]"]:
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.get(loop)
+    if inflight is None:
+        inflight = _inflight[loop] = {}
+    return inflight
+
+
+def _inflight_count() -> int:
+    return sum(len(inflight) for inflight in list(_inflight.values()))
+
+
+def _finished(inflight: Dict, key: Tuple[str, int, int], future: "asyncio.Future[bytes]") -> None:
+    inflight.pop(key, None)
+    if not future.cancelled():
+        future.exception()  # retrieved, so a failure whose waiters all left is not logged as unhandled
+
+
+async def _render(key: Tuple[str, int, int], svg: bytes, width: int) -> bytes:
+    async with _semaphore():
+        png = await asyncio.get_running_loop().run_in_executor(_get_executor(), rasterize, svg, width)
+    _stats["renders"] += 1
+    _cache.set(key, png)
+    return png
+
+
+async def render_png(cache_key: str, svg: bytes, width: Optional[int] = None, dpi: Optional[float] = None) -> bytes:
+    """
+    PNG for an SVG at the requested width or DPI. cache_key identifies the SVG content (the
+    infographic's blob key); the rendered size is added to it, so each size is cached once.
+    Raises RasterError for invalid SVG or oversized output.
+    """
+    size = _sizes.get(cache_key)
+    if size is None:
+        size = _parsed_size(svg)
+        _sizes.set(cache_key, size)
+    out_w, out_h, _ = _scaled_size(*size, width, dpi)
+    key = (cache_key, out_w, out_h)
+    png = _cache.get(key)
+    if png is not None:
+        return png
+    inflight = _loop_inflight()
+    future = inflight.get(key)
+    if future is not None:
+        _stats["coalesced"] += 1
+        return await asyncio.shield(future)
+    future = asyncio.ensure_future(_render(key, svg, out_w))
+    inflight[key] = future
+    future.add_done_callback(lambda f: _finished(inflight, key, f))
+    return await asyncio.shield(future)
+
+
+def stats() -> Dict[str, object]:
+    return {**_stats, "backend": BACKEND, "inflight": _inflight_count(), "cache": _cache.stats()}
+
+
+@metrics.register_collector
+def _collect_metrics():
+    return metrics.cache_families("png", _cache.stats()) + [
+        ("leet_raster_renders_total", "counter", "PNG rasterizations performed.", [({"backend": BACKEND}, _stats["renders"])]),
+        ("leet_raster_inflight", "gauge", "PNG rasterizations in progress.", [({}, _inflight_count())]),
+    ]
+
+
+def clear_cache() -> None:
+    _cache.clear()
+    _sizes.clear()
+
+
+def shutdown() -> None:
+    """
+    Stop the worker processes (they are started again on next use). The infographics and
+    sessions routers call this from their shutdown hooks.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,178 @@
+"""
+Token-bucket rate limiting usable as a FastAPI dependency on any router.
+
+Each key (client IP, user id, API key, ...) owns one bucket: a token count and the time it
+was last refilled. A request refills the bucket for the elapsed time, then spends one token,
+so a check is O(1) and memory is constant per key. Buckets are kept in least-recently-used
+order; a bucket idle long enough to have refilled completely carries no state, so it is
+dropped, and max_keys bounds memory when many distinct clients appear at once.
+
+Usage:
+
+    limiter = TokenBucketLimiter("search", rate=10 / 60, burst=10)
+    @router.get("/", dependencies=[Depends(rate_limit(limiter, key=client_ip))])
+"""
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Request
+
+from . import metrics
+
+KeyFunc = Callable[[Request], str]
+
+# Every live limiter, in creation order, so stats can be reported in one place. Held weakly:
+# limiters built per app or per test disappear from here (and from /metrics) with them.
+_limiters: "weakref.WeakKeyDictionary[TokenBucketLimiter, None]" = weakref.WeakKeyDictionary()
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class TokenBucketLimiter:
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        rate: tokens added per second; burst: bucket capacity (max requests in a burst).
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # After this long without requests a bucket is full again and can be forgotten
+        self.idle_seconds = burst / rate
+        self._clock = clock
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        _limiters[self] = None
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """
+        Try to spend cost tokens for key. Returns 0.0 when allowed, otherwise the number of
+        seconds until enough tokens will be available (nothing is spent in that case).
+        """
+        now = self._clock()
+        self._evict_idle(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(float(self.burst), now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            self._buckets.move_to_end(key)
+
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            self.allowed += 1
+            return 0.0
+        self.rejected += 1
+        return (cost - bucket.tokens) / self.rate
+
+    def allow(self, key: str, cost: float = 1.0) -> bool:
+        return self.acquire(key, cost) == 0.0
+
+    def reset(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self._buckets.clear()
+        else:
+            self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        return {"keys": len(self._buckets), "allowed": self.allowed, "rejected": self.rejected}
+
+    def _evict_idle(self, now: float) -> None:
+        # Buckets are in last-use order, so idle ones are at the front
+        cutoff = now - self.idle_seconds
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket.updated > cutoff:
+                break
+            del self._buckets[key]
+
+
+def limiters() -> List["TokenBucketLimiter"]:
+    return list(_limiters.keys())
+
+
+@metrics.register_collector
+def _collect_metrics():
+    live = limiters()
+    return [
+        ("leet_rate_limit_allowed_total", "counter", "Requests let through by a limiter.",
+         [({"limiter": l.name}, l.allowed) for l in live]),
+        ("leet_rate_limit_rejected_total", "counter", "Requests rejected with 429 by a limiter.",
+         [({"limiter": l.name}, l.rejected) for l in live]),
+        ("leet_rate_limit_keys", "gauge", "Buckets currently tracked by a limiter.",
+         [({"limiter": l.name}, len(l)) for l in live]),
+    ]
+
+
+# Key functions: map a request to the identity a limit applies to.
+
+def client_ip(request: Request) -> str:
+    client = getattr(request, "client", None)
+    return getattr(client, "host", None) or "testclient"
+
+
+def user_id(request: Request) -> str:
+    """
+    X-User-Id header when present, otherwise the client IP.
+
+    The header is client-supplied: only use this key behind a proxy that authenticates it, or
+    for limits that protect fairness rather than cost (a client rotating it gets a fresh bucket
+    per value). The research endpoints are keyed on client_ip.
+    """
+    uid = request.headers.get("x-user-id")
+    return f"user:{uid}" if uid else f"ip:{client_ip(request)}"
+
+
+def api_key(request: Request) -> str:
+    """X-API-Key header when present, otherwise the client IP."""
+    key = request.headers.get("x-api-key")
+    return f"key:{key}" if key else f"ip:{client_ip(request)}"
+
+
+def rate_limit(limiter: TokenBucketLimiter, key: KeyFunc = client_ip, cost: float = 1.0):
+    """Build a dependency that raises 429 (with Retry-After) when the key's bucket is empty."""
+
+    async def dependency(request: Request) -> None:
+        retry_after = limiter.acquire(key(request), cost)
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="rate limit exceeded",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+            )
+
+    return dependency
+
+
+# Shared budget for the expensive research pipeline (/api/chat/send and /api/sessions/{id}/run),
+# per client IP
+RESEARCH_RATE_LIMIT_BURST = 10
+RESEARCH_RATE_LIMIT_PER_MINUTE = 10
+research_limiter = TokenBucketLimiter(
+    "research", rate=RESEARCH_RATE_LIMIT_PER_MINUTE / 60, burst=RESEARCH_RATE_LIMIT_BURST
+)
@@ -0,0 +1,179 @@
+"""
+Compact records for the in-memory backend.
+
+A pydantic model instance costs several hundred bytes before its field values: the instance,
+its __dict__, the fields-set bookkeeping and a datetime object per timestamp. With millions of
+messages that overhead dominates the process size, so InMemoryStorage keeps slotted records
+instead and builds the routers' models only when a record is read:
+
+- one __slots__ class per record type (no per-instance __dict__);
+- timestamps as integer microseconds since the epoch (naive UTC, as the SQLite backend
+  stores them), which also makes sort keys cheap to compare;
+- the strings many records repeat (user_id, session_id, role, status, tags) interned, so
+  all records of a session or user share one string object.
+
+RecordTable is a dict-like id -> model view over a table of records: reads return a fresh
+model, writes pack the model. Callers must save a model after changing it (all session
+writes already go through sessions.save_session). InMemoryStorage gives its tables save and
+delete hooks, so item writes through the tables (the routers' _users, _sessions and
+_messages aliases) go through the storage methods and keep its indexes current; the storage
+itself packs records with put().
+"""
+import sys
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Generic, Iterator, Optional, Tuple, Type, TypeVar
+
+from .session_index import _naive_utc
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_intern = sys.intern
+
+
+def to_epoch_us(value: datetime) -> int:
+    return (_naive_utc(value) - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _build(model: Any, **fields: Any) -> Any:
+    # Values were validated when the model was saved; skip validating them again
+    construct = getattr(model, "model_construct", None) or model.construct
+    return construct(**fields)
+
+
+def _optional_us(value: Optional[datetime]) -> Optional[int]:
+    return to_epoch_us(value) if value is not None else None
+
+
+def _optional_datetime(value: Optional[int]) -> Optional[datetime]:
+    return from_epoch_us(value) if value is not None else None
+
+
+class UserRecord:
+    __slots__ = ("id", "email", "name", "created_at")
+
+    def __init__(self, user):
+        self.id = _intern(user.id)
+        self.email = user.email
+        self.name = user.name
+        self.created_at = to_epoch_us(user.created_at)
+
+    def to_model(self):
+        from src.leet_apps.api.users import User
+        return _build(User, id=self.id, email=self.email, name=self.name, created_at=from_epoch_us(self.created_at))
+
+
+class SessionRecord:
+    __slots__ = ("id", "user_id", "prompt", "status", "created_at", "topic", "tags", "updated_at")
+
+    def __init__(self, session):
+        self.id = _intern(session.id)
+        self.user_id = _intern(session.user_id)
+        self.prompt = session.prompt
+        self.status = _intern(session.status)
+        self.created_at = to_epoch_us(session.created_at)
+        self.topic = session.topic
+        self.tags: Tuple[str, ...] = tuple(_intern(t) for t in session.tags or ())
+        self.updated_at = _optional_us(session.updated_at)
+
+    def to_model(self):
+        from src.leet_apps.api.sessions import ResearchSession
+        return _build(
+            ResearchSession,
+            id=self.id,
+            user_id=self.user_id,
+            prompt=self.prompt,
+            status=self.status,
+            created_at=from_epoch_us(self.created_at),
+            topic=self.topic,
+            tags=list(self.tags),
+            updated_at=_optional_datetime(self.updated_at),
+        )
+
+
+class MessageRecord:
+    __slots__ = ("id", "session_id", "role", "content", "created_at")
+
+    def __init__(self, message):
+        self.id = message.id
+        self.session_id = _intern(message.session_id)
+        self.role = _intern(message.role)
+        self.content = message.content
+        self.created_at = to_epoch_us(message.created_at)
+
+    def key(self) -> Tuple[int, str]:
+        return (self.created_at, self.id)
+
+    def to_model(self):
+        from src.leet_apps.api.messages import Message
+        return _build(
+            Message, id=self.id, session_id=self.session_id, role=self.role, content=self.content, created_at=from_epoch_us(self.created_at)
+        )
+
+
+R = TypeVar("R", UserRecord, SessionRecord, MessageRecord)
+
+
+class RecordTable(MutableMapping, Generic[R]):
+    """id -> model mapping backed by compact records (see the module docstring)."""
+
+    def __init__(
+        self,
+        record_type: Type[R],
+        save: Optional[Callable[[Any], None]] = None,
+        delete: Optional[Callable[[str], Any]] = None,
+    ):
+        self.record_type = record_type
+        self.records: Dict[str, R] = {}
+        # With a save hook, item writes go through it (deletes through delete, or are refused)
+        self.save = save
+        self.delete = delete
+
+    def __getitem__(self, key: str) -> Any:
+        return self.records[key].to_model()
+
+    def put(self, key: str, model: Any) -> None:
+        self.records[key] = self.record_type(model)
+
+    def __setitem__(self, key: str, model: Any) -> None:
+        if self.save is None:
+            self.put(key, model)
+            return
+        if key != model.id:
+            raise KeyError(f"key {key!r} does not match the record id {model.id!r}")
+        self.save(model)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self.records:
+            raise KeyError(key)
+        if self.delete is not None:
+            self.delete(key)
+        elif self.save is not None:
+            raise TypeError(f"{self.record_type.__name__} entries cannot be deleted through this mapping")
+        else:
+            del self.records[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        record = self.records.get(key)
+        return record.to_model() if record is not None else default
+
+    def clear(self) -> None:
+        if self.save is None:
+            self.records.clear()
+        else:
+            for key in list(self.records):
+                del self[key]
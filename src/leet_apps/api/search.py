@@ -1,21 +1,58 @@
-from datetime import datetime, timedelta
-from typing import List, Dict
-from fastapi import APIRouter, HTTPException, Query, Request
+import asyncio
+from datetime import datetime
+from typing import List, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
-router = APIRouter(prefix="/api/search")
-
-# Simple in-memory cache for fetched sources keyed by query.
-# Each cache entry stores the results and an expires_at timestamp.
-_cache: Dict[str, Dict] = {}
+from . import metrics
+from .cache import TTLCache
+from .providers import MockProvider, ProvidersUnavailable, SearchProvider, SourceCallback, gather_sources
+from .ratelimit import TokenBucketLimiter, client_ip, rate_limit
 
-# Simple in-memory rate limiter per client IP. Stores list of request timestamps.
-_rate_limits: Dict[str, List[float]] = {}
+router = APIRouter(prefix="/api/search")
 
 # Configuration
 CACHE_TTL_SECONDS = 600  # 10 minutes
-RATE_LIMIT_MAX = 10  # max requests
-RATE_LIMIT_WINDOW_SECONDS = 60  # per 60s window
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 32 * 1024 * 1024  # approximate
+CACHE_SWEEP_INTERVAL_SECONDS = 60
+NEGATIVE_CACHE_TTL_SECONDS = 15  # how long a failed fetch is remembered
+
+# Bounded LRU cache for fetched sources keyed by normalized query (see normalize_query).
+# Entries are {"results": [...]} or, for negative caching, {"error": exc}.
+_cache = TTLCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    sweep_interval=CACHE_SWEEP_INTERVAL_SECONDS,
+)
+
+
+# Sweep expired entries in the background while the app runs, not only on cache writes
+async def _start_cache_sweeper() -> None:
+    _cache.start_sweeper()
+
+
+router.add_event_handler("startup", _start_cache_sweeper)
+router.add_event_handler("shutdown", _cache.stop_sweeper)
+
+# In-flight fetches keyed by normalized query, so concurrent misses share one upstream call.
+_inflight: Dict[str, "asyncio.Task"] = {}
+
+# Request-level counters on top of the cache's hits/misses/evictions: coalesced (joined an
+# in-flight fetch), negative_hits (served a cached error) and errors (fetches that failed).
+_stats: Dict[str, int] = {"coalesced": 0, "negative_hits": 0, "errors": 0}
+
+RATE_LIMIT_MAX = 10  # max requests (burst)
+RATE_LIMIT_WINDOW_SECONDS = 60  # refilled evenly over a 60s window
+
+# Per-client-IP token bucket for the search endpoint
+_rate_limiter = TokenBucketLimiter("search", rate=RATE_LIMIT_MAX / RATE_LIMIT_WINDOW_SECONDS, burst=RATE_LIMIT_MAX)
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: case-folded with runs of whitespace collapsed."""
+    return " ".join(query.split()).casefold()
 
 
 class Source(BaseModel):
@@ -26,66 +63,141 @@ class Source(BaseModel):
     confidence: float
 
 
-@router.get("/", response_model=List[Source])
-async def search(request: Request, query: str = Query(..., min_length=1)):
+# Providers queried in parallel for every uncached search; list order is result priority.
+# Mock results - deterministic based on query so tests can rely on them. In production these
+# would call search engines / page fetchers. Swap them with set_providers (e.g. FakeProvider).
+_providers: List[SearchProvider] = [
+    MockProvider(
+        "web",
+        title="Overview of {q}",
+        url="https://example.com/{slug}",
+        snippet="This is a short snippet summarizing {q}.",
+        confidence=0.9,
+    ),
+    MockProvider(
+        "news",
+        title="Recent news about {q}",
+        url="https://news.example.com/{slug}",
+        snippet="Latest news and analysis on {q}.",
+        confidence=0.75,
+    ),
+]
+
+
+def set_providers(providers: List[SearchProvider]) -> List[SearchProvider]:
+    """Replace the provider list (tests, benchmarks). Returns the previous list."""
+    global _providers
+    previous, _providers = _providers, list(providers)
+    return previous
+
+
+async def _fetch_uncached(q: str, on_source: Optional[SourceCallback] = None) -> List[dict]:
+    """Produce sources for a query without consulting the cache, fanning out to all providers."""
+    return await gather_sources(q, _providers, on_source=on_source)
+
+
+async def _fetch_and_cache(key: str, q: str, on_source: Optional[SourceCallback] = None) -> List[dict]:
+    try:
+        with metrics.span("search.providers"):
+            results = await _fetch_uncached(q, on_source=on_source)
+    except Exception as e:
+        # Negative cache: repeat callers get the same error without hitting the upstream again
+        _stats["errors"] += 1
+        _cache.set(key, {"error": e}, ttl=NEGATIVE_CACHE_TTL_SECONDS)
+        raise
+    _cache.set(key, {"results": results})
+    return results
+
+
+def _forget_inflight(key: str, task: "asyncio.Task") -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Mark the outcome as retrieved even if every waiter went away before it finished
+    if not task.cancelled():
+        task.exception()
+
+
+async def fetch_sources(query: str, on_source: Optional[SourceCallback] = None) -> List[dict]:
+    """
+    Return sources for a query, using the cache and coalescing concurrent misses.
+
+    Queries are keyed by normalize_query, so differences in case or spacing share an entry.
+    Concurrent callers for the same key share a single in-flight fetch (single-flight):
+    the first caller starts it, later callers await the same task and receive the same
+    results or the same error. Failures are cached for NEGATIVE_CACHE_TTL_SECONDS.
+
+    on_source is called for each source as it arrives, but only by the caller that actually
+    starts the fetch; cache hits and coalesced callers just get the final list.
+    """
+    q = query.strip()
+    key = normalize_query(q)
+    entry = _cache.get(key)
+    if entry is not None:
+        if "error" in entry:
+            _stats["negative_hits"] += 1
+            raise entry["error"]
+        return entry["results"]
+
+    task = _inflight.get(key)
+    if task is not None:
+        _stats["coalesced"] += 1
+    else:
+        task = asyncio.ensure_future(_fetch_and_cache(key, q, on_source=on_source))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _forget_inflight(key, t))
+    # shield: a caller that disconnects must not cancel the fetch other callers are waiting on
+    return await asyncio.shield(task)
+
+
+@router.get("/", response_model=List[Source], dependencies=[Depends(rate_limit(_rate_limiter, key=client_ip))])
+async def search(query: str = Query(..., min_length=1)):
     """
     Mock web search endpoint that returns a list of sources for a given query.
     - Uses an in-memory cache with TTL to avoid repeated work for the same query.
+    - Coalesces concurrent requests for the same uncached query into one fetch.
     - Enforces a basic per-client rate limit to prevent abuse in the demo.
-    - In production this would call a search engine, fetch pages, parse and summarize them.
     """
     q = query.strip()
     if not q:
         raise HTTPException(status_code=400, detail="query parameter is required")
-
-    # Determine client id for rate limiting
-    client = getattr(request, "client", None)
-    client_ip = getattr(client, "host", None) or "testclient"
-
-    # Rate limiting: keep timestamps and enforce sliding window
-    now_ts = datetime.utcnow().timestamp()
-    timestamps = _rate_limits.setdefault(client_ip, [])
-    # Prune old timestamps
-    window_start = now_ts - RATE_LIMIT_WINDOW_SECONDS
-    timestamps = [t for t in timestamps if t >= window_start]
-    if len(timestamps) >= RATE_LIMIT_MAX:
-        raise HTTPException(status_code=429, detail="rate limit exceeded")
-    timestamps.append(now_ts)
-    _rate_limits[client_ip] = timestamps
-
-    # Return cached result if available and not expired
-    entry = _cache.get(q)
-    if entry and entry.get("expires_at") > datetime.utcnow():
-        return entry["results"]
-
-    now = datetime.utcnow()
-    # Mock results - deterministic based on query so tests can rely on them
-    results = [
-        {
-            "title": f"Overview of {q}",
-            "url": f"https://example.com/{q.replace(' ', '-')}",
-            "snippet": f"This is a short snippet summarizing {q}.",
-            "fetched_at": now,
-            "confidence": 0.9,
-        },
-        {
-            "title": f"Recent news about {q}",
-            "url": f"https://news.example.com/{q.replace(' ', '-')}",
-            "snippet": f"Latest news and analysis on {q}.",
-            "fetched_at": now,
-            "confidence": 0.75,
-        },
-    ]
-
-    _cache[q] = {"results": results, "expires_at": now + timedelta(seconds=CACHE_TTL_SECONDS)}
-    return results
+    try:
+        with metrics.span("search"):
+            return await fetch_sources(q)
+    except ProvidersUnavailable:
+        raise HTTPException(status_code=503, detail="search providers unavailable")
 
 
 @router.post("/cache/clear")
 async def clear_cache(query: str | None = None):
     """Utility endpoint (demo/testing) to clear the cache for a specific query or all cache."""
     if query:
-        _cache.pop(query, None)
+        _cache.pop(normalize_query(query), None)
     else:
         _cache.clear()
     return {"status": "ok"}
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Cache statistics: hits, misses, evictions, expirations, size, plus single-flight counters."""
+    _cache.sweep()
+    return {**_cache.stats(), **_stats, "inflight": len(_inflight)}
+
+
+@metrics.register_collector
+def _collect_metrics():
+    return metrics.cache_families("search", _cache.stats()) + [
+        ("leet_search_coalesced_total", "counter", "Searches that joined an in-flight fetch.", [({}, _stats["coalesced"])]),
+        ("leet_search_negative_hits_total", "counter", "Searches answered with a cached failure.", [({}, _stats["negative_hits"])]),
+        ("leet_search_errors_total", "counter", "Provider fetches that failed.", [({}, _stats["errors"])]),
+        ("leet_search_inflight", "gauge", "Provider fetches in progress.", [({}, len(_inflight))]),
+    ]
+
+
+@router.get("/providers")
+async def provider_stats():
+    """Per-provider configuration and call counters (calls, results, errors, timeouts)."""
+    return [
+        {"name": p.name, "timeout": p.timeout, "concurrency": p.concurrency, **p.stats}
+        for p in _providers
+    ]
@@ -0,0 +1,171 @@
+"""
+Secondary indexes over research sessions.
+
+The session store is a plain dict keyed by id, which is fine for point lookups but forces
+history queries (user, date range, tags) to scan every session in the system. SessionIndex
+keeps three views that are updated on every write:
+
+- a list of (created_at, id) keys sorted by creation time
+- the same sorted keys partitioned per user_id
+- an inverted index from lower-cased tag to the set of session ids carrying it
+
+so a filtered query only touches the sessions that can actually match.
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+SortKey = Tuple[datetime, str]
+
+# Upper bound for the id component of a sort key, used to make end_date inclusive.
+_MAX_ID = "\U0010ffff"
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Sessions store naive UTC datetimes; normalize aware query bounds so they compare."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Lower-case, strip and de-duplicate tags while keeping their first-seen order."""
+    seen: Dict[str, None] = {}
+    for t in tags or []:
+        t = (t or "").strip().lower()
+        if t:
+            seen.setdefault(t, None)
+    return tuple(seen)
+
+
+class _Entry:
+    __slots__ = ("key", "user_id", "tags")
+
+    def __init__(self, key: SortKey, user_id: str, tags: Tuple[str, ...]):
+        self.key = key
+        self.user_id = user_id
+        self.tags = tags
+
+
+class SessionIndex:
+    def __init__(self):
+        self._ordered: List[SortKey] = []
+        self._by_user: Dict[str, List[SortKey]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._entries: Dict[str, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def add(self, session) -> None:
+        """Index a session, replacing any previous entry for the same id."""
+        if session.id in self._entries:
+            self.remove(session.id)
+        key = (session.created_at, session.id)
+        entry = _Entry(key, session.user_id, normalize_tags(session.tags))
+        insort(self._ordered, key)
+        insort(self._by_user.setdefault(entry.user_id, []), key)
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(session.id)
+        self._entries[session.id] = entry
+
+    def remove(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        _remove_key(self._ordered, entry.key)
+        user_keys = self._by_user.get(entry.user_id)
+        if user_keys is not None:
+            _remove_key(user_keys, entry.key)
+            if not user_keys:
+                del self._by_user[entry.user_id]
+        for tag in entry.tags:
+            ids = self._by_tag.get(tag)
+            if ids is not None:
+                ids.discard(session_id)
+                if not ids:
+                    del self._by_tag[tag]
+
+    def clear(self) -> None:
+        self._ordered.clear()
+        self._by_user.clear()
+        self._by_tag.clear()
+        self._entries.clear()
+
+    def query(
+        self,
+        user_id: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> List[str]:
+        """
+        Return ids of sessions matching every given filter, ordered by created_at ascending.
+        Tags are matched case-insensitively and a session must carry ALL requested tags.
+        """
+        return [k[1] for k in self.iter_keys(user_id=user_id, start_date=start_date, end_date=end_date, tags=tags)]
+
+    def iter_keys(
+        self,
+        user_id: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        tags: Optional[Iterable[str]] = None,
+        after: Optional[SortKey] = None,
+    ) -> Iterator[SortKey]:
+        """
+        Lazily yield (created_at, id) keys of matching sessions in ascending order, starting
+        strictly after the given key. Callers that stop early (pagination) pay only for what
+        they consume on the date/user path.
+        """
+        start = _naive_utc(start_date) if start_date else None
+        end = _naive_utc(end_date) if end_date else None
+        requested = normalize_tags(tags)
+
+        if requested:
+            keys = []
+            for session_id in self._tag_candidates(requested):
+                entry = self._entries[session_id]
+                if user_id and entry.user_id != user_id:
+                    continue
+                if start and entry.key[0] < start:
+                    continue
+                if end and entry.key[0] > end:
+                    continue
+                if after and entry.key <= after:
+                    continue
+                keys.append(entry.key)
+            keys.sort()
+            return iter(keys)
+
+        ordered = self._by_user.get(user_id, []) if user_id else self._ordered
+        lo = bisect_left(ordered, (start, "")) if start else 0
+        if after:
+            lo = max(lo, bisect_right(ordered, after))
+        hi = bisect_right(ordered, (end, _MAX_ID)) if end else len(ordered)
+        return (ordered[i] for i in range(lo, hi))
+
+    def _tag_candidates(self, tags: Tuple[str, ...]) -> Set[str]:
+        postings = []
+        for tag in tags:
+            ids = self._by_tag.get(tag)
+            if not ids:
+                return set()
+            postings.append(ids)
+        # Intersect starting from the rarest tag so the work is bounded by the smallest posting list
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+
+def _remove_key(keys: List[SortKey], key: SortKey) -> None:
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
@@ -1,15 +1,35 @@
 import uuid
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, HTTPException, Body, Query
+from typing import Optional, List, Dict, Any, Union
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
+from . import events as events_module
+from . import export as export_module
+from . import fastjson
+from . import http_cache
+from . import jobs as jobs_module
+from . import metrics
+from . import raster
+from . import similar_queries
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, take_page
+from .ratelimit import client_ip, rate_limit, research_limiter
+from .source_store import source_id
+from .storage import get_storage, memory_storage
+
 router = APIRouter(prefix="/api/sessions")
+# Stop the PNG worker processes with the app
+router.add_event_handler("shutdown", raster.shutdown)
+
+# In-memory stores for demo purposes; these are the in-memory backend's dicts (see storage.py).
+# Set LEET_STORAGE_BACKEND=sqlite to persist and share state across worker processes.
+_sessions = memory_storage().sessions
+_sources = memory_storage().sources  # SourceStore: session -> references to shared source records
+_infographics: Dict[str, dict] = memory_storage().session_infographics
 
-# In-memory store for demo purposes. In production this would be a DB.
-_sessions = {}
-_sources: Dict[str, List[dict]] = {}
-_infographics: Dict[str, dict] = {}
+_research_in_progress = metrics.gauge("leet_research_runs_in_progress", "Research pipelines currently executing.")
 
 class ResearchSessionCreate(BaseModel):
     user_id: str
@@ -18,9 +38,9 @@ class ResearchSessionCreate(BaseModel):
     tags: Optional[List[str]] = Field(default_factory=list)
 
 class ResearchSessionUpdate(BaseModel):
-    status: Optional[str]
-    topic: Optional[str]
-    tags: Optional[List[str]]
+    status: Optional[str] = None
+    topic: Optional[str] = None
+    tags: Optional[List[str]] = None
 
 class ResearchSession(BaseModel):
     id: str
@@ -30,6 +50,11 @@ class ResearchSession(BaseModel):
     created_at: datetime
     topic: Optional[str] = None
     tags: List[str] = Field(default_factory=list)
+    updated_at: Optional[datetime] = None
+
+class SessionPage(BaseModel):
+    items: List[ResearchSession]
+    next_cursor: Optional[str] = None
 
 class Source(BaseModel):
     title: str
@@ -39,6 +64,36 @@ class Source(BaseModel):
     confidence: float
 
 
+def save_session(session: ResearchSession) -> ResearchSession:
+    """Store a session (and refresh its index entries). All session writes go through here."""
+    session.updated_at = datetime.utcnow()
+    get_storage().save_session(session)
+    return session
+
+
+def _get_session_or_404(session_id: str) -> ResearchSession:
+    session = get_storage().get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+def _require_completed(session: ResearchSession) -> None:
+    """Follow-ups build on a finished run and must not overlap with another pipeline."""
+    if session.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Session is {session.status}; follow-ups need a completed session")
+
+
+def _set_status(session_id: str, status: str) -> ResearchSession:
+    """
+    Change only the stored session's status. Pipelines hold their copy of the session across
+    awaits, and the session may be edited (PUT) meanwhile; saving that copy would undo it.
+    """
+    session = _get_session_or_404(session_id)
+    session.status = status
+    return save_session(session)
+
+
 @router.post("/", response_model=ResearchSession)
 async def create_session(payload: ResearchSessionCreate = Body(...)):
     session_id = str(uuid.uuid4())
@@ -52,79 +107,149 @@ async def create_session(payload: ResearchSessionCreate = Body(...)):
         topic=payload.topic,
         tags=payload.tags or [],
     )
-    _sessions[session_id] = session
-    return session
+    return save_session(session)
+
+
+@router.get("/export")
+async def export_user_sessions(
+    user_id: str = Query(..., description="Export every session of this user"),
+    format: str = Query("ndjson", regex="^(ndjson|json-stream)$"),
+):
+    """
+    Bulk history backup: every session of a user with its messages, sources and infographic,
+    oldest first. Streamed one session at a time, so no more than a page of records is held
+    in memory. ndjson emits one typed record per line; json-stream emits
+    {"user_id": ..., "sessions": [<session export>, ...]}.
+    """
+    chunks = export_module.export_user(get_storage(), user_id, format)
+    return StreamingResponse(metrics.timed_iter(f"export.user.{format}", chunks), media_type=export_module.MEDIA_TYPES[format])
+
+
+class SessionSearchHit(BaseModel):
+    session: ResearchSession
+    score: float
+
+
+@router.get("/search", response_model=List[SessionSearchHit])
+async def search_sessions(
+    q: str = Query(..., min_length=1, description="Words to look for"),
+    user_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Full-text search across session prompts, topics and tags, source titles and snippets, and
+    message content, ranked by BM25 (best first). Sessions matching any word are returned;
+    prompt matches weigh more than source matches, which weigh more than message matches.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q parameter is required")
+    hits = get_storage().search_sessions(q, user_id=user_id, limit=limit)
+    return [SessionSearchHit(session=session, score=round(score, 6)) for session, score in hits]
 
 
 @router.get("/{session_id}", response_model=ResearchSession)
 async def get_session(session_id: str):
-    session = _sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    return session
+    session = _get_session_or_404(session_id)
+    return fastjson.RawJSONResponse(fastjson.fragment(fastjson.session_key(session), session))
 
 
-@router.get("/", response_model=List[ResearchSession])
+@router.get("/", response_model=Union[SessionPage, List[ResearchSession]])
 async def list_sessions(
     user_id: Optional[str] = None,
     topic: Optional[str] = None,
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     tags: Optional[str] = Query(None, description="Comma-separated list of tags to filter by"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables paginated response"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
 ):
     """
-    List sessions with optional filters:
+    List sessions ordered by created_at with optional filters:
     - user_id: exact match
     - topic: substring (case-insensitive) match
     - start_date / end_date: ISO-8601 datetimes to filter created_at
     - tags: comma-separated list; returns sessions that include ALL provided tags
+
+    When limit or cursor is given the response is a page: {"items": [...], "next_cursor": "..."}.
+    Pass next_cursor back as cursor to fetch the following page; it is null on the last page.
+    Without either parameter the full list is returned as before.
     """
-    sessions = list(_sessions.values())
-    if user_id:
-        sessions = [s for s in sessions if s.user_id == user_id]
-    if topic:
-        q = topic.lower()
-        sessions = [s for s in sessions if s.topic and q in s.topic.lower()]
-    if start_date:
-        sessions = [s for s in sessions if s.created_at >= start_date]
-    if end_date:
-        sessions = [s for s in sessions if s.created_at <= end_date]
-    if tags:
-        requested = [t.strip().lower() for t in tags.split(",") if t.strip()]
-        if requested:
-            def has_all(s):
-                s_tags = [t.lower() for t in (s.tags or [])]
-                return all(r in s_tags for r in requested)
-            sessions = [s for s in sessions if has_all(s)]
-    return sessions
+    after = decode_cursor(cursor) if cursor else None
+    filters = dict(
+        user_id=user_id,
+        topic=topic,
+        start_date=start_date,
+        end_date=end_date,
+        tags=tags.split(",") if tags else None,
+    )
+    if limit is None and cursor is None:
+        return fastjson.RawJSONResponse(fastjson.sessions_array(get_storage().query_sessions(**filters)))
+    limit = limit or DEFAULT_PAGE_SIZE
+    sessions = get_storage().query_sessions(after=after, limit=limit + 1, **filters)
+    items, next_cursor = take_page(sessions, limit, key=lambda s: (s.created_at, s.id))
+    return fastjson.RawJSONResponse(fastjson.page(fastjson.sessions_array(items), next_cursor))
 
 
 @router.put("/{session_id}", response_model=ResearchSession)
 async def update_session(session_id: str, payload: ResearchSessionUpdate = Body(...)):
-    session = _sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    session = _get_session_or_404(session_id)
     if payload.status:
         session.status = payload.status
     if payload.topic is not None:
         session.topic = payload.topic
     if payload.tags is not None:
         session.tags = payload.tags
-    _sessions[session_id] = session
-    return session
+    return save_session(session)
 
 
-@router.post("/{session_id}/run")
-async def run_research_session(session_id: str):
+async def execute_research_session(session_id: str, follow_up: Optional[str] = None) -> Dict[str, Any]:
     """
     Run a mock research pipeline for the session:
-    - Fetch sources using the mock search endpoint implementation
+    - Fetch sources using the mock search endpoint implementation, or reuse those of a
+      recent run of a near-identical prompt (see similar_queries)
     - Save sources associated with the session
     - Create a placeholder infographic entry
+
+    With follow_up (a follow-up prompt on a researched session) the incremental pipeline
+    runs instead, see _run_follow_up. Follow-ups need a completed session (409 otherwise).
+
+    The session status moves to "running" while the pipeline runs, then to "completed", or
+    to "failed" if any step raises (the error is re-raised to the caller; 503 when no search
+    provider answers). A failed follow-up leaves the session's results untouched, so it goes
+    back to "completed" and publishes followup.failed rather than session.failed.
     """
-    session = _sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    session = _get_session_or_404(session_id)
+    if follow_up is not None:
+        _require_completed(session)
+    session.status = "running"
+    save_session(session)
+    events_module.publish(session_id, "session.running", {"session_id": session_id})
+    try:
+        with _research_in_progress.track():
+            if follow_up is not None:
+                with metrics.span("research.follow_up"):
+                    return await _run_follow_up(session, follow_up)
+            with metrics.span("research"):
+                return await _run_pipeline(session)
+    except BaseException as e:
+        _set_status(session_id, "failed" if follow_up is None else "completed")
+        events_module.publish(
+            session_id,
+            "session.failed" if follow_up is None else "followup.failed",
+            {"session_id": session_id, "error": getattr(e, "detail", None) or str(e)},
+        )
+        raise
+
+
+async def _fetch_sources(search_module, query: str, on_source) -> List[dict]:
+    try:
+        return await search_module.fetch_sources(query, on_source=on_source)
+    except search_module.ProvidersUnavailable:
+        raise HTTPException(status_code=503, detail="search providers unavailable")
+
+
+async def _run_pipeline(session: ResearchSession) -> Dict[str, Any]:
+    session_id = session.id
 
     # Use the mock search implementation in src.leet_apps.api.search
     try:
@@ -132,20 +257,44 @@ async def run_research_session(session_id: str):
     except Exception:
         raise HTTPException(status_code=500, detail="Search module unavailable")
 
-    # Call the search function with the session prompt
-    results = await search_module.search(query=session.prompt)
-
-    # Store sources for the session
-    _sources[session_id] = [dict(r) for r in results]
+    # Fetch sources for the session prompt (cached and coalesced with concurrent runs)
+    events_module.publish(session_id, "search.started", {"query": session.prompt})
+    streamed = set()
+
+    def on_source(source: dict) -> None:
+        # Providers answer independently; emit each source the moment it arrives
+        streamed.add(source.get("url"))
+        events_module.publish(session_id, "source", {"source": source})
+
+    # A recent run of a near-identical prompt already fetched what we need
+    reused_from = None
+    results: List[dict] = []
+    similar = similar_queries.lookup(session.prompt)
+    if similar and similar[0] != session_id:
+        results = get_storage().get_sources(similar[0])
+        if results:
+            reused_from = {"session_id": similar[0], "similarity": round(similar[1], 3)}
+            events_module.publish(session_id, "search.reused", reused_from)
+        else:
+            similar_queries.discard(similar[0])
+    if reused_from is None:
+        with metrics.span("research.search"):
+            results = await _fetch_sources(search_module, session.prompt, on_source)
+
+    sources = [dict(r) for r in results]
+    for source in sources:
+        # Cache hits and coalesced fetches deliver everything at once
+        if source.get("url") not in streamed:
+            events_module.publish(session_id, "source", {"source": source})
+    events_module.publish(session_id, "search.completed", {"count": len(sources)})
 
     # Create a placeholder infographic record. Prefer using the infographics module if available.
     infographic = None
     try:
         from src.leet_apps.api import infographics as inf_module
-        meta = await inf_module.create_from_prompt(session_id=session_id, prompt=session.prompt)
+        with metrics.span("research.infographic"):
+            meta = await inf_module.create_from_prompt(session_id=session_id, prompt=session.prompt, sources=sources)
         infographic = meta
-        # store by session id for backward compatibility
-        _infographics[session_id] = meta
     except Exception:
         # Fallback to the old placeholder if infographics module unavailable
         infographic = {
@@ -155,95 +304,263 @@ async def run_research_session(session_id: str):
             "layout_meta": {"template": "basic_v1"},
             "created_at": datetime.utcnow(),
         }
-        _infographics[session_id] = infographic
+    events_module.publish(session_id, "infographic.rendered", {"infographic": infographic})
+
+    # Store sources, the infographic (by session id for backward compatibility) and the
+    # completed status together so the backend can write them in one transaction.
+    storage = get_storage()
+    with metrics.span("research.store"), storage.batch():
+        storage.set_sources(session_id, sources)
+        storage.set_session_infographic(session_id, infographic)
+        session = _set_status(session_id, "completed")
+    events_module.publish(session_id, "session.completed", {"session": session})
+    if reused_from is None and sources:
+        # Only fetched sources are offered for reuse, so reuse never chains across prompts
+        similar_queries.add(session.prompt, session_id)
+
+    return {"session": session, "sources": sources, "infographic": infographic, "reused_sources_from": reused_from}
 
-    # Update session status
-    session.status = "completed"
-    _sessions[session_id] = session
 
-    return {"session": session, "sources": _sources[session_id], "infographic": infographic}
+def _source_key(source: dict) -> Optional[str]:
+    url = source.get("url")
+    return source_id(url) if url else None
+
+
+async def _run_follow_up(session: ResearchSession, prompt: str) -> Dict[str, Any]:
+    """
+    Incremental research for a follow-up prompt on a researched session. Only the follow-up
+    is searched (in the context of the session prompt; the search cache still applies), the
+    results are diffed against the session's sources by canonical URL and only new ones are
+    appended; sources already in the session are kept as they are. The infographic is
+    refreshed only when what it draws changed (infographics.refresh_for_session). The
+    result carries the new sources and whether the infographic was re-rendered.
+    """
+    session_id = session.id
+    from src.leet_apps.api import search as search_module
+
+    storage = get_storage()
+    existing = storage.get_sources(session_id)
+    known = storage.get_source_ids(session_id)
+    query = f"{session.prompt} {prompt}"
+    events_module.publish(session_id, "search.started", {"query": query, "follow_up": True})
+    streamed = set()
+
+    def on_source(source: dict) -> None:
+        key = _source_key(source)
+        if key not in known and key not in streamed:
+            streamed.add(key)
+            events_module.publish(session_id, "source", {"source": source})
+
+    with metrics.span("research.search"):
+        results = await _fetch_sources(search_module, query, on_source)
+
+    added = []
+    for result in results:
+        key = _source_key(result)
+        if key is None or key not in known:
+            known.add(key)
+            added.append(dict(result))
+            if key not in streamed:
+                events_module.publish(session_id, "source", {"source": result})
+    events_module.publish(session_id, "search.completed", {"count": len(added), "follow_up": True})
+    sources = existing + added
+
+    current = storage.get_session_infographic(session_id)
+    infographic, rerendered = current, False
+    if added:
+        from src.leet_apps.api import infographics as inf_module
+        with metrics.span("research.infographic"):
+            infographic, rerendered = await inf_module.refresh_for_session(session_id, session.prompt, sources, current)
+        if rerendered:
+            events_module.publish(session_id, "infographic.rendered", {"infographic": infographic})
+
+    with metrics.span("research.store"), storage.batch():
+        if added:
+            storage.set_sources(session_id, sources)
+            storage.set_session_infographic(session_id, infographic)
+        session = _set_status(session_id, "completed")
+    events_module.publish(session_id, "session.completed", {"session": session})
+
+    return {
+        "session": session,
+        "sources": sources,
+        "new_sources": added,
+        "infographic": infographic,
+        "infographic_rerendered": rerendered,
+    }
+
+
+@router.post("/{session_id}/run", dependencies=[Depends(rate_limit(research_limiter, key=client_ip))])
+async def run_research_session(session_id: str, background: Optional[bool] = None):
+    """
+    Run the research pipeline for the session.
+
+    By default the pipeline runs inside the request and the response carries the session,
+    sources and infographic. With background=true (or LEET_RESEARCH_BACKGROUND=1 when the
+    parameter is omitted) the run is queued on the job worker pool and the endpoint answers
+    202 immediately with {"job": ..., "session": ...}; poll GET /api/jobs/{job_id} or the
+    session, whose status moves pending -> running -> completed/failed.
+    """
+    if background is None:
+        background = jobs_module.run_in_background_default()
+    if not background:
+        return await execute_research_session(session_id)
+
+    session = _get_session_or_404(session_id)
+    # Queue first: a full queue (503) must leave the session as it was. The job cannot start
+    # before this handler yields, so the pending status is saved before the run reads it.
+    job = jobs_module.submit("research", lambda: execute_research_session(session_id), session_id=session_id)
+    session.status = "pending"
+    save_session(session)
+    events_module.publish(session_id, "session.queued", {"session_id": session_id, "job_id": job.id})
+    return JSONResponse(status_code=202, content=jsonable_encoder({"job": job, "session": session}))
 
 
 @router.get("/{session_id}/sources", response_model=List[Source])
 async def list_sources_for_session(session_id: str):
-    session = _sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    return _sources.get(session_id, [])
+    session = _get_session_or_404(session_id)
+    return fastjson.RawJSONResponse(fastjson.sources_array(session, lambda: get_storage().get_sources(session_id)))
 
 
 @router.get("/{session_id}/infographic")
 async def get_infographic_for_session(session_id: str):
-    session = _sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    infographic = _infographics.get(session_id)
+    _get_session_or_404(session_id)
+    infographic = get_storage().get_session_infographic(session_id)
     if not infographic:
         raise HTTPException(status_code=404, detail="Infographic not found")
     return infographic
 
 
+def _export_last_modified(session: ResearchSession, messages: List[Any], infographic: Optional[dict]) -> datetime:
+    """Latest change to anything in the export (sources only change together with the session)."""
+    candidates = [session.updated_at or session.created_at]
+    if messages:
+        candidates.append(messages[-1].created_at)
+    if infographic and isinstance(infographic.get("created_at"), datetime):
+        candidates.append(infographic["created_at"])
+    return max(candidates)
+
+
 @router.get("/{session_id}/export")
-async def export_session(session_id: str):
+async def export_session(
+    session_id: str,
+    format: str = Query("json", regex="^(json|json-stream|ndjson)$"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+):
     """
     Export the full session data as JSON, including session record, messages, sources and infographic metadata.
+    Carries Last-Modified and a weak ETag; conditional requests get a 304 before anything is serialized.
+
+    format=json-stream sends the same document and format=ndjson one record per line, both
+    serialized incrementally as they are read (no validators; see export.py).
     """
-    session = _sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    session = _get_session_or_404(session_id)
+    if format != "json":
+        chunks = export_module.export_session(get_storage(), session, format)
+        return StreamingResponse(metrics.timed_iter(f"export.{format}", chunks), media_type=export_module.MEDIA_TYPES[format])
 
     # Gather messages from messages module if available
     messages = []
     try:
         from src.leet_apps.api import messages as messages_module
-        msgs = [m for m in messages_module._messages.values() if m.session_id == session_id]
-        # sort by created_at
-        msgs.sort(key=lambda m: m.created_at)
-        messages = [m.dict() for m in msgs]
+        messages = messages_module.messages_for_session(session_id)
     except Exception:
         messages = []
 
-    sources = _sources.get(session_id, [])
-    infographic = _infographics.get(session_id)
+    sources = get_storage().get_sources(session_id)
+    infographic = get_storage().get_session_infographic(session_id)
+
+    last_modified = _export_last_modified(session, messages, infographic)
+    version = f"{session_id}-{last_modified.timestamp():.6f}-{len(messages)}-{len(sources)}-{(infographic or {}).get('id', '')}"
+    headers = http_cache.validators(http_cache.weak_etag(version), http_cache.REVALIDATE, last_modified)
+    cached = http_cache.not_modified(headers, if_none_match, if_modified_since)
+    if cached:
+        return cached
+
+    with metrics.span("export.json"):
+        body = (
+            b'{"session":' + fastjson.fragment(fastjson.session_key(session), session)
+            + b',"messages":' + fastjson.messages_array(messages)
+            + b',"sources":' + fastjson.dumps(sources)
+            + b',"infographic":' + fastjson.dumps(infographic) + b"}"
+        )
+    return fastjson.RawJSONResponse(body, headers=headers)
+
 
-    return {
-        "session": session.dict() if hasattr(session, "dict") else session,
-        "messages": messages,
-        "sources": sources,
-        "infographic": infographic,
-    }
+import hashlib
 
+PLACEHOLDER_SVG = (
+    "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+    "<svg xmlns=\"http://www.w3.org/2000/svg\" width=\"400\" height=\"200\">"
+    "<rect width=\"100%\" height=\"100%\" fill=\"#ffffff\"/>"
+    "<text x=\"50%\" y=\"50%\" dominant-baseline=\"middle\" text-anchor=\"middle\""
+    " font-family=\"Arial, Helvetica, sans-serif\" font-size=\"16\" fill=\"#333\">"
+    "Infographic placeholder</text></svg>"
+).encode("utf-8")
+_PLACEHOLDER_KEY = hashlib.sha256(PLACEHOLDER_SVG).hexdigest()
 
-from fastapi.responses import StreamingResponse
-import io
-import base64
 
 @router.get("/{session_id}/export/infographic")
-async def export_infographic(session_id: str, format: str = Query("png", regex="^(png|svg)$")):
+async def export_infographic(
+    session_id: str,
+    format: str = Query("png", regex="^(png|svg)$"),
+    width: Optional[int] = Query(None, ge=16, le=4096),
+    dpi: Optional[float] = Query(None, gt=0, le=1200),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    Export the infographic image. For demo purposes this streams a small placeholder image
-    for PNG and a simple SVG string for SVG format. In production this would stream the
-    actual image bytes from object storage (S3/GCS) with proper content-type and caching.
+    Export the session's infographic as SVG, or as PNG rasterized in the worker pool at the
+    requested width or DPI. Sessions whose infographic was never rendered (the pipeline's
+    fallback record) export a placeholder image. The ETag is the image's own; it must be
+    revalidated because re-running the session attaches a new infographic.
     """
-    session = _sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    infographic = _infographics.get(session_id)
+    from src.leet_apps.api import infographics as inf_module
+
+    _get_session_or_404(session_id)
+    storage = get_storage()
+    infographic = storage.get_session_infographic(session_id)
     if not infographic:
         raise HTTPException(status_code=404, detail="Infographic not found")
 
+    record = storage.get_infographic(infographic.get("id", ""))
+    if record is None:
+        record = {"blob": _PLACEHOLDER_KEY}
+    headers = http_cache.validators(inf_module.image_etag(record, format, width, dpi), http_cache.REVALIDATE)
+    cached = http_cache.not_modified(headers, if_none_match)
+    if cached:
+        return cached
+
+    svg = PLACEHOLDER_SVG if record["blob"] == _PLACEHOLDER_KEY else storage.get_blob(record["blob"])
+    if svg is None:
+        raise HTTPException(status_code=404, detail="Infographic not found")
     if format == "png":
-        # 1x1 transparent PNG (base64-encoded) as a safe placeholder
-        png_b64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR4nGMAAQAABQABDQottAAAAABJRU5ErkJggg=="
-        png_bytes = base64.b64decode(png_b64)
-        return StreamingResponse(io.BytesIO(png_bytes), media_type="image/png")
+        png = await inf_module.render_png(record["blob"], svg, width=width, dpi=dpi)
+        return Response(content=png, media_type="image/png", headers={**headers, **raster.RESPONSE_HEADERS})
+    return Response(content=svg, media_type="image/svg+xml", headers=headers)
+
+
+@router.get("/{session_id}/events")
+async def stream_session_events(session_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events stream of pipeline progress for a session. Event types:
+    session.queued, session.running, search.started, source (one per source),
+    search.completed, infographic.rendered and finally session.completed or session.failed
+    (followup.failed for a failed follow-up, which leaves the session completed), after
+    which the stream ends. Reconnect with Last-Event-ID to resume after a given event.
+    A session that already finished and has no retained history gets a single snapshot event.
+    """
+    session = _get_session_or_404(session_id)
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    if session.status in ("completed", "failed") and not events_module.bus.history(session_id, after=after):
+        async def snapshot():
+            yield events_module.Event(after, f"session.{session.status}", {"session": session}).encode()
+        body = snapshot()
     else:
-        svg = (
-            "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
-            "<svg xmlns=\"http://www.w3.org/2000/svg\" width=\"400\" height=\"200\">"
-            "<rect width=\"100%\" height=\"100%\" fill=\"#ffffff\"/>"
-            "<text x=\"50%\" y=\"50%\" dominant-baseline=\"middle\" text-anchor=\"middle\""
-            " font-family=\"Arial, Helvetica, sans-serif\" font-size=\"16\" fill=\"#333\">"
-            "Infographic placeholder"</text></svg>"
-        )
-        return StreamingResponse(io.BytesIO(svg.encode("utf-8")), media_type="image/svg+xml")
+        body = events_module.bus.stream(session_id, last_event_id=after)
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
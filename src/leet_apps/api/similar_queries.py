@@ -0,0 +1,233 @@
+"""
+Near-duplicate research prompts: reuse the sources of a recent, similar run.
+
+search._cache only hits when two prompts normalize to the same string, but users keep
+asking overlapping questions ("EV market trends", "electric vehicle market trends 2026").
+Before fetching, the research pipeline asks this index for a completed session whose prompt
+is similar enough and, if there is one, reuses that session's sources.
+
+Similarity is the Jaccard similarity of the prompts' term sets. Terms are text_index
+tokens with a light plural stemming and a small abbreviation table (ALIASES) expanded, so
+the two prompts above share {electric, vehicle, market, trend}. Prompts whose numbers
+conflict (2025 vs 2026) never match; a prompt without numbers can reuse one with them.
+
+Finding candidates does not compare against every stored prompt: each prompt gets a
+MinHash signature (NUM_PERM hashes of its terms), split into BANDS bands; prompts sharing
+any band land in the same bucket (locality-sensitive hashing). With the defaults (16 bands
+of 4 rows) a pair at Jaccard 0.75 shares a band with probability 0.998, one at 0.5 with
+0.64 and one at 0.3 with 0.12; lower the threshold well below 0.6 and some matches will be
+missed. Candidates are verified with the exact Jaccard similarity, so LSH only affects
+recall, never precision.
+
+The index is per process and bounded (MAX_ENTRIES, least recently added evicted first;
+entries expire after TTL_SECONDS). Configuration (environment):
+- LEET_SIMILAR_QUERY_THRESHOLD: minimum similarity to reuse sources (default 0.75; 0 disables)
+- LEET_SIMILAR_QUERY_TTL_SECONDS: how long a run's sources may be reused (default 1 day)
+"""
+import hashlib
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from . import metrics
+from .text_index import tokenize
+
+# Configuration
+SIMILARITY_THRESHOLD = float(os.environ.get("LEET_SIMILAR_QUERY_THRESHOLD", "0.75"))
+TTL_SECONDS = float(os.environ.get("LEET_SIMILAR_QUERY_TTL_SECONDS", str(24 * 3600)))
+MAX_ENTRIES = 50_000
+NUM_PERM = 64
+BANDS = 16  # NUM_PERM / BANDS rows per band
+
+# Abbreviations expanded before comparison (extend as needed)
+ALIASES: Dict[str, Tuple[str, ...]] = {
+    "ev": ("electric", "vehicle"),
+    "ai": ("artificial", "intelligence"),
+    "ml": ("machine", "learning"),
+    "llm": ("large", "language", "model"),
+    "pv": ("solar", "photovoltaic"),
+    "usa": ("united", "states"),
+    "uk": ("united", "kingdom"),
+    "eu": ("european", "union"),
+}
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)  # fixed: signatures must be comparable across restarts and processes
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _stem(term: str) -> str:
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def terms(prompt: str) -> FrozenSet[str]:
+    result: Set[str] = set()
+    for token in tokenize(prompt):
+        token = _stem(token)
+        result.update(ALIASES.get(token, (token,)))
+    return frozenset(result)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _numbers(term_set: FrozenSet[str]) -> FrozenSet[str]:
+    return frozenset(t for t in term_set if t.isdigit())
+
+
+def signature(term_set: FrozenSet[str]) -> Tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "big") for t in term_set]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+class _Entry:
+    __slots__ = ("terms", "numbers", "bands", "session_id", "added_at")
+
+    def __init__(self, term_set: FrozenSet[str], bands: List[Tuple[int, ...]], session_id: str, added_at: float):
+        self.terms = term_set
+        self.numbers = _numbers(term_set)
+        self.bands = bands
+        self.session_id = session_id
+        self.added_at = added_at
+
+
+class SimilarQueryIndex:
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl_seconds: float = TTL_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        # keyed by the prompt's term set: re-running the same prompt replaces the entry
+        self._entries: "OrderedDict[FrozenSet[str], _Entry]" = OrderedDict()
+        self._buckets: List[Dict[Tuple[int, ...], Set[FrozenSet[str]]]] = [{} for _ in range(BANDS)]
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return 0 < self.threshold <= 1
+
+    @staticmethod
+    def _bands(term_set: FrozenSet[str]) -> List[Tuple[int, ...]]:
+        sig = signature(term_set)
+        rows = NUM_PERM // BANDS
+        return [sig[i * rows:(i + 1) * rows] for i in range(BANDS)]
+
+    def _remove(self, key: FrozenSet[str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for bucket, band in zip(self._buckets, entry.bands):
+            keys = bucket.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band]
+
+    def add(self, prompt: str, session_id: str) -> None:
+        """Remember that session_id holds the sources fetched for prompt."""
+        term_set = terms(prompt)
+        if not self.enabled or not term_set:
+            return
+        self._remove(term_set)
+        entry = _Entry(term_set, self._bands(term_set), session_id, self._clock())
+        self._entries[term_set] = entry
+        for bucket, band in zip(self._buckets, entry.bands):
+            bucket.setdefault(band, set()).add(term_set)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def lookup(self, prompt: str) -> Optional[Tuple[str, float]]:
+        """(session_id, similarity) of the most similar live prompt at or above the threshold."""
+        term_set = terms(prompt)
+        if not self.enabled or not term_set:
+            return None
+        now = self._clock()
+        numbers = _numbers(term_set)
+        candidates: Set[FrozenSet[str]] = set()
+        for bucket, band in zip(self._buckets, self._bands(term_set)):
+            candidates.update(bucket.get(band, ()))
+        best: Optional[Tuple[float, float, str]] = None
+        for key in candidates:
+            entry = self._entries[key]
+            if now - entry.added_at > self.ttl_seconds:
+                self._remove(key)
+                continue
+            if numbers and entry.numbers and numbers != entry.numbers:
+                continue
+            similarity = jaccard(term_set, entry.terms)
+            if similarity >= self.threshold and (best is None or (similarity, entry.added_at) > best[:2]):
+                best = (similarity, entry.added_at, entry.session_id)
+        if best is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return best[2], best[0]
+
+    def discard(self, session_id: str) -> None:
+        """Forget every prompt pointing at session_id (e.g. its sources turned out unusable)."""
+        for key in [k for k, e in self._entries.items() if e.session_id == session_id]:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        for bucket in self._buckets:
+            bucket.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+_index = SimilarQueryIndex()
+
+
+def lookup(prompt: str) -> Optional[Tuple[str, float]]:
+    return _index.lookup(prompt)
+
+
+def add(prompt: str, session_id: str) -> None:
+    _index.add(prompt, session_id)
+
+
+def discard(session_id: str) -> None:
+    _index.discard(session_id)
+
+
+def clear() -> None:
+    _index.clear()
+
+
+def stats() -> Dict[str, float]:
+    return _index.stats()
+
+
+@metrics.register_collector
+def _collect_metrics():
+    return [
+        ("leet_similar_query_hits_total", "counter", "Research runs that reused a similar run's sources.", [({}, _index.hits)]),
+        ("leet_similar_query_misses_total", "counter", "Research runs with no similar earlier run.", [({}, _index.misses)]),
+        ("leet_similar_query_entries", "gauge", "Prompts remembered for reuse.", [({}, len(_index))]),
+    ]
@@ -0,0 +1,144 @@
+"""
+Shared source store: one record per canonical URL, referenced by the sessions that cite it.
+
+Popular pages are returned for many research runs, and each session used to keep its own
+copy of every source dict. Sources are now split in two:
+
+- a shared record per canonical URL (providers.canonicalize_url), keyed by source_id(url):
+  the fields that describe the page (title, url, snippet, ...), reference counted so it is
+  dropped when the last session citing it replaces its sources;
+- a per-session reference: the shared record, the fields that belong to that session's fetch
+  (PER_SESSION_FIELDS: fetched_at, confidence) and, only when this session's copy differs
+  from the shared record (a different snippet, a tracking parameter in the url), the
+  differing fields.
+
+Reading a session's sources resolves its references into plain dicts again, equal to what
+was stored (per-session fields come last). Sources without a url are kept inline.
+
+The in-memory backend uses SourceStore below; the SQLite backend keeps the same split in
+its source_records and session_sources tables, with split()/resolve() shared between them.
+"""
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .providers import canonicalize_url
+
+PER_SESSION_FIELDS = ("fetched_at", "confidence")
+
+# Key of the field list a session's copy lacks compared to the shared record
+UNSET = "$unset"
+
+_MISSING = object()
+
+
+def source_id(url: str) -> str:
+    return hashlib.blake2b(canonicalize_url(url).encode("utf-8"), digest_size=12).hexdigest()
+
+
+def shared_fields(source: dict) -> dict:
+    return {k: v for k, v in source.items() if k not in PER_SESSION_FIELDS}
+
+
+def split(shared: dict, record: dict) -> Optional[dict]:
+    """The fields of shared that differ from record (None when identical)."""
+    extra = {k: v for k, v in shared.items() if record.get(k, _MISSING) != v}
+    unset = [k for k in record if k not in shared]
+    if unset:
+        extra[UNSET] = unset
+    return extra or None
+
+
+def resolve(record: Optional[dict], extra: Optional[dict], per_session: Dict[str, Any]) -> dict:
+    source = dict(record) if record else {}
+    if extra:
+        source.update(extra)
+        for key in source.pop(UNSET, ()):
+            source.pop(key, None)
+    source.update(per_session)
+    return source
+
+
+class _Record:
+    __slots__ = ("id", "data", "refs")
+
+    def __init__(self, id: str, data: dict):
+        self.id = id
+        self.data = data
+        self.refs = 0
+
+
+class _Ref:
+    __slots__ = ("record", "fetched_at", "confidence", "extra")
+
+    def __init__(self, record: Optional[_Record], fetched_at: Any, confidence: Any, extra: Optional[dict]):
+        self.record = record
+        self.fetched_at = fetched_at
+        self.confidence = confidence
+        self.extra = extra
+
+    def per_session(self) -> Dict[str, Any]:
+        fields = {}
+        if self.fetched_at is not _MISSING:
+            fields["fetched_at"] = self.fetched_at
+        if self.confidence is not _MISSING:
+            fields["confidence"] = self.confidence
+        return fields
+
+
+class SourceStore:
+    """In-memory shared records plus each session's list of references."""
+
+    def __init__(self):
+        self.records: Dict[str, _Record] = {}
+        self._by_session: Dict[str, Tuple[_Ref, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_session)
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._by_session
+
+    def _ref(self, source: dict) -> _Ref:
+        fetched_at = source.get("fetched_at", _MISSING)
+        confidence = source.get("confidence", _MISSING)
+        shared = shared_fields(source)
+        url = source.get("url")
+        if not url:
+            return _Ref(None, fetched_at, confidence, shared)
+        sid = source_id(url)
+        record = self.records.get(sid)
+        if record is None:
+            record = self.records[sid] = _Record(sid, shared)
+            extra = None
+        else:
+            extra = split(shared, record.data)
+        record.refs += 1
+        return _Ref(record, fetched_at, confidence, extra)
+
+    def _release(self, refs: Tuple[_Ref, ...]) -> None:
+        for ref in refs:
+            record = ref.record
+            if record is not None:
+                record.refs -= 1
+                if record.refs <= 0:
+                    del self.records[record.id]
+
+    def set(self, session_id: str, sources: List[dict]) -> None:
+        # Take the new references before releasing the old ones, so re-saving keeps records
+        refs = tuple(self._ref(s) for s in sources)
+        self._release(self._by_session.get(session_id, ()))
+        self._by_session[session_id] = refs
+
+    def iter(self, session_id: str) -> Iterator[dict]:
+        for ref in self._by_session.get(session_id, ()):
+            yield resolve(ref.record.data if ref.record is not None else None, ref.extra, ref.per_session())
+
+    def ids(self, session_id: str) -> Set[str]:
+        return {ref.record.id for ref in self._by_session.get(session_id, ()) if ref.record is not None}
+
+    def get(self, session_id: str) -> List[dict]:
+        return list(self.iter(session_id))
+
+    def clear(self) -> None:
+        self.records.clear()
+        self._by_session.clear()
@@ -0,0 +1,828 @@
+"""
+Storage backends for the API routers.
+
+Routers never touch their stores directly; they go through get_storage(), which returns one
+of:
+
+- InMemoryStorage (default): the original module-level dicts plus the secondary indexes
+  used for history and message listings. State is per-process and lost on restart.
+- SQLiteStorage: a single database file in WAL mode with indexed user_id, created_at and
+  session_id columns. Several uvicorn workers can point at the same file and share state
+  without an external database server.
+
+The backend is selected with environment variables:
+- LEET_STORAGE_BACKEND: "memory" (default) or "sqlite"
+- LEET_SQLITE_PATH: database file for the sqlite backend (defaults to leet_apps.db)
+
+Records are the routers' pydantic models (User, ResearchSession, Message); the in-memory
+backend holds them as compact records and builds models on read (see records.py). Sources,
+per-session infographic metadata and infographic records are plain dicts, as before; both
+backends keep sources deduplicated by canonical URL (see source_store.py).
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from . import metrics
+from .records import MessageRecord, RecordTable, SessionRecord, UserRecord, to_epoch_us
+from .session_index import SessionIndex, SortKey, _naive_utc, normalize_tags
+from .source_store import PER_SESSION_FIELDS, SourceStore, resolve, shared_fields, source_id, split
+from .text_index import FIELD_WEIGHTS, TextIndex, session_text, sources_text, tokenize
+
+
+class Storage(ABC):
+    """Repository interface shared by all backends."""
+
+    # users
+    @abstractmethod
+    def save_user(self, user) -> None: ...
+
+    @abstractmethod
+    def get_user(self, user_id: str): ...
+
+    @abstractmethod
+    def list_users(self) -> List[Any]: ...
+
+    @abstractmethod
+    def delete_user(self, user_id: str) -> bool: ...
+
+    # sessions
+    @abstractmethod
+    def save_session(self, session) -> None: ...
+
+    @abstractmethod
+    def get_session(self, session_id: str): ...
+
+    @abstractmethod
+    def query_sessions(
+        self,
+        user_id: Optional[str] = None,
+        topic: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        tags: Optional[List[str]] = None,
+        after: Optional[SortKey] = None,
+        limit: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Return sessions matching every filter ordered by (created_at, id), starting strictly
+        after the given key and returning at most limit sessions.
+        """
+
+    @abstractmethod
+    def search_sessions(self, query: str, user_id: Optional[str] = None, limit: int = 20) -> List[Tuple[Any, float]]:
+        """
+        Full-text search over session prompts/topics/tags, source titles and snippets and
+        message content. Returns (session, score) pairs, best match first (BM25).
+        """
+
+    # messages
+    @abstractmethod
+    def append_message(self, message) -> None: ...
+
+    @abstractmethod
+    def get_message(self, message_id: str): ...
+
+    @abstractmethod
+    def list_messages(self, session_id: str, after: Optional[SortKey] = None, limit: Optional[int] = None) -> List[Any]:
+        """Return a session's messages ordered by (created_at, id) with the same after/limit semantics."""
+
+    # sources and the infographic attached to a session
+    @abstractmethod
+    def set_sources(self, session_id: str, sources: List[dict]) -> None: ...
+
+    @abstractmethod
+    def get_sources(self, session_id: str) -> List[dict]: ...
+
+    def iter_sources(self, session_id: str) -> Iterator[dict]:
+        """A session's sources one at a time (backends may resolve them lazily)."""
+        return iter(self.get_sources(session_id))
+
+    def get_source_ids(self, session_id: str) -> Set[str]:
+        """source_store.source_id of every source with a url in the session."""
+        return {source_id(s["url"]) for s in self.get_sources(session_id) if s.get("url")}
+
+    @abstractmethod
+    def set_session_infographic(self, session_id: str, infographic: dict) -> None: ...
+
+    @abstractmethod
+    def get_session_infographic(self, session_id: str) -> Optional[dict]: ...
+
+    # generated infographic records and the content-addressed image blobs they point at
+    @abstractmethod
+    def save_infographic(self, record: dict) -> None:
+        """Store infographic metadata; record["blob"] names the image blob it renders to."""
+
+    @abstractmethod
+    def get_infographic(self, infographic_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def put_blob(self, key: str, data: bytes) -> None:
+        """Store bytes under a content key. Keys are content hashes, so rewriting is a no-op."""
+
+    @abstractmethod
+    def get_blob(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    def has_blob(self, key: str) -> bool: ...
+
+    def get_image(self, infographic_id: str) -> Optional[bytes]:
+        record = self.get_infographic(infographic_id)
+        return self.get_blob(record["blob"]) if record else None
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group several writes into one unit (one transaction/commit where the backend supports it)."""
+        yield
+
+    def sizes(self) -> Dict[str, int]:
+        """Record counts per kind plus total blob bytes, for monitoring (read on /metrics scrapes)."""
+        return {}
+
+
+class MessageStore:
+    """
+    Append-only message store. Besides the by-id map it keeps one list per session ordered by
+    (created_at, id), so reading a session's conversation costs O(messages in that session)
+    with no scan of other sessions and no sort. Both hold the same compact MessageRecord.
+    """
+
+    def __init__(self):
+        self.by_id: RecordTable[MessageRecord] = RecordTable(MessageRecord)
+        self._by_session: Dict[str, List[MessageRecord]] = {}
+
+    def append(self, message):
+        previous = self.by_id.records.get(message.id)
+        if previous is not None:
+            # Re-saving a message id replaces it, in its session's list too
+            self._discard(previous)
+        record = self.by_id.records[message.id] = MessageRecord(message)
+        msgs = self._by_session.setdefault(record.session_id, [])
+        if not msgs or msgs[-1].key() <= record.key():
+            msgs.append(record)
+        else:
+            # Out-of-order timestamp (e.g. clock skew); keep the list ordered
+            insort(msgs, record, key=MessageRecord.key)
+        return message
+
+    def _discard(self, record: MessageRecord) -> None:
+        msgs = self._by_session.get(record.session_id, [])
+        i = bisect_left(msgs, record.key(), key=MessageRecord.key)
+        if i < len(msgs) and msgs[i] is record:
+            del msgs[i]
+
+    def get(self, message_id: str):
+        return self.by_id.get(message_id)
+
+    def for_session(self, session_id: str, after: Optional[SortKey] = None, limit: Optional[int] = None) -> List[Any]:
+        msgs = self._by_session.get(session_id, [])
+        start = bisect_right(msgs, (to_epoch_us(after[0]), after[1]), key=MessageRecord.key) if after else 0
+        stop = len(msgs) if limit is None else min(len(msgs), start + limit)
+        return [record.to_model() for record in msgs[start:stop]]
+
+    def clear(self) -> None:
+        self.by_id.records.clear()
+        self._by_session.clear()
+
+
+class InMemoryStorage(Storage):
+    def __init__(self):
+        self.users: RecordTable[UserRecord] = RecordTable(UserRecord)
+        self.sessions: RecordTable[SessionRecord] = RecordTable(SessionRecord)
+        self.session_index = SessionIndex()
+        self.text_index = TextIndex()
+        self.messages = MessageStore()
+        self.sources = SourceStore()
+        # Writes through the tables (the routers' aliases) take the same path as the methods below
+        self.users.save, self.users.delete = self.save_user, self.delete_user
+        self.sessions.save = self.save_session
+        self.messages.by_id.save = self.append_message
+        self.session_infographics: Dict[str, dict] = {}
+        self.infographics: Dict[str, Dict[str, Any]] = {}
+        self.images: Dict[str, bytes] = {}  # blob key -> bytes, shared by infographic records
+
+    def save_user(self, user) -> None:
+        self.users.put(user.id, user)
+
+    def get_user(self, user_id: str):
+        return self.users.get(user_id)
+
+    def list_users(self) -> List[Any]:
+        return list(self.users.values())
+
+    def delete_user(self, user_id: str) -> bool:
+        return self.users.records.pop(user_id, None) is not None
+
+    def save_session(self, session) -> None:
+        self.sessions.put(session.id, session)
+        self.session_index.add(session)
+        self.text_index.set_session(session)
+
+    def get_session(self, session_id: str):
+        return self.sessions.get(session_id)
+
+    def query_sessions(self, user_id=None, topic=None, start_date=None, end_date=None, tags=None, after=None, limit=None):
+        keys = self.session_index.iter_keys(user_id=user_id, start_date=start_date, end_date=end_date, tags=tags, after=after)
+        q = topic.lower() if topic else None
+        records = self.sessions.records
+        result = []
+        for _, session_id in keys:
+            if limit is not None and len(result) >= limit:
+                break
+            record = records[session_id]
+            if q and not (record.topic and q in record.topic.lower()):
+                continue
+            result.append(record.to_model())
+        return result
+
+    def search_sessions(self, query, user_id=None, limit=20):
+        hits = self.text_index.search(query, user_id=user_id, limit=limit)
+        records = self.sessions.records
+        return [(records[sid].to_model(), score) for sid, score in hits if sid in records]
+
+    def append_message(self, message) -> None:
+        previous = self.messages.by_id.records.get(message.id)
+        self.messages.append(message)
+        if previous is not None:
+            self.text_index.remove_message(previous.session_id, previous.content)
+        self.text_index.add_message(message.session_id, message.content)
+
+    def get_message(self, message_id: str):
+        return self.messages.get(message_id)
+
+    def list_messages(self, session_id, after=None, limit=None):
+        return self.messages.for_session(session_id, after=after, limit=limit)
+
+    def set_sources(self, session_id: str, sources: List[dict]) -> None:
+        self.sources.set(session_id, sources)
+        self.text_index.set_sources(session_id, sources)
+
+    def get_sources(self, session_id: str) -> List[dict]:
+        return self.sources.get(session_id)
+
+    def iter_sources(self, session_id: str) -> Iterator[dict]:
+        return self.sources.iter(session_id)
+
+    def get_source_ids(self, session_id: str) -> Set[str]:
+        return self.sources.ids(session_id)
+
+    def set_session_infographic(self, session_id: str, infographic: dict) -> None:
+        self.session_infographics[session_id] = infographic
+
+    def get_session_infographic(self, session_id: str) -> Optional[dict]:
+        return self.session_infographics.get(session_id)
+
+    def save_infographic(self, record: dict) -> None:
+        self.infographics[record["id"]] = record
+
+    def get_infographic(self, infographic_id: str) -> Optional[dict]:
+        return self.infographics.get(infographic_id)
+
+    def put_blob(self, key: str, data: bytes) -> None:
+        self.images.setdefault(key, data)
+
+    def get_blob(self, key: str) -> Optional[bytes]:
+        return self.images.get(key)
+
+    def has_blob(self, key: str) -> bool:
+        return key in self.images
+
+    def sizes(self) -> Dict[str, int]:
+        return {
+            "users": len(self.users),
+            "sessions": len(self.sessions),
+            "messages": len(self.messages.by_id),
+            "sources": len(self.sources.records),
+            "infographics": len(self.infographics),
+            "blobs": len(self.images),
+            "blob_bytes": sum(len(data) for data in self.images.values()),
+        }
+
+
+# Fixed-width timestamps so lexical order in SQLite equals chronological order
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def _ts(value: datetime) -> str:
+    return _naive_utc(value).strftime(_TS_FORMAT)
+
+
+def _parse_ts(value: str) -> datetime:
+    return datetime.strptime(value, _TS_FORMAT)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    name TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    topic TEXT,
+    tags TEXT NOT NULL DEFAULT '[]',
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_created ON sessions (user_id, created_at, id);
+CREATE TABLE IF NOT EXISTS session_tags (
+    session_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, session_id)
+);
+CREATE INDEX IF NOT EXISTS idx_session_tags_session ON session_tags (session_id);
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session_created ON messages (session_id, created_at, id);
+CREATE TABLE IF NOT EXISTS source_records (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    refs INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_sources (
+    session_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    source_id TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, position)
+);
+CREATE TABLE IF NOT EXISTS session_infographics (
+    session_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS infographics (
+    id TEXT PRIMARY KEY,
+    session_id TEXT,
+    created_at TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_infographics_session ON infographics (session_id);
+CREATE TABLE IF NOT EXISTS blobs (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_docs (
+    doc INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL UNIQUE
+);
+"""
+
+
+# (table, column, definition) for columns added to existing tables
+_ADDED_COLUMNS = [
+    ("infographics", "blob", "TEXT NOT NULL DEFAULT ''"),
+    ("sessions", "updated_at", "TEXT"),
+]
+
+
+class SQLiteStorage(Storage):
+    """
+    SQLite-backed storage. One connection per process, serialized by a lock; WAL mode lets
+    readers in other processes proceed while one process writes. Writes outside batch()
+    commit immediately; inside batch() they share a single transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        # Columns added after the first release; CREATE TABLE IF NOT EXISTS leaves old files as they were
+        for table, column, ddl in _ADDED_COLUMNS:
+            if column not in {row["name"] for row in self._query(f"PRAGMA table_info({table})")}:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        if self._query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sources'"):
+            # Sources used to be stored as one full copy per session
+            with self.batch():
+                rows = self._query("SELECT session_id, data FROM sources ORDER BY session_id, position")
+                by_session: Dict[str, List[dict]] = {}
+                for r in rows:
+                    by_session.setdefault(r["session_id"], []).append(json.loads(r["data"]))
+                for session_id, sources in by_session.items():
+                    self._store_sources(session_id, sources)
+                self._conn.execute("DROP TABLE sources")
+        self._fts = self._create_search_index()
+        if self._query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images'"):
+            # Pre-blob files kept image bytes per infographic id; keep serving them under that key
+            with self.batch():
+                self._conn.execute("INSERT OR IGNORE INTO blobs (key, data) SELECT id, data FROM images")
+                self._conn.execute("UPDATE infographics SET blob = id WHERE blob = ''")
+                self._conn.execute("DROP TABLE images")
+
+    def _create_search_index(self) -> bool:
+        """
+        Full-text search uses an FTS5 table with one row per session (columns weighted like
+        text_index.FIELD_WEIGHTS). Its rowid comes from search_docs, whose INTEGER PRIMARY KEY
+        stays stable across VACUUM. Files created before the index existed are backfilled.
+        Returns False when this SQLite build lacks FTS5 (search then falls back to a scan).
+        """
+        if self._query("SELECT 1 FROM sqlite_master WHERE name = 'session_search'"):
+            return True
+        try:
+            self._conn.execute("CREATE VIRTUAL TABLE session_search USING fts5(session, sources, messages)")
+        except sqlite3.OperationalError:
+            return False
+        with self.batch():
+            self._conn.execute("INSERT OR IGNORE INTO search_docs (session_id) SELECT id FROM sessions")
+            for row in self._query("SELECT d.doc, s.* FROM sessions s JOIN search_docs d ON d.session_id = s.id"):
+                session = self._session(row)
+                messages = "\n".join(r["content"] for r in self._query("SELECT content FROM messages WHERE session_id = ?", (session.id,)))
+                self._conn.execute(
+                    "INSERT INTO session_search (rowid, session, sources, messages) VALUES (?, ?, ?, ?)",
+                    (row["doc"], session_text(session), sources_text(self.get_sources(session.id)), messages),
+                )
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        with self._lock:
+            if self._batch_depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth += 1
+            try:
+                yield
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # users
+    def save_user(self, user) -> None:
+        with self.batch():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO users (id, email, name, created_at) VALUES (?, ?, ?, ?)",
+                (user.id, user.email, user.name, _ts(user.created_at)),
+            )
+
+    @staticmethod
+    def _user(row):
+        from src.leet_apps.api.users import User
+        return User(id=row["id"], email=row["email"], name=row["name"], created_at=_parse_ts(row["created_at"]))
+
+    def get_user(self, user_id: str):
+        rows = self._query("SELECT * FROM users WHERE id = ?", (user_id,))
+        return self._user(rows[0]) if rows else None
+
+    def list_users(self) -> List[Any]:
+        return [self._user(r) for r in self._query("SELECT * FROM users ORDER BY created_at, id")]
+
+    def delete_user(self, user_id: str) -> bool:
+        with self.batch():
+            return self._conn.execute("DELETE FROM users WHERE id = ?", (user_id,)).rowcount > 0
+
+    # sessions
+    def save_session(self, session) -> None:
+        tags = list(session.tags or [])
+        with self.batch():
+            self._conn.execute(
+                "INSERT INTO sessions (id, user_id, prompt, status, created_at, topic, tags, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET user_id = excluded.user_id, prompt = excluded.prompt, "
+                "status = excluded.status, topic = excluded.topic, tags = excluded.tags, updated_at = excluded.updated_at",
+                (session.id, session.user_id, session.prompt, session.status, _ts(session.created_at), session.topic, json.dumps(tags),
+                 _ts(session.updated_at) if getattr(session, "updated_at", None) else None),
+            )
+            self._conn.execute("DELETE FROM session_tags WHERE session_id = ?", (session.id,))
+            self._conn.executemany(
+                "INSERT INTO session_tags (session_id, tag) VALUES (?, ?)",
+                [(session.id, t) for t in normalize_tags(tags)],
+            )
+            self._index_text(session.id, "session", session_text(session))
+
+    def _index_text(self, session_id: str, column: str, text: str, append: bool = False) -> None:
+        """Set (or append to) one column of a session's full-text row; called inside batch()."""
+        if not self._fts:
+            return
+        self._conn.execute("INSERT OR IGNORE INTO search_docs (session_id) VALUES (?)", (session_id,))
+        doc = self._conn.execute("SELECT doc FROM search_docs WHERE session_id = ?", (session_id,)).fetchone()[0]
+        row = self._conn.execute(f"SELECT {column} FROM session_search WHERE rowid = ?", (doc,)).fetchone()
+        if row is None:
+            values = {"session": "", "sources": "", "messages": "", column: text}
+            self._conn.execute(
+                "INSERT INTO session_search (rowid, session, sources, messages) VALUES (?, ?, ?, ?)",
+                (doc, values["session"], values["sources"], values["messages"]),
+            )
+        elif append or row[0] != text:
+            # FTS5 re-tokenizes the whole row on update, so skip writes that change nothing
+            # (save_session runs on every status change)
+            value = f"{row[0]}\n{text}" if append and row[0] else text
+            self._conn.execute(f"UPDATE session_search SET {column} = ? WHERE rowid = ?", (value, doc))
+
+    def search_sessions(self, query, user_id=None, limit=20):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit <= 0:
+            return []
+        if not self._fts:
+            # No FTS5 in this SQLite build: unranked scan over prompts
+            clauses = " OR ".join("instr(lower(prompt), ?) > 0" for _ in terms)
+            sql = f"SELECT * FROM sessions WHERE ({clauses})" + (" AND user_id = ?" if user_id else "")
+            sql += " ORDER BY created_at DESC LIMIT ?"
+            rows = self._query(sql, tuple(terms) + ((user_id,) if user_id else ()) + (limit,))
+            return [(self._session(r), 0.0) for r in rows]
+        rank = f"bm25(session_search, {FIELD_WEIGHTS['session']}, {FIELD_WEIGHTS['sources']}, {FIELD_WEIGHTS['messages']})"
+        sql = (
+            f"SELECT s.*, -{rank} AS score FROM session_search "
+            "JOIN search_docs d ON d.doc = session_search.rowid JOIN sessions s ON s.id = d.session_id "
+            "WHERE session_search MATCH ?" + (" AND s.user_id = ?" if user_id else "") + f" ORDER BY {rank} LIMIT ?"
+        )
+        match = " OR ".join(f'"{t}"' for t in terms)  # tokens are \w+ only, so quoting is safe
+        rows = self._query(sql, (match,) + ((user_id,) if user_id else ()) + (limit,))
+        return [(self._session(r), r["score"]) for r in rows]
+
+    @staticmethod
+    def _session(row):
+        from src.leet_apps.api.sessions import ResearchSession
+        return ResearchSession(
+            id=row["id"],
+            user_id=row["user_id"],
+            prompt=row["prompt"],
+            status=row["status"],
+            created_at=_parse_ts(row["created_at"]),
+            topic=row["topic"],
+            tags=json.loads(row["tags"]),
+            updated_at=_parse_ts(row["updated_at"]) if row["updated_at"] else None,
+        )
+
+    def get_session(self, session_id: str):
+        rows = self._query("SELECT * FROM sessions WHERE id = ?", (session_id,))
+        return self._session(rows[0]) if rows else None
+
+    def query_sessions(self, user_id=None, topic=None, start_date=None, end_date=None, tags=None, after=None, limit=None):
+        clauses, params = [], []
+        if user_id:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if topic:
+            clauses.append("topic IS NOT NULL AND instr(lower(topic), ?) > 0")
+            params.append(topic.lower())
+        if start_date:
+            clauses.append("created_at >= ?")
+            params.append(_ts(start_date))
+        if end_date:
+            clauses.append("created_at <= ?")
+            params.append(_ts(end_date))
+        for tag in normalize_tags(tags):
+            clauses.append("id IN (SELECT session_id FROM session_tags WHERE tag = ?)")
+            params.append(tag)
+        if after:
+            clauses.append("(created_at, id) > (?, ?)")
+            params.extend([_ts(after[0]), after[1]])
+        sql = "SELECT * FROM sessions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._session(r) for r in self._query(sql, tuple(params))]
+
+    # messages
+    def append_message(self, message) -> None:
+        with self.batch():
+            previous = self._conn.execute("SELECT session_id FROM messages WHERE id = ?", (message.id,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO messages (id, session_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (message.id, message.session_id, message.role, message.content, _ts(message.created_at)),
+            )
+            if previous is None:
+                self._index_text(message.session_id, "messages", message.content, append=True)
+            elif self._fts:
+                # A re-saved message replaces its text: rebuild the affected sessions' column
+                for session_id in {previous[0], message.session_id}:
+                    self._index_text(session_id, "messages", self._messages_text(session_id))
+
+    def _messages_text(self, session_id: str) -> str:
+        rows = self._conn.execute("SELECT content FROM messages WHERE session_id = ? ORDER BY created_at, id", (session_id,))
+        return "\n".join(row[0] for row in rows)
+
+    @staticmethod
+    def _message(row):
+        from src.leet_apps.api.messages import Message
+        return Message(
+            id=row["id"],
+            session_id=row["session_id"],
+            role=row["role"],
+            content=row["content"],
+            created_at=_parse_ts(row["created_at"]),
+        )
+
+    def get_message(self, message_id: str):
+        rows = self._query("SELECT * FROM messages WHERE id = ?", (message_id,))
+        return self._message(rows[0]) if rows else None
+
+    def list_messages(self, session_id, after=None, limit=None):
+        sql = "SELECT * FROM messages WHERE session_id = ?"
+        params: List[Any] = [session_id]
+        if after:
+            sql += " AND (created_at, id) > (?, ?)"
+            params.extend([_ts(after[0]), after[1]])
+        sql += " ORDER BY created_at, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._message(r) for r in self._query(sql, tuple(params))]
+
+    # sources and session infographics
+    def set_sources(self, session_id: str, sources: List[dict]) -> None:
+        with self.batch():
+            self._store_sources(session_id, sources)
+            self._index_text(session_id, "sources", sources_text(sources))
+
+    def _store_sources(self, session_id: str, sources: List[dict]) -> None:
+        """Shared records in source_records; session_sources holds each session's references."""
+        released = [
+            r["source_id"]
+            for r in self._query("SELECT source_id FROM session_sources WHERE session_id = ? AND source_id IS NOT NULL", (session_id,))
+        ]
+        self._conn.execute("DELETE FROM session_sources WHERE session_id = ?", (session_id,))
+        for position, source in enumerate(sources):
+            # Compare in JSON form: that is what the shared record holds
+            shared = json.loads(_dumps(shared_fields(source)))
+            own = json.loads(_dumps({k: source[k] for k in PER_SESSION_FIELDS if k in source}))
+            sid = source_id(source["url"]) if source.get("url") else None
+            if sid is None:
+                own["extra"] = shared
+            else:
+                rows = self._query("SELECT data FROM source_records WHERE id = ?", (sid,))
+                if rows:
+                    extra = split(shared, json.loads(rows[0]["data"]))
+                    if extra:
+                        own["extra"] = extra
+                    self._conn.execute("UPDATE source_records SET refs = refs + 1 WHERE id = ?", (sid,))
+                else:
+                    self._conn.execute("INSERT INTO source_records (id, data, refs) VALUES (?, ?, 1)", (sid, _dumps(shared)))
+            self._conn.execute(
+                "INSERT INTO session_sources (session_id, position, source_id, data) VALUES (?, ?, ?, ?)",
+                (session_id, position, sid, _dumps(own)),
+            )
+        for sid in released:
+            self._conn.execute("UPDATE source_records SET refs = refs - 1 WHERE id = ?", (sid,))
+            self._conn.execute("DELETE FROM source_records WHERE id = ? AND refs <= 0", (sid,))
+
+    def get_source_ids(self, session_id: str) -> Set[str]:
+        rows = self._query("SELECT source_id FROM session_sources WHERE session_id = ? AND source_id IS NOT NULL", (session_id,))
+        return {r["source_id"] for r in rows}
+
+    def get_sources(self, session_id: str) -> List[dict]:
+        rows = self._query(
+            "SELECT ss.data, r.data AS record FROM session_sources ss LEFT JOIN source_records r ON r.id = ss.source_id"
+            " WHERE ss.session_id = ? ORDER BY ss.position",
+            (session_id,),
+        )
+        sources = []
+        for r in rows:
+            own = json.loads(r["data"])
+            extra = own.pop("extra", None)
+            s = resolve(json.loads(r["record"]) if r["record"] else None, extra, own)
+            if isinstance(s.get("fetched_at"), str):
+                s["fetched_at"] = datetime.fromisoformat(s["fetched_at"])
+            sources.append(s)
+        return sources
+
+    def set_session_infographic(self, session_id: str, infographic: dict) -> None:
+        with self.batch():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_infographics (session_id, data) VALUES (?, ?)",
+                (session_id, _dumps(infographic)),
+            )
+
+    def get_session_infographic(self, session_id: str) -> Optional[dict]:
+        rows = self._query("SELECT data FROM session_infographics WHERE session_id = ?", (session_id,))
+        if not rows:
+            return None
+        infographic = json.loads(rows[0]["data"])
+        if isinstance(infographic.get("created_at"), str):
+            infographic["created_at"] = datetime.fromisoformat(infographic["created_at"])
+        return infographic
+
+    # infographic records and blobs
+    def save_infographic(self, record: dict) -> None:
+        with self.batch():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO infographics (id, session_id, created_at, blob, data) VALUES (?, ?, ?, ?, ?)",
+                (record["id"], record.get("session_id"), _ts(record["created_at"]), record["blob"], _dumps(record)),
+            )
+
+    def get_infographic(self, infographic_id: str) -> Optional[dict]:
+        rows = self._query("SELECT created_at, data FROM infographics WHERE id = ?", (infographic_id,))
+        if not rows:
+            return None
+        record = json.loads(rows[0]["data"])
+        record["created_at"] = _parse_ts(rows[0]["created_at"])
+        return record
+
+    def put_blob(self, key: str, data: bytes) -> None:
+        with self.batch():
+            self._conn.execute("INSERT OR IGNORE INTO blobs (key, data) VALUES (?, ?)", (key, data))
+
+    def get_blob(self, key: str) -> Optional[bytes]:
+        rows = self._query("SELECT data FROM blobs WHERE key = ?", (key,))
+        return bytes(rows[0]["data"]) if rows else None
+
+    def has_blob(self, key: str) -> bool:
+        return bool(self._query("SELECT 1 FROM blobs WHERE key = ?", (key,)))
+
+    def sizes(self) -> Dict[str, int]:
+        counts = {
+            table: self._query(f"SELECT COUNT(*) AS n FROM {table}")[0]["n"]
+            for table in ("users", "sessions", "messages", "source_records", "infographics", "blobs")
+        }
+        counts["sources"] = counts.pop("source_records")
+        counts["blob_bytes"] = self._query("SELECT COALESCE(SUM(LENGTH(data)), 0) AS n FROM blobs")[0]["n"]
+        return counts
+
+    def get_image(self, infographic_id: str) -> Optional[bytes]:
+        rows = self._query(
+            "SELECT b.data FROM infographics i JOIN blobs b ON b.key = i.blob WHERE i.id = ?", (infographic_id,)
+        )
+        return bytes(rows[0]["data"]) if rows else None
+
+
+# The default in-memory backend. Routers alias its dicts under their historical names
+# (_users, _sessions, _messages, ...) so existing callers and tests keep working.
+_memory = InMemoryStorage()
+_storage: Optional[Storage] = None
+
+
+def memory_storage() -> InMemoryStorage:
+    return _memory
+
+
+def _storage_from_env() -> Storage:
+    backend = os.environ.get("LEET_STORAGE_BACKEND", "memory").strip().lower()
+    if backend == "sqlite":
+        return SQLiteStorage(os.environ.get("LEET_SQLITE_PATH", "leet_apps.db"))
+    if backend not in ("", "memory"):
+        raise ValueError(f"Unknown LEET_STORAGE_BACKEND: {backend}")
+    return _memory
+
+
+def get_storage() -> Storage:
+    """Return the configured storage backend, creating it from the environment on first use."""
+    global _storage
+    if _storage is None:
+        _storage = _storage_from_env()
+    return _storage
+
+
+def set_storage(storage: Optional[Storage]) -> Optional[Storage]:
+    """Swap the active backend (None re-reads the environment on next use). Returns the previous one."""
+    global _storage
+    previous, _storage = _storage, storage
+    return previous
+
+
+@metrics.register_collector
+def _collect_metrics():
+    sizes = get_storage().sizes()
+    blob_bytes = sizes.pop("blob_bytes", None)
+    families = [("leet_store_records", "gauge", "Records held by the storage backend.", [({"kind": k}, n) for k, n in sizes.items()])]
+    if blob_bytes is not None:
+        families.append(("leet_store_blob_bytes", "gauge", "Bytes of blob data (infographic images and variants).", [({}, blob_bytes)]))
+    return families
@@ -0,0 +1,297 @@
+"""
+Compiled SVG templates for infographic layouts.
+
+Templates are plain SVG text with {name} placeholders. Each one is compiled once at import
+into a list of segments (literal strings and field references) and a generated render
+function over them, so rendering is a single join with no re-parsing. {name} values are
+XML-escaped exactly once as they are inserted; {!name} inserts an already-rendered fragment
+(e.g. a block of rows rendered from a row template) untouched. {{ and }} are literal
+braces, as in str.format.
+
+A layout pairs a page template with a function that turns the render inputs (title,
+prompt, sources, stats, bullets) into field values. render() looks layouts up by the
+template name stored on the infographic ("simple_v1", "basic_v1", ...).
+"""
+import re
+from html import escape
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+_TOKEN = re.compile(r"\{\{|\}\}|\{(!?)([A-Za-z_][A-Za-z0-9_]*)\}")
+
+Field = Tuple[str, bool]  # (name, raw)
+Segment = Union[str, Field]
+
+
+class TemplateError(ValueError):
+    """Malformed template source or a missing field value."""
+
+
+class CompiledTemplate:
+    """
+    A template split into segments. render() is generated once from the segments as a
+    single join expression, so a render costs one call plus one escape per plain field.
+    """
+
+    __slots__ = ("name", "segments", "fields", "_render")
+
+    def __init__(self, name: str, segments: List[Segment]):
+        self.name = name
+        self.segments = segments
+        self.fields = frozenset(seg[0] for seg in segments if isinstance(seg, tuple))
+        self._render = _build_renderer(segments)
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        try:
+            return self._render(values)
+        except KeyError as e:
+            raise TemplateError(f"template {self.name!r} is missing value for {e.args[0]!r}") from None
+
+    def render_rows(self, rows: Sequence[Mapping[str, Any]], separator: str = "\n    ") -> str:
+        """Render the template once per row and join the results (row templates)."""
+        render = self._render
+        try:
+            return separator.join([render(row) for row in rows])
+        except KeyError as e:
+            raise TemplateError(f"template {self.name!r} is missing value for {e.args[0]!r}") from None
+
+
+def _build_renderer(segments: List[Segment]) -> Callable[[Mapping[str, Any]], str]:
+    # Only numbers and booleans are inserted as is: anything else (str, but also lists or dicts
+    # from request payloads) may carry markup once converted, so it is escaped after str()
+    # The generated source is safe to exec: it only ever contains repr() of the literal
+    # segments and of field names, which _TOKEN restricts to [A-Za-z_][A-Za-z0-9_]*, and
+    # templates are module constants, never request input. A single expression avoids
+    # a Python-level loop over segments per render.
+    parts = []
+    for seg in segments:
+        if isinstance(seg, str):
+            parts.append(repr(seg))
+        elif seg[1]:
+            parts.append(f"_str(v[{seg[0]!r}])")
+        else:
+            parts.append(f"(_str(x) if (x := v[{seg[0]!r}]).__class__ in _plain else _escape(_str(x)))")
+    source = f"def render(v):\n    return ''.join(({', '.join(parts)},))\n"
+    namespace: Dict[str, Any] = {"_escape": escape, "_str": str, "_plain": frozenset((int, float, bool))}
+    exec(compile(source, "<svg template>", "exec"), namespace)
+    return namespace["render"]
+
+
+def _literal(text: str, name: str) -> str:
+    if "{" in text or "}" in text:
+        raise TemplateError(f"template {name!r} has an unmatched brace near {text[:40]!r}")
+    return text
+
+
+def compile_template(source: str, name: str = "<template>") -> CompiledTemplate:
+    """Split source into literal and field segments; adjacent literals are merged."""
+    segments: List[Segment] = []
+    literal: List[str] = []
+    pos = 0
+    for match in _TOKEN.finditer(source):
+        literal.append(_literal(source[pos:match.start()], name))
+        token = match.group()
+        if token == "{{":
+            literal.append("{")
+        elif token == "}}":
+            literal.append("}")
+        else:
+            if any(literal):
+                segments.append("".join(literal))
+            literal = []
+            segments.append((match.group(2), match.group(1) == "!"))
+        pos = match.end()
+    literal.append(_literal(source[pos:], name))
+    if any(literal):
+        segments.append("".join(literal))
+    return CompiledTemplate(name, segments)
+
+
+# Page and row templates
+
+_HEADER = """<?xml version='1.0' encoding='UTF-8'?>
+<svg xmlns='http://www.w3.org/2000/svg' width='800' height='600' viewBox='0 0 800 600'>
+  <style>
+    .title {{ font: bold 24px sans-serif; }}
+    .body {{ font: 14px sans-serif; }}
+    .source {{ font: 12px sans-serif; fill: #555; }}
+    .label {{ font: 12px sans-serif; fill: #333; }}
+    .bar {{ fill: #3b82f6; }}
+  </style>
+  <rect width='100%' height='100%' fill='#ffffff' />
+  <text x='40' y='60' class='title'>Infographic: {title}</text>
+"""
+
+SIMPLE_V1 = compile_template(_HEADER + """  <text x='40' y='100' class='body'>Prompt: {prompt}</text>
+  <g transform='translate(40,140)'>
+    {!bullets}
+  </g>
+  <g transform='translate(40,420)'>
+    <text class='source'>Sources:</text>
+    {!sources}
+  </g>
+</svg>
+""", "simple_v1")
+
+BASIC_V1 = compile_template(_HEADER + """  <text x='40' y='100' class='body'>{prompt}</text>
+  <g transform='translate(40,140)'>
+    {!bullets}
+  </g>
+  <g transform='translate(40,400)'>
+    <text class='source'>References:</text>
+    {!references}
+  </g>
+</svg>
+""", "basic_v1")
+
+STATS_V1 = compile_template(_HEADER + """  <text x='40' y='100' class='body'>{prompt}</text>
+  <g transform='translate(40,140)'>
+    {!bars}
+  </g>
+  <g transform='translate(40,480)'>
+    <text class='source'>Sources:</text>
+    {!sources}
+  </g>
+</svg>
+""", "stats_v1")
+
+CHART_V1 = compile_template(_HEADER + """  <text x='40' y='100' class='body'>{prompt}</text>
+  <g transform='translate(60,140)'>
+    <line x1='0' y1='280' x2='680' y2='280' stroke='#999' />
+    {!columns}
+  </g>
+  <g transform='translate(40,480)'>
+    <text class='source'>Sources:</text>
+    {!sources}
+  </g>
+</svg>
+""", "chart_v1")
+
+REFERENCES_V1 = compile_template(_HEADER + """  <text x='40' y='100' class='body'>{prompt}</text>
+  <g transform='translate(40,140)'>
+    {!references}
+  </g>
+</svg>
+""", "references_v1")
+
+BULLET_ROW = compile_template("<text x='0' y='{y}' class='body'>- {title}: {snippet}</text>", "bullet")
+TEXT_BULLET_ROW = compile_template("<text x='0' y='{y}' class='body'>- {text}</text>", "text_bullet")
+SOURCE_ROW = compile_template("<text x='0' y='{y}' class='source'>{url}</text>", "source")
+REFERENCE_ROW = compile_template("<text x='0' y='{y}' class='source'>[{n}] {title} - {url}</text>", "reference")
+BAR_ROW = compile_template(
+    "<text x='0' y='{y}' class='label'>{label}</text>"
+    "<rect x='200' y='{bar_y}' width='{width}' height='18' class='bar' />"
+    "<text x='{value_x}' y='{y}' class='label'>{value}</text>",
+    "bar",
+)
+COLUMN_ROW = compile_template(
+    "<rect x='{x}' y='{top}' width='{width}' height='{height}' class='bar' />"
+    "<text x='{x}' y='300' class='label'>{label}</text>",
+    "column",
+)
+
+
+# Layouts: template + value builder
+
+class RenderInput(NamedTuple):
+    title: str
+    prompt: str
+    sources: Sequence[Mapping[str, Any]]
+    stats: Sequence[Mapping[str, Any]]
+    bullets: Sequence[str]
+
+
+class Layout(NamedTuple):
+    template: CompiledTemplate
+    values: Callable[[RenderInput], Dict[str, Any]]
+    sources_drawn: int  # sources past this many never show up in the output
+
+
+def _source_bullets(sources, limit):
+    return BULLET_ROW.render_rows(
+        [{"y": i * 24, "title": s.get("title", ""), "snippet": s.get("snippet", "")} for i, s in enumerate(sources[:limit])]
+    )
+
+
+def _bullets(inp: RenderInput, limit):
+    if not inp.bullets:
+        return _source_bullets(inp.sources, limit)
+    return TEXT_BULLET_ROW.render_rows([{"y": i * 24, "text": b} for i, b in enumerate(inp.bullets[:limit])])
+
+
+def _source_urls(sources, limit):
+    return SOURCE_ROW.render_rows([{"y": 20 + i * 16, "url": s.get("url")} for i, s in enumerate(sources[:limit])])
+
+
+def _references(sources, limit, first_y=20):
+    return REFERENCE_ROW.render_rows(
+        [{"y": first_y + i * 16, "n": i + 1, "title": s.get("title", ""), "url": s.get("url")} for i, s in enumerate(sources[:limit])]
+    )
+
+
+def _format_value(value: float) -> str:
+    return f"{value:g}"
+
+
+def _stat_bars(stats, limit=10, max_width=480):
+    stats = list(stats[:limit])
+    peak = max((abs(s["value"]) for s in stats), default=0) or 1
+    rows = []
+    for i, s in enumerate(stats):
+        width = round(abs(s["value"]) / peak * max_width, 1)
+        rows.append({"y": i * 32 + 14, "bar_y": i * 32, "label": s["label"], "width": width, "value_x": 210 + width, "value": _format_value(s["value"])})
+    return BAR_ROW.render_rows(rows)
+
+
+def _stat_columns(stats, limit=12, max_height=260, span=680):
+    stats = list(stats[:limit])
+    peak = max((abs(s["value"]) for s in stats), default=0) or 1
+    slot = span / max(len(stats), 1)
+    rows = []
+    for i, s in enumerate(stats):
+        height = round(abs(s["value"]) / peak * max_height, 1)
+        rows.append({"x": round(i * slot + slot * 0.15, 1), "top": round(280 - height, 1), "width": round(slot * 0.7, 1), "height": height, "label": s["label"]})
+    return COLUMN_ROW.render_rows(rows)
+
+
+# Rows each layout draws from the sources. The value functions and Layout.sources_drawn both
+# read these, so the two cannot drift apart.
+SIMPLE_BULLET_ROWS = 6
+SIMPLE_SOURCE_ROWS = 4
+BASIC_ROWS = 8
+STATS_SOURCE_ROWS = 3
+CHART_SOURCE_ROWS = 3
+REFERENCES_ROWS = 26
+
+LAYOUTS: Dict[str, Layout] = {
+    "simple_v1": Layout(SIMPLE_V1, lambda i: {
+        "title": i.title, "prompt": i.prompt,
+        "bullets": _source_bullets(i.sources, SIMPLE_BULLET_ROWS), "sources": _source_urls(i.sources, SIMPLE_SOURCE_ROWS),
+    }, max(SIMPLE_BULLET_ROWS, SIMPLE_SOURCE_ROWS)),
+    "basic_v1": Layout(BASIC_V1, lambda i: {
+        "title": i.title, "prompt": i.prompt, "bullets": _bullets(i, BASIC_ROWS), "references": _references(i.sources, BASIC_ROWS),
+    }, BASIC_ROWS),
+    "stats_v1": Layout(STATS_V1, lambda i: {
+        "title": i.title, "prompt": i.prompt, "bars": _stat_bars(i.stats), "sources": _source_urls(i.sources, STATS_SOURCE_ROWS),
+    }, STATS_SOURCE_ROWS),
+    "chart_v1": Layout(CHART_V1, lambda i: {
+        "title": i.title, "prompt": i.prompt, "columns": _stat_columns(i.stats), "sources": _source_urls(i.sources, CHART_SOURCE_ROWS),
+    }, CHART_SOURCE_ROWS),
+    "references_v1": Layout(REFERENCES_V1, lambda i: {
+        "title": i.title, "prompt": i.prompt, "references": _references(i.sources, REFERENCES_ROWS, first_y=0),
+    }, REFERENCES_ROWS),
+}
+
+DEFAULT_LAYOUT = "simple_v1"
+
+
+def render(
+    template: Optional[str],
+    title: str,
+    prompt: str,
+    sources: Sequence[Mapping[str, Any]] = (),
+    stats: Sequence[Mapping[str, Any]] = (),
+    bullets: Sequence[str] = (),
+) -> str:
+    """Render an infographic SVG with the named layout. Raises KeyError for unknown layouts."""
+    layout = LAYOUTS[template or DEFAULT_LAYOUT]
+    return layout.template.render(layout.values(RenderInput(title, prompt, sources, stats, bullets)))
@@ -0,0 +1,219 @@
+"""
+Full-text index over research sessions, ranked with BM25.
+
+One document per session, built from three fields with different weights:
+
+- session: prompt, topic and tags (FIELD_WEIGHTS["session"])
+- sources: titles and snippets of the session's sources
+- messages: content of every message in the session
+
+A term's frequency in a document is the weighted sum of its frequencies in the fields
+(a BM25F-style simplification), and the document length is the weighted token count.
+
+The index is updated incrementally by the in-memory backend on every write: saving a session
+or replacing its sources swaps that field's contribution (the per-field term counts of those
+two small fields are kept for this), appending a message adds its terms and re-saving one
+removes the terms of its previous content first. Postings map
+term -> {session_id: weighted tf}.
+
+Queries are OR queries scored term at a time, rarest term first, and only the top k are
+kept. Three things keep the work proportional to the answer rather than the corpus:
+
+- Once the k-th best partial score reaches the most the remaining terms could add, no
+  document outside the current candidates can enter the top k, so the remaining (longer)
+  posting lists are only probed for the candidates.
+- A user_id filter walks that user's sessions and probes the postings when the user has
+  fewer sessions than the posting list.
+- Posting lists longer than CHAMPION_MIN_POSTINGS (terms in a large share of all
+  sessions) are entered through a champion list: the CHAMPIONS documents where the term
+  weighs most, rebuilt after CHAMPION_REFRESH of the list has changed. Candidates still get
+  exact scores over every query term, but a document matching only such common terms and
+  not among their champions is not returned (inexact top-k for queries made solely of
+  very common terms; exact otherwise).
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+FIELD_WEIGHTS = {"session": 3.0, "sources": 2.0, "messages": 1.0}
+
+# Posting lists longer than this are entered through their champion list (see above)
+CHAMPION_MIN_POSTINGS = 5000
+CHAMPIONS = 1000
+CHAMPION_REFRESH = 0.1
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased word tokens without stopwords and single letters (digits are kept)."""
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(text.lower()) if (len(t) > 1 or t.isdigit()) and t not in STOPWORDS]
+
+
+def session_text(session) -> str:
+    return " ".join([session.prompt or "", session.topic or "", " ".join(session.tags or [])])
+
+
+def sources_text(sources: Iterable[dict]) -> str:
+    return "\n".join(f"{s.get('title') or ''} {s.get('snippet') or ''}" for s in sources)
+
+
+class _Doc:
+    __slots__ = ("user_id", "fields")
+
+    def __init__(self):
+        self.user_id: Optional[str] = None
+        # Term counts of the replaceable fields (session, sources); messages are added and
+        # removed one at a time by the caller, which has their content
+        self.fields: Dict[str, Counter] = {}
+
+
+class _Champions:
+    __slots__ = ("sids", "changes")
+
+    def __init__(self, sids: List[str]):
+        self.sids = sids
+        self.changes = 0  # writes to the term's postings since the list was built
+
+
+class TextIndex:
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._docs: Dict[str, _Doc] = {}
+        self._lengths: Dict[str, float] = {}  # weighted token count per session
+        self._by_user: Dict[str, Set[str]] = {}
+        self._champions: Dict[str, _Champions] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _doc(self, session_id: str) -> _Doc:
+        doc = self._docs.get(session_id)
+        if doc is None:
+            doc = self._docs[session_id] = _Doc()
+            self._lengths[session_id] = 0.0
+        return doc
+
+    def _apply(self, session_id: str, counts: Counter, weight: float) -> None:
+        """Add (weight > 0) or remove (weight < 0) a field's term counts."""
+        for term, count in counts.items():
+            postings = self._postings.setdefault(term, {})
+            tf = postings.get(session_id, 0.0) + count * weight
+            if tf > 1e-9:
+                postings[session_id] = tf
+            else:
+                postings.pop(session_id, None)
+                if not postings:
+                    del self._postings[term]
+            champions = self._champions.get(term)
+            if champions is not None:
+                champions.changes += 1
+        delta = sum(counts.values()) * weight
+        self._lengths[session_id] += delta
+        self._total_length += delta
+
+    def _set_field(self, session_id: str, field: str, text: str) -> _Doc:
+        doc = self._doc(session_id)
+        old = doc.fields.get(field)
+        new = Counter(tokenize(text))
+        if old == new:
+            return doc
+        if old:
+            self._apply(session_id, old, -FIELD_WEIGHTS[field])
+        self._apply(session_id, new, FIELD_WEIGHTS[field])
+        doc.fields[field] = new
+        return doc
+
+    def set_session(self, session) -> None:
+        doc = self._set_field(session.id, "session", session_text(session))
+        if doc.user_id != session.user_id:
+            if doc.user_id is not None:
+                self._by_user[doc.user_id].discard(session.id)
+            self._by_user.setdefault(session.user_id, set()).add(session.id)
+            doc.user_id = session.user_id
+
+    def set_sources(self, session_id: str, sources: Iterable[dict]) -> None:
+        self._set_field(session_id, "sources", sources_text(sources))
+
+    def add_message(self, session_id: str, content: str) -> None:
+        counts = Counter(tokenize(content))
+        if counts:
+            self._doc(session_id)
+            self._apply(session_id, counts, FIELD_WEIGHTS["messages"])
+
+    def remove_message(self, session_id: str, content: str) -> None:
+        """Undo add_message(session_id, content) (the message was replaced)."""
+        counts = Counter(tokenize(content))
+        if counts and session_id in self._docs:
+            self._apply(session_id, counts, -FIELD_WEIGHTS["messages"])
+
+    def _champion_sids(self, term: str, postings: Dict[str, float], c1: float, c2: float) -> List[str]:
+        champions = self._champions.get(term)
+        if champions is None or champions.changes > len(postings) * CHAMPION_REFRESH:
+            lengths = self._lengths
+            sids = heapq.nlargest(CHAMPIONS, postings, key=lambda sid: postings[sid] / (postings[sid] + c1 + c2 * lengths[sid]))
+            champions = self._champions[term] = _Champions(sids)
+        return champions.sids
+
+    def search(self, query: str, user_id: Optional[str] = None, limit: int = 20) -> List[Tuple[str, float]]:
+        """(session_id, score) pairs, best first; a session matches if it contains any query term."""
+        n = len(self._docs)
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self._postings]
+        if not n or not terms or limit <= 0:
+            return []
+        avgdl = self._total_length / n or 1.0
+        idf = {t: math.log(1.0 + (n - len(self._postings[t]) + 0.5) / (len(self._postings[t]) + 0.5)) for t in terms}
+        terms.sort(key=idf.__getitem__, reverse=True)
+        # No document gains more than idf * (k1 + 1) from one term
+        remaining = sum(idf[t] for t in terms) * (K1 + 1)
+        # BM25 length normalization: k1 * (1 - b + b * dl / avgdl) = c1 + c2 * dl
+        c1, c2 = K1 * (1.0 - B), K1 * B / avgdl
+        lengths = self._lengths
+        user_sids = self._by_user.get(user_id, set()) if user_id is not None else None
+
+        scores: Dict[str, float] = {}
+        entered_by_champions: List[Tuple[str, Set[str]]] = []
+        for term in terms:
+            postings = self._postings[term]
+            weight = idf[term] * (K1 + 1)
+            if len(scores) >= limit and heapq.nlargest(limit, scores.values())[-1] >= remaining:
+                # New documents can no longer reach the top k: only finish scoring the candidates
+                sids: Iterable[str] = [sid for sid in scores if sid in postings]
+            elif user_sids is not None:
+                sids = [sid for sid in user_sids if sid in postings] if len(user_sids) < len(postings) else [
+                    sid for sid in postings if sid in user_sids
+                ]
+            elif len(postings) > CHAMPION_MIN_POSTINGS and limit * 4 <= CHAMPIONS:
+                sids = self._champion_sids(term, postings, c1, c2)
+                entered_by_champions.append((term, set(sids)))
+            else:
+                sids = postings
+            for sid in sids:
+                tf = postings.get(sid)
+                if tf:
+                    scores[sid] = scores.get(sid, 0.0) + weight * tf / (tf + c1 + c2 * lengths[sid])
+            remaining -= weight
+
+        # Candidates that are not champions of a common term still get its contribution
+        for term, champions in entered_by_champions:
+            postings = self._postings[term]
+            weight = idf[term] * (K1 + 1)
+            for sid in scores:
+                if sid not in champions:
+                    tf = postings.get(sid)
+                    if tf:
+                        scores[sid] += weight * tf / (tf + c1 + c2 * lengths[sid])
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
@@ -4,14 +4,16 @@ from typing import Optional, List
 from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
 
+from .storage import get_storage, memory_storage
+
 router = APIRouter(prefix="/api/users")
 
-# Simple in-memory store for demo purposes
-_users = {}
+# Simple in-memory store for demo purposes (the in-memory backend's dict; see storage.py)
+_users = memory_storage().users
 
 class UserCreate(BaseModel):
     email: str
-    name: Optional[str]
+    name: Optional[str] = None
 
 class User(BaseModel):
     id: str
@@ -27,13 +29,13 @@ async def create_user(payload: UserCreate = Body(...)):
     user_id = str(uuid.uuid4())
     now = datetime.utcnow()
     user = User(id=user_id, email=payload.email, name=payload.name, created_at=now)
-    _users[user_id] = user
+    get_storage().save_user(user)
     return user
 
 
 @router.get("/{user_id}", response_model=User)
 async def get_user(user_id: str):
-    user = _users.get(user_id)
+    user = get_storage().get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -41,4 +43,4 @@ async def get_user(user_id: str):
 
 @router.get("/", response_model=List[User])
 async def list_users():
-    return list(_users.values())
+    return get_storage().list_users()
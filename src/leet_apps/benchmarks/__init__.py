@@ -0,0 +1 @@
+"""Micro-benchmarks for hot paths. Run a module directly, e.g. python -m src.leet_apps.benchmarks.bench_svg_templates."""
@@ -0,0 +1,73 @@
+"""
+Bytes on the wire and CPU cost per content-coding for our typical payloads.
+
+Payloads: an infographic SVG (references layout, 26 sources), a session export with 200
+messages, and a 100-item source listing. Each available codec is measured at its
+per-response level and at the static level used for pre-compressed infographic variants.
+
+    python -m src.leet_apps.benchmarks.bench_compression [--repeat 50]
+"""
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from src.leet_apps.api import compression, svg_templates
+
+DECOMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {"gzip": gzip.decompress}
+if compression.brotli is not None:
+    DECOMPRESSORS["br"] = compression.brotli.decompress
+if compression.zstandard is not None:
+    DECOMPRESSORS["zstd"] = lambda data: compression.zstandard.ZstdDecompressor().decompress(data)
+
+
+def make_payloads() -> Dict[str, bytes]:
+    base = datetime(2026, 1, 1)
+    sources = [
+        {"title": f"Result {i} about grid storage", "url": f"https://news{i % 9}.test/a/{i}", "snippet": f"Snippet {i} on battery prices and deployment.",
+         "fetched_at": (base + timedelta(seconds=i)).isoformat(), "confidence": 0.8}
+        for i in range(100)
+    ]
+    messages = [
+        {"id": f"m{i:04d}", "session_id": "s1", "role": "user" if i % 2 else "assistant",
+         "content": f"Message {i}: follow-up on storage costs, regional adoption and policy incentives.", "created_at": (base + timedelta(minutes=i)).isoformat()}
+        for i in range(200)
+    ]
+    export = {"session": {"id": "s1", "user_id": "u1", "prompt": "grid storage outlook", "status": "completed", "created_at": base.isoformat()},
+              "messages": messages, "sources": sources[:20], "infographic": None}
+    return {
+        "infographic.svg": svg_templates.render("references_v1", "Grid storage", "grid storage outlook", sources).encode("utf-8"),
+        "export.json": json.dumps(export).encode("utf-8"),
+        "sources.json": json.dumps(sources).encode("utf-8"),
+    }
+
+
+def per_call_us(fn: Callable[[], bytes], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"codecs available: {', '.join(compression.CODECS)}")
+    print(f"{'payload':<18}{'codec':<14}{'bytes':>9}{'ratio':>8}{'compress us':>13}{'decompress us':>15}")
+    for name, data in make_payloads().items():
+        print(f"{name:<18}{'identity':<14}{len(data):>9}{1.0:>8.2f}{0:>13.1f}{0:>15.1f}")
+        for codec in compression.CODECS.values():
+            for static in (False, True):
+                out = codec.compress(data, static=static)
+                label = codec.name + (" static" if static else "")
+                compress_us = per_call_us(lambda: codec.compress(data, static=static), args.repeat)
+                decompress_us = per_call_us(lambda: DECOMPRESSORS[codec.name](out), args.repeat)
+                print(f"{name:<18}{label:<14}{len(out):>9}{len(data) / len(out):>8.2f}{compress_us:>13.1f}{decompress_us:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
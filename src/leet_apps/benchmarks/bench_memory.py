@@ -0,0 +1,149 @@
+"""
+In-memory store footprint: bytes per record before and after compact records.
+
+"models" is the previous representation (pydantic models in dicts, a message list per
+session, a full source dict per session and source); "compact" is what InMemoryStorage keeps
+now (records.py, source_store.py). Field strings are built per record, as they would be when
+decoded from requests, so they count towards both. Sessions carry 4 messages and 8 sources
+each, drawn from a pool of popular URLs. Measured with tracemalloc; secondary indexes (the
+session and full-text indexes) are the same in both and not included.
+
+    python -m src.leet_apps.benchmarks.bench_memory [--sessions 20000]
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from src.leet_apps.api.messages import Message
+from src.leet_apps.api.records import MessageRecord, RecordTable, SessionRecord, UserRecord
+from src.leet_apps.api.sessions import ResearchSession
+from src.leet_apps.api.source_store import SourceStore
+from src.leet_apps.api.storage import MessageStore
+from src.leet_apps.api.users import User
+
+MESSAGES_PER_SESSION = 4
+SOURCES_PER_SESSION = 8
+
+
+def _s(value: str) -> str:
+    """A distinct copy of value, like a freshly decoded request body field."""
+    return value.encode("utf-8").decode("utf-8")
+
+
+def measure(build: Callable[[], object]) -> Tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, kept
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--urls", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = datetime(2026, 1, 1)
+    pool = [
+        (f"Result {i} on battery supply chains", f"https://site{i % 97}.test/articles/{i}", f"Snippet {i}: " + "lorem ipsum " * 12)
+        for i in range(args.urls)
+    ]
+    picks = [[pool[rng.randrange(args.urls)] for _ in range(SOURCES_PER_SESSION)] for _ in range(args.sessions)]
+
+    def users() -> List[User]:
+        return [User(id=_s(f"user-{i}"), email=_s(f"user{i}@example.com"), name=_s(f"User {i}"), created_at=base) for i in range(args.users)]
+
+    def sessions() -> List[ResearchSession]:
+        return [
+            ResearchSession(
+                id=_s(f"session-{i:08d}"), user_id=_s(f"user-{i % args.users}"), prompt=_s(f"battery supply chain outlook {i}"),
+                status=_s("completed"), created_at=base + timedelta(seconds=i), topic=_s("energy"), tags=[_s("batteries"), _s("ev")],
+                updated_at=base + timedelta(seconds=i, milliseconds=5),
+            )
+            for i in range(args.sessions)
+        ]
+
+    def messages() -> List[Message]:
+        return [
+            Message(
+                id=_s(f"message-{i:08d}-{j}"), session_id=_s(f"session-{i:08d}"), role=_s("user" if j % 2 == 0 else "assistant"),
+                content=_s(f"message {j} of session {i}: what changed in cathode prices?"), created_at=base + timedelta(seconds=i, milliseconds=j),
+            )
+            for i in range(args.sessions)
+            for j in range(MESSAGES_PER_SESSION)
+        ]
+
+    def sources(i: int) -> List[dict]:
+        fetched = base + timedelta(seconds=i)
+        return [{"title": _s(t), "url": _s(u), "snippet": _s(sn), "fetched_at": fetched, "confidence": 0.5} for t, u, sn in picks[i]]
+
+    # Previous representation
+    def models_users():
+        return {u.id: u for u in users()}
+
+    def models_sessions():
+        return {s.id: s for s in sessions()}
+
+    def models_messages():
+        by_id: Dict[str, Message] = {}
+        by_session: Dict[str, List[Message]] = {}
+        for m in messages():
+            by_id[m.id] = m
+            by_session.setdefault(m.session_id, []).append(m)
+        return by_id, by_session
+
+    def models_sources():
+        return {f"session-{i:08d}": sources(i) for i in range(args.sessions)}
+
+    # Compact representation
+    def compact_users():
+        table = RecordTable(UserRecord)
+        for u in users():
+            table[u.id] = u
+        return table
+
+    def compact_sessions():
+        table = RecordTable(SessionRecord)
+        for s in sessions():
+            table[s.id] = s
+        return table
+
+    def compact_messages():
+        store = MessageStore()
+        for m in messages():
+            store.append(m)
+        return store
+
+    def compact_sources():
+        store = SourceStore()
+        for i in range(args.sessions):
+            store.set(f"session-{i:08d}", sources(i))
+        return store
+
+    cases = [
+        ("users", args.users, models_users, compact_users),
+        ("sessions", args.sessions, models_sessions, compact_sessions),
+        ("messages", args.sessions * MESSAGES_PER_SESSION, models_messages, compact_messages),
+        ("sources", args.sessions * SOURCES_PER_SESSION, models_sources, compact_sources),
+    ]
+    print(f"{'records':<10}{'count':>10}{'models B/rec':>15}{'compact B/rec':>15}{'saved':>8}")
+    for name, count, before, after in cases:
+        old, kept = measure(before)
+        del kept
+        new, kept = measure(after)
+        del kept
+        print(f"{name:<10}{count:>10}{old / count:>15.0f}{new / count:>15.0f}{1 - new / old:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
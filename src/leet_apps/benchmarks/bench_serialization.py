@@ -0,0 +1,75 @@
+"""
+List-response serialization: the response_model path against cached fragments.
+
+"response_model" reproduces what FastAPI does for List[Model] routes: validate the return
+value against the response type, dump it to JSON-compatible data and encode with json.
+"fragments cold" encodes every record with fastjson (empty cache); "fragments warm" is the
+steady state where every record's bytes are cached and the response is a join.
+
+    python -m src.leet_apps.benchmarks.bench_serialization [--items 1000] [--repeat 20]
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from src.leet_apps.api import fastjson
+from src.leet_apps.api.messages import Message
+from src.leet_apps.api.sessions import ResearchSession
+
+
+def response_model_path(adapter: TypeAdapter, items: list) -> bytes:
+    validated = adapter.validate_python(items, from_attributes=True)
+    return json.dumps(jsonable_encoder(adapter.dump_python(validated, mode="json"))).encode("utf-8")
+
+
+def per_call_ms(fn: Callable[[], bytes], repeat: int, setup: Callable[[], None] = lambda: None) -> float:
+    total = 0.0
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        total += time.perf_counter() - start
+    return total / repeat * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    base = datetime(2026, 1, 1)
+    messages = [
+        Message(id=f"m{i}", session_id="s1", role="user" if i % 2 else "assistant",
+                content=f"Message {i} about storage costs and policy incentives.", created_at=base + timedelta(seconds=i))
+        for i in range(args.items)
+    ]
+    sessions = [
+        ResearchSession(id=f"s{i}", user_id="u1", prompt=f"prompt {i}", status="completed", created_at=base + timedelta(minutes=i),
+                        topic="energy", tags=["grid", "storage"], updated_at=base + timedelta(minutes=i, seconds=1))
+        for i in range(args.items)
+    ]
+    cases = [
+        ("messages", List[Message], messages, fastjson.messages_array),
+        ("sessions", List[ResearchSession], sessions, fastjson.sessions_array),
+    ]
+
+    print(f"{'records':<10}{'items':>7}{'response_model ms':>19}{'fragments cold ms':>19}{'fragments warm ms':>19}")
+    for name, type_, items, encode in cases:
+        adapter = TypeAdapter(type_)
+        baseline = per_call_ms(lambda: response_model_path(adapter, items), args.repeat)
+        cold = per_call_ms(lambda: encode(items), args.repeat, setup=fastjson.clear)
+        encode(items)
+        warm = per_call_ms(lambda: encode(items), args.repeat)
+        assert json.loads(encode(items)) == json.loads(response_model_path(adapter, items))
+        print(f"{name:<10}{len(items):>7}{baseline:>19.2f}{cold:>19.2f}{warm:>19.2f}")
+    print(f"encoder: {'orjson' if fastjson.orjson is not None else 'json'}")
+
+
+if __name__ == "__main__":
+    main()
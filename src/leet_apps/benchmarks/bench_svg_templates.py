@@ -0,0 +1,92 @@
+"""
+Compare the compiled SVG templates with the previous str.format/f-string renderer.
+
+The legacy renderer is reproduced here verbatim so the numbers stay comparable after it was
+removed from infographics.py. It never escaped anything, so a second legacy column adds
+html.escape on every value: that is the cost of making the old approach correct. The
+references layout is included because it is the one whose cost grows with the source list.
+
+    python -m src.leet_apps.benchmarks.bench_svg_templates [--repeat 2000]
+"""
+import argparse
+import time
+from html import escape
+from typing import Any, Callable, Dict, List
+
+from src.leet_apps.api import svg_templates
+
+LEGACY_TEMPLATE = """<?xml version='1.0' encoding='UTF-8'?>
+<svg xmlns='http://www.w3.org/2000/svg' width='800' height='600' viewBox='0 0 800 600'>
+  <style>
+    .title {{ font: bold 24px sans-serif; }}
+    .body {{ font: 14px sans-serif; }}
+    .source {{ font: 12px sans-serif; fill: #555; }}
+  </style>
+  <rect width='100%' height='100%' fill='#ffffff' />
+  <text x='40' y='60' class='title'>Infographic: {title}</text>
+  <text x='40' y='100' class='body'>Prompt: {prompt}</text>
+  <g transform='translate(40,140)'>
+    {bullets}
+  </g>
+  <g transform='translate(40,420)'>
+    <text class='source'>Sources:</text>
+    {sources}
+  </g>
+</svg>
+"""
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def legacy_render(title: str, prompt: str, sources: List[Dict[str, Any]], e: Callable = _identity) -> str:
+    bullets = "\n    ".join(
+        f"<text x='0' y='{i * 24}' class='body'>- {e(s.get('title',''))}: {e(s.get('snippet',''))}</text>" for i, s in enumerate(sources[:6])
+    )
+    urls = "\n    ".join(f"<text x='0' y='{20 + i * 16}' class='source'>{e(s.get('url'))}</text>" for i, s in enumerate(sources[:4]))
+    return LEGACY_TEMPLATE.format(title=e(title), prompt=e(prompt), bullets=bullets, sources=urls)
+
+
+def legacy_references(title: str, prompt: str, sources: List[Dict[str, Any]], e: Callable = _identity) -> str:
+    refs = "\n    ".join(
+        f"<text x='0' y='{i * 16}' class='source'>[{i + 1}] {e(s.get('title',''))} - {e(s.get('url'))}</text>" for i, s in enumerate(sources[:26])
+    )
+    return LEGACY_TEMPLATE.format(title=e(title), prompt=e(prompt), bullets=refs, sources="")
+
+
+def make_sources(n: int) -> List[Dict[str, Any]]:
+    return [
+        {"title": f"Result {i} about battery supply chains", "url": f"https://news{i % 7}.test/articles/{i}?ref=feed&id={i}",
+         "snippet": f"Snippet {i}: prices fell & output rose <year over year> " * 3}
+        for i in range(n)
+    ]
+
+
+def timeit(fn: Callable[[], str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'case':<16}{'sources':>8}{'legacy us':>12}{'legacy+escape us':>18}{'compiled us':>13}")
+    for n in (4, 50, 1000):
+        sources = make_sources(n)
+        for name, legacy in (("simple_v1", legacy_render), ("references_v1", legacy_references)):
+            timings = [
+                timeit(lambda: legacy("Battery outlook", "EV battery supply", sources), args.repeat),
+                timeit(lambda: legacy("Battery outlook", "EV battery supply", sources, escape), args.repeat),
+                timeit(lambda: svg_templates.render(name, "Battery outlook", "EV battery supply", sources), args.repeat),
+            ]
+            print(f"{name:<16}{n:>8}{timings[0]:>12.1f}{timings[1]:>18.1f}{timings[2]:>13.1f}")
+    print("(plain legacy output is not XML-escaped and breaks on '&' or '<' in a source)")
+
+
+if __name__ == "__main__":
+    main()
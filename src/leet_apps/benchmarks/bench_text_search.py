@@ -0,0 +1,74 @@
+"""
+Full-text session search: index build time and BM25 query latency at scale.
+
+Sessions get a prompt, sources and messages drawn from a Zipf-distributed vocabulary, so a
+few terms appear in most documents (the expensive posting lists) and most are rare. Queries
+mix rare, mid-frequency and common terms; "linear scan" is the topic-filter approach (a
+case-insensitive substring test over every session) for comparison.
+
+    python -m src.leet_apps.benchmarks.bench_text_search [--sessions 200000] [--queries 200]
+"""
+import argparse
+import itertools
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from src.leet_apps.api.sessions import ResearchSession
+from src.leet_apps.api.text_index import TextIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = [f"term{i}" for i in range(args.vocabulary)]
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(args.vocabulary)))
+
+    def words(k: int) -> str:
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=k))
+
+    base = datetime(2026, 1, 1)
+    index = TextIndex()
+    prompts = []
+    start = time.perf_counter()
+    for i in range(args.sessions):
+        session = ResearchSession(id=f"s{i}", user_id=f"u{i % 100}", prompt=words(8), status="completed", created_at=base + timedelta(minutes=i))
+        prompts.append(session.prompt)
+        index.set_session(session)
+        index.set_sources(session.id, [{"title": words(6), "snippet": words(20)} for _ in range(3)])
+        for _ in range(4):
+            index.add_message(session.id, words(15))
+    build = time.perf_counter() - start
+    print(f"indexed {args.sessions} sessions in {build:.1f}s ({build / args.sessions * 1e6:.0f} µs/session)")
+
+    cases = {
+        "rare terms": lambda: f"term{rng.randrange(5000, args.vocabulary)} term{rng.randrange(5000, args.vocabulary)}",
+        "mixed": lambda: f"term{rng.randrange(0, 50)} term{rng.randrange(500, 5000)} term{rng.randrange(5000, args.vocabulary)}",
+        "common terms": lambda: f"term{rng.randrange(0, 20)} term{rng.randrange(0, 20)}",
+    }
+    print(f"{'case':<16}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, make_query in cases.items():
+        latencies = []
+        for _ in range(args.queries):
+            query = make_query()
+            t0 = time.perf_counter()
+            index.search(query, limit=20)
+            latencies.append((time.perf_counter() - t0) * 1e3)
+        latencies.sort()
+        print(f"{name:<16}{statistics.median(latencies):>10.3f}{latencies[int(len(latencies) * 0.99) - 1]:>10.3f}")
+
+    needle = vocabulary[args.vocabulary // 2]
+    t0 = time.perf_counter()
+    [p for p in prompts if needle in p.lower()]
+    print(f"{'linear scan':<16}{(time.perf_counter() - t0) * 1e3:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Router-level benchmark suite: seeded stores, latency percentiles, throughput and baseline
+comparison.
+
+Requests go through FastAPI's TestClient against a fresh InMemoryStorage seeded with a
+deterministic volume of users, sessions, messages and sources, so numbers include routing,
+validation and serialization but not the network. Rate limiters are lifted for the run
+and restored afterwards.
+
+    python -m src.leet_apps.benchmarks.suite --sessions 2000 --messages 20 \\
+        --json results.json --baseline baseline.json --threshold 0.25
+
+--json writes machine-readable results; --baseline compares p50/p99 against a previous
+results file and exits with status 1 when any scenario regressed by more than the
+threshold (a fraction: 0.25 = 25% slower). --only restricts the run to scenarios whose
+name starts with one of the given prefixes.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import ratelimit, storage as storage_module
+from src.leet_apps.api.chat import router as chat_router
+from src.leet_apps.api.infographics import router as infographics_router
+from src.leet_apps.api.messages import Message, router as messages_router
+from src.leet_apps.api.search import _cache as search_cache, router as search_router
+from src.leet_apps.api.sessions import ResearchSession, router as sessions_router
+from src.leet_apps.api.users import User, router as users_router
+
+TAGS = ["energy", "ev", "policy", "grid", "solar", "storage", "ai", "health", "finance", "climate"]
+TOPICS = ["batteries", "hydrogen", "wind", "nuclear", "carbon markets", "semiconductors"]
+BASE_TIME = datetime(2026, 1, 1)
+
+
+@dataclass
+class SeedConfig:
+    users: int = 50
+    sessions: int = 2000
+    messages: int = 20  # per session
+    sources: int = 5  # per session
+    seed: int = 1
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    mean_ms: float
+    max_ms: float
+    throughput_rps: float
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an ascending list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def seed(storage: storage_module.Storage, config: SeedConfig) -> Dict[str, Any]:
+    """Fill storage deterministically; returns ids the scenarios query for."""
+    rng = random.Random(config.seed)
+    user_ids = [f"bench-user-{i}" for i in range(config.users)]
+    with storage.batch():
+        for i, uid in enumerate(user_ids):
+            storage.save_user(User(id=uid, email=f"{uid}@example.test", name=f"User {i}", created_at=BASE_TIME))
+        session_ids, owners = [], []
+        for i in range(config.sessions):
+            created = BASE_TIME + timedelta(minutes=i * 7)
+            session = ResearchSession(
+                id=f"bench-session-{i}", user_id=rng.choice(user_ids), prompt=f"research question {i} about {rng.choice(TOPICS)}",
+                status="completed", created_at=created, topic=rng.choice(TOPICS), tags=rng.sample(TAGS, 2), updated_at=created,
+            )
+            storage.save_session(session)
+            session_ids.append(session.id)
+            owners.append(session.user_id)
+            for j in range(config.messages):
+                storage.append_message(Message(
+                    id=f"{session.id}-m{j}", session_id=session.id, role="user" if j % 2 == 0 else "assistant",
+                    content=f"message {j} " + "lorem ipsum " * rng.randint(2, 20), created_at=created + timedelta(seconds=j),
+                ))
+            storage.set_sources(session.id, [
+                {"title": f"Source {k} for {session.id}", "url": f"https://src{k}.test/{session.id}", "snippet": "snippet " * 8,
+                 "fetched_at": created, "confidence": round(rng.random(), 2)}
+                for k in range(config.sources)
+            ])
+    span = timedelta(minutes=7 * max(config.sessions, 1))
+    return {
+        "user_id": user_ids[0],
+        "session_id": session_ids[len(session_ids) // 2] if session_ids else "missing",
+        "session_user_id": owners[len(owners) // 2] if owners else user_ids[0],
+        "start": (BASE_TIME + span * 0.4).isoformat(),
+        "end": (BASE_TIME + span * 0.5).isoformat(),
+        "topic": TOPICS[0],
+        "tags": ",".join(TAGS[:2]),
+    }
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    for router in (chat_router, infographics_router, messages_router, search_router, sessions_router, users_router):
+        app.include_router(router)
+    return app
+
+
+def scenarios(client: TestClient, ids: Dict[str, Any]) -> Dict[str, Callable[[int], Any]]:
+    """name -> request function taking the iteration number."""
+    sid = ids["session_id"]
+    return {
+        "list_sessions.user_id": lambda i: client.get("/api/sessions/", params={"user_id": ids["user_id"]}),
+        "list_sessions.topic": lambda i: client.get("/api/sessions/", params={"topic": ids["topic"], "limit": 50}),
+        "list_sessions.date_range": lambda i: client.get("/api/sessions/", params={"start_date": ids["start"], "end_date": ids["end"]}),
+        "list_sessions.tags": lambda i: client.get("/api/sessions/", params={"tags": ids["tags"]}),
+        "list_sessions.page": lambda i: client.get("/api/sessions/", params={"limit": 50}),
+        "list_messages.all": lambda i: client.get(f"/api/messages/session/{sid}"),
+        "list_messages.page": lambda i: client.get(f"/api/messages/session/{sid}", params={"limit": 10}),
+        "search.hit": lambda i: client.get("/api/search/", params={"query": "cached benchmark query"}),
+        "search.miss": lambda i: client.get("/api/search/", params={"query": f"uncached benchmark query {i}"}),
+        "infographics.generate.new": lambda i: client.post("/api/infographics/generate", json={"prompt": f"bench render {i}"}),
+        "infographics.generate.repeat": lambda i: client.post("/api/infographics/generate", json={"prompt": "bench render repeat"}),
+        "export_session.json": lambda i: client.get(f"/api/sessions/{sid}/export"),
+        "export_session.ndjson": lambda i: client.get(f"/api/sessions/{sid}/export", params={"format": "ndjson"}),
+        "chat.send_and_run": lambda i: client.post("/api/chat/send", json={"user_id": ids["user_id"], "prompt": f"bench chat {i % 20}"}),
+        "chat.follow_up": lambda i: client.post(
+            "/api/chat/send", json={"user_id": ids["session_user_id"], "prompt": f"bench follow-up {i % 20}", "session_id": sid}
+        ),
+    }
+
+
+def measure(name: str, fn: Callable[[int], Any], iterations: int, warmup: int) -> Result:
+    for i in range(warmup):
+        fn(-1 - i)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        response = fn(i)
+        latencies.append((time.perf_counter() - t0) * 1e3)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: HTTP {response.status_code} {response.text[:200]}")
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return Result(
+        name=name, iterations=iterations,
+        p50_ms=round(percentile(latencies, 50), 4), p90_ms=round(percentile(latencies, 90), 4),
+        p99_ms=round(percentile(latencies, 99), 4), mean_ms=round(sum(latencies) / len(latencies), 4),
+        max_ms=round(latencies[-1], 4), throughput_rps=round(iterations / elapsed, 2),
+    )
+
+
+def _unthrottle() -> Dict[ratelimit.TokenBucketLimiter, tuple]:
+    saved = {}
+    for limiter in ratelimit.limiters():
+        saved[limiter] = (limiter.rate, limiter.burst, limiter.idle_seconds)
+        limiter.rate, limiter.burst, limiter.idle_seconds = 1e9, 10**9, 1.0
+        limiter.reset()
+    return saved
+
+
+def run(config: SeedConfig, iterations: int = 200, warmup: int = 10, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    storage = storage_module.InMemoryStorage()
+    previous = storage_module.set_storage(storage)
+    throttles = _unthrottle()
+    try:
+        ids = seed(storage, config)
+        search_cache.clear()
+        with TestClient(build_app()) as client:
+            results = [
+                measure(name, fn, iterations, warmup)
+                for name, fn in scenarios(client, ids).items()
+                if not only or name.startswith(tuple(only))
+            ]
+    finally:
+        storage_module.set_storage(previous)
+        for limiter, (rate, burst, idle) in throttles.items():
+            limiter.rate, limiter.burst, limiter.idle_seconds = rate, burst, idle
+            limiter.reset()
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "warmup": warmup,
+            "seed": asdict(config),
+        },
+        "results": {r.name: asdict(r) for r in results},
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25) -> List[Dict[str, Any]]:
+    """Per-scenario p50/p99 ratios against the baseline; regressed when either exceeds 1 + threshold."""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratios = {m: result[m] / base[m] if base[m] else 1.0 for m in ("p50_ms", "p99_ms")}
+        rows.append({
+            "name": name,
+            "p50_ratio": round(ratios["p50_ms"], 3),
+            "p99_ratio": round(ratios["p99_ms"], 3),
+            "regressed": any(r > 1 + threshold for r in ratios.values()),
+        })
+    return rows
+
+
+def _print_results(report: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]]) -> None:
+    ratios = {row["name"]: row for row in comparison or []}
+    header = f"{'scenario':<30}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'req/s':>10}"
+    print(header + (f"{'p50 x':>8}{'p99 x':>8}" if comparison is not None else ""))
+    for name, r in report["results"].items():
+        line = f"{name:<30}{r['p50_ms']:>9.2f}{r['p90_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['throughput_rps']:>10.1f}"
+        if name in ratios:
+            row = ratios[name]
+            line += f"{row['p50_ratio']:>8.2f}{row['p99_ratio']:>8.2f}" + ("  REGRESSED" if row["regressed"] else "")
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the API routers against seeded in-memory stores.")
+    parser.add_argument("--users", type=int, default=SeedConfig.users)
+    parser.add_argument("--sessions", type=int, default=SeedConfig.sessions)
+    parser.add_argument("--messages", type=int, default=SeedConfig.messages, help="messages per session")
+    parser.add_argument("--sources", type=int, default=SeedConfig.sources, help="sources per session")
+    parser.add_argument("--seed", type=int, default=SeedConfig.seed)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="scenario name prefixes to run")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before a scenario counts as regressed")
+    args = parser.parse_args(argv)
+
+    config = SeedConfig(users=args.users, sessions=args.sessions, messages=args.messages, sources=args.sources, seed=args.seed)
+    report = run(config, iterations=args.iterations, warmup=args.warmup, only=args.only)
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare(report, json.load(f), args.threshold)
+        report["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "scenarios": comparison}
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    _print_results(report, comparison)
+    return 1 if comparison and any(row["regressed"] for row in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import search
+from src.leet_apps.api.chat import router as chat_router
+from src.leet_apps.api.providers import FakeProvider
+from src.leet_apps.api.ratelimit import RESEARCH_RATE_LIMIT_BURST, research_limiter
+from src.leet_apps.api.sessions import router as sessions_router
+
+app = FastAPI()
+app.include_router(chat_router)
+app.include_router(sessions_router)
+
+client = TestClient(app)
+
+
+def test_send_and_run_returns_session_messages_and_sources():
+    res = client.post("/api/chat/send", json={"user_id": "u-chat", "prompt": "battery recycling"})
+    assert res.status_code == 200
+    data = res.json()
+    session_id = data["session"]["id"]
+    assert data["session"]["status"] == "completed"
+    assert [m["content"] for m in data["messages"]] == ["battery recycling"]
+    assert len(data["sources"]) >= 1
+
+    export = client.get(f"/api/sessions/{session_id}/export").json()
+    assert [m["id"] for m in export["messages"]] == [m["id"] for m in data["messages"]]
+
+    listed = client.get("/api/sessions/?user_id=u-chat").json()
+    assert [s["id"] for s in listed] == [session_id]
+
+
+def test_send_requires_prompt():
+    res = client.post("/api/chat/send", json={"user_id": "u-chat", "prompt": "   "})
+    assert res.status_code == 400
+
+
+def test_follow_up_fetches_only_new_sources_and_rerenders_when_drawn_content_changes():
+    research_limiter.reset()
+    provider = FakeProvider("followup", shared_urls=["https://shared.test/report"])
+    previous = search.set_providers([provider])
+    try:
+        first = client.post("/api/chat/send", json={"user_id": "u-follow", "prompt": "heat pump adoption"}).json()
+        session_id = first["session"]["id"]
+        assert len(first["sources"]) == 4
+
+        def follow_up(prompt):
+            res = client.post("/api/chat/send", json={"user_id": "u-follow", "prompt": prompt, "session_id": session_id})
+            assert res.status_code == 200
+            return res.json()
+
+        second = follow_up("costs in Germany")
+        # the shared report is already in the session; three new sources fill rows the layout draws
+        assert len(second["new_sources"]) == 3
+        assert "https://shared.test/report" not in [s["url"] for s in second["new_sources"]]
+        assert second["sources"][:4] == first["sources"]
+        assert second["infographic_rerendered"] and second["infographic"]["id"] != first["infographic"]["id"]
+        assert second["session"]["id"] == session_id
+        assert [m["content"] for m in second["messages"]] == ["heat pump adoption", "costs in Germany"]
+
+        # new sources past the ones the layout draws leave the infographic as it is
+        third = follow_up("installer shortages")
+        assert len(third["new_sources"]) == 3 and len(third["sources"]) == 10
+        assert not third["infographic_rerendered"] and third["infographic"]["id"] == second["infographic"]["id"]
+        assert third["infographic"]["layout_meta"]["source_count"] == 10
+        assert client.get(f"/api/sessions/{session_id}/infographic").json()["layout_meta"]["source_count"] == 10
+
+        # repeating a follow-up is served by the search cache and changes nothing
+        calls = provider.stats["calls"]
+        repeat = follow_up("installer shortages")
+        assert provider.stats["calls"] == calls
+        assert repeat["new_sources"] == [] and not repeat["infographic_rerendered"]
+        assert len(client.get(f"/api/sessions/{session_id}/sources").json()) == 10
+    finally:
+        search.set_providers(previous)
+
+
+def test_follow_up_requires_own_session():
+    res = client.post("/api/chat/send", json={"user_id": "u-chat", "prompt": "more", "session_id": "missing"})
+    assert res.status_code == 404
+
+
+def test_follow_up_needs_a_completed_session():
+    research_limiter.reset()
+    pending = client.post("/api/sessions/", json={"user_id": "u-follow", "prompt": "grid storage"}).json()
+    res = client.post("/api/chat/send", json={"user_id": "u-follow", "prompt": "more", "session_id": pending["id"]})
+    assert res.status_code == 409
+    # the follow-up prompt is not recorded
+    assert client.get(f"/api/sessions/{pending['id']}/export").json()["messages"] == []
+
+
+def test_failed_follow_up_keeps_the_session_completed():
+    from src.leet_apps.api import events
+
+    research_limiter.reset()
+    first = client.post("/api/chat/send", json={"user_id": "u-follow", "prompt": "tidal power"}).json()
+    session_id = first["session"]["id"]
+    previous = search.set_providers([FakeProvider("broken", failure_rate=1.0)])
+    try:
+        res = client.post("/api/chat/send", json={"user_id": "u-follow", "prompt": "costs", "session_id": session_id})
+        assert res.status_code == 503
+        # a first run without providers answers the same way
+        assert client.post("/api/chat/send", json={"user_id": "u-follow", "prompt": "wave power"}).status_code == 503
+    finally:
+        search.set_providers(previous)
+    session = client.get(f"/api/sessions/{session_id}").json()
+    assert session["status"] == "completed"
+    assert client.get(f"/api/sessions/{session_id}/sources").json() == first["sources"]
+    # the failed follow-up left no message behind, and its event matches the stored status
+    assert [m["content"] for m in client.get(f"/api/sessions/{session_id}/export").json()["messages"]] == ["tidal power"]
+    assert events.bus.history(session_id)[-1].type == "followup.failed"
+
+
+def test_research_limit_ignores_rotating_user_id_header():
+    research_limiter.reset()
+    codes = [
+        client.post("/api/chat/send", json={"user_id": f"u-{i}", "prompt": " "}, headers={"X-User-Id": f"u-{i}"}).status_code
+        for i in range(RESEARCH_RATE_LIMIT_BURST + 1)
+    ]
+    assert codes[:-1] == [400] * RESEARCH_RATE_LIMIT_BURST
+    assert codes[-1] == 429
+    research_limiter.reset()
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
+from src.leet_apps.api import raster
 from src.leet_apps.api.infographics import router as infographics_router
 
 app = FastAPI()
@@ -32,3 +33,57 @@ def test_fetch_png_placeholder():
     res2 = client.get(f"/api/infographics/{inf_id}/image?format=png")
     assert res2.status_code == 200
     assert res2.headers["content-type"] == "image/png"
+
+
+def test_identical_inputs_share_one_blob():
+    from src.leet_apps.api.infographics import _images, _infographics
+
+    payload = {"prompt": "Shared render", "sources": [{"title": "t", "url": "https://t", "snippet": "x"}]}
+    first = client.post("/api/infographics/generate", json={**payload, "session_id": "a"}).json()
+    blobs_before = len(_images)
+    second = client.post("/api/infographics/generate", json={**payload, "session_id": "b"}).json()
+
+    assert first["id"] != second["id"]
+    assert len(_images) == blobs_before
+    assert _infographics[first["id"]]["blob"] == _infographics[second["id"]]["blob"]
+    assert "svg" not in _infographics[first["id"]]
+
+    other = client.post("/api/infographics/generate", json={**payload, "prompt": "Different render"}).json()
+    assert _infographics[other["id"]]["blob"] != _infographics[first["id"]]["blob"]
+    assert client.get(f"/api/infographics/{other['id']}/image").text != client.get(f"/api/infographics/{first['id']}/image").text
+
+
+def test_unknown_infographic_is_404():
+    assert client.get("/api/infographics/missing/image").status_code == 404
+
+
+def test_stats_template_and_unknown_template():
+    payload = {"title": "Sales", "stats": [{"label": "Q1", "value": 10}, {"label": "Q2", "value": 20}], "template": "stats_v1"}
+    res = client.post("/api/infographics/generate", json=payload)
+    assert res.status_code == 200
+    assert res.json()["layout_meta"]["template"] == "stats_v1"
+    assert "Q2" in client.get(f"/api/infographics/{res.json()['id']}/image").text
+
+    res = client.post("/api/infographics/generate", json={"title": "x", "template": "nope_v9"})
+    assert res.status_code == 400
+
+
+def test_png_is_rasterized_at_requested_size():
+    res = client.post("/api/infographics/generate", json={"prompt": "Raster me", "sources": []})
+    inf_id = res.json()["id"]
+
+    png = client.get(f"/api/infographics/{inf_id}/image?format=png&width=400")
+    assert png.status_code == 200
+    assert png.content[:8] == b"\x89PNG\r\n\x1a\n"
+    assert png.content[16:24] == (400).to_bytes(4, "big") + (300).to_bytes(4, "big")
+    assert png.headers["x-raster-backend"] == raster.BACKEND
+
+    assert client.get(f"/api/infographics/{inf_id}/image?format=png&width=100000").status_code == 422
+    assert client.get(f"/api/infographics/{inf_id}/image?format=png&dpi=1000").status_code == 400
+
+
+def test_list_valued_source_fields_are_escaped_in_served_svg():
+    payload = {"prompt": "escape check", "sources": [{"title": ["<script>alert(1)</script>"], "url": {"x": "<y>"}, "snippet": "s"}]}
+    inf_id = client.post("/api/infographics/generate", json=payload).json()["id"]
+    svg = client.get(f"/api/infographics/{inf_id}/image?format=svg", headers={"Accept-Encoding": "identity"}).text
+    assert "<script>" not in svg and "&lt;script&gt;" in svg
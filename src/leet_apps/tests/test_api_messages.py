@@ -31,3 +31,33 @@ def test_list_messages_for_session():
     data = res.json()
     assert isinstance(data, list)
     assert len(data) == 2
+
+
+def test_list_messages_for_session_paginated():
+    ids = [client.post("/api/messages/", json={"session_id": "s3", "role": "user", "content": f"m{i}"}).json()["id"] for i in range(3)]
+
+    page = client.get("/api/messages/session/s3?limit=2").json()
+    assert [m["id"] for m in page["items"]] == ids[:2]
+    assert page["next_cursor"]
+
+    page2 = client.get("/api/messages/session/s3", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [m["id"] for m in page2["items"]] == ids[2:]
+    assert page2["next_cursor"] is None
+
+
+def test_message_store_keeps_session_order():
+    from datetime import datetime, timedelta
+    from src.leet_apps.api.messages import Message
+    from src.leet_apps.api.storage import MessageStore
+
+    store = MessageStore()
+    t0 = datetime(2026, 1, 1)
+    late = Message(id="m2", session_id="s", role="assistant", content="b", created_at=t0 + timedelta(seconds=1))
+    early = Message(id="m1", session_id="s", role="user", content="a", created_at=t0)
+    other = Message(id="m3", session_id="other", role="user", content="c", created_at=t0)
+    for m in (late, early, other):
+        store.append(m)
+
+    assert [m.id for m in store.for_session("s")] == ["m1", "m2"]
+    assert store.for_session("missing") == []
+    assert store.get("m3") == other
@@ -25,3 +25,73 @@ def test_search_returns_results_and_caches():
     res2 = client.get("/api/search/?query=ev trends")
     assert res2.status_code == 200
     assert res2.json() == data
+
+
+def test_concurrent_misses_share_one_fetch(monkeypatch):
+    import asyncio
+    from src.leet_apps.api import search as search_module
+
+    calls = []
+
+    async def slow_fetch(q, on_source=None):
+        calls.append(q)
+        await asyncio.sleep(0.01)
+        return [{"title": q, "url": "https://example.com", "snippet": "", "fetched_at": None, "confidence": 1.0}]
+
+    monkeypatch.setattr(search_module, "_fetch_uncached", slow_fetch)
+    before = dict(search_module._stats)
+
+    async def run():
+        return await asyncio.gather(*(search_module.fetch_sources("single flight") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == ["single flight"]
+    assert all(r is results[0] for r in results)
+    assert search_module._stats["coalesced"] - before["coalesced"] == 4
+    assert search_module._inflight == {}
+
+    # Subsequent call is a plain cache hit, also for a differently spaced/cased query
+    hits = search_module._cache.stats()["hits"]
+    asyncio.run(search_module.fetch_sources("  Single   FLIGHT "))
+    assert calls == ["single flight"]
+    assert search_module._cache.stats()["hits"] - hits == 1
+
+
+def test_fetch_errors_are_shared_and_negatively_cached(monkeypatch):
+    import asyncio
+    import pytest
+    from src.leet_apps.api import search as search_module
+
+    calls = []
+
+    async def failing_fetch(q, on_source=None):
+        calls.append(q)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(search_module, "_fetch_uncached", failing_fetch)
+
+    async def run():
+        return await asyncio.gather(*(search_module.fetch_sources("broken query") for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert len(calls) == 1
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(search_module.fetch_sources("broken query"))
+    assert len(calls) == 1
+    search_module._cache.pop("broken query", None)
+
+
+def test_cache_stats_endpoint_reports_counters():
+    client.post("/api/search/cache/clear")
+    client.get("/api/search/?query=stats probe")
+    client.get("/api/search/?query=Stats  Probe")
+    res = client.get("/api/search/cache/stats")
+    assert res.status_code == 200
+    stats = res.json()
+    assert stats["entries"] == 1
+    assert stats["hits"] >= 1
+    for key in ("misses", "evictions", "expirations", "bytes", "coalesced", "hit_ratio"):
+        assert key in stats
@@ -33,3 +33,52 @@ def test_list_sessions_filter():
     data = res.json()
     assert isinstance(data, list)
     assert all(s["user_id"] == "userA" for s in data)
+
+
+def test_list_sessions_filter_by_tags_and_dates():
+    res = client.post("/api/sessions/", json={"user_id": "userT", "prompt": "p1", "tags": ["EV", "Market"]})
+    tagged = res.json()
+    client.post("/api/sessions/", json={"user_id": "userT", "prompt": "p2", "tags": ["ev"]})
+
+    res = client.get("/api/sessions/?user_id=userT&tags=ev,market")
+    assert res.status_code == 200
+    assert [s["id"] for s in res.json()] == [tagged["id"]]
+
+    # Aware ISO timestamps (as sent by the history UI) compare against stored naive UTC values
+    res = client.get("/api/sessions/", params={"user_id": "userT", "start_date": "2000-01-01T00:00:00Z"})
+    assert len(res.json()) == 2
+    res = client.get("/api/sessions/", params={"user_id": "userT", "end_date": "2000-01-01T00:00:00Z"})
+    assert res.json() == []
+
+
+def test_update_session_tags_reindexes():
+    res = client.post("/api/sessions/", json={"user_id": "userU", "prompt": "p", "tags": ["old"]})
+    session_id = res.json()["id"]
+
+    res = client.put(f"/api/sessions/{session_id}", json={"tags": ["new"]})
+    assert res.status_code == 200
+    assert res.json()["tags"] == ["new"]
+
+    assert client.get("/api/sessions/?user_id=userU&tags=old").json() == []
+    assert [s["id"] for s in client.get("/api/sessions/?user_id=userU&tags=new").json()] == [session_id]
+
+
+def test_list_sessions_cursor_pagination():
+    created = [client.post("/api/sessions/", json={"user_id": "userP", "prompt": f"p{i}"}).json()["id"] for i in range(5)]
+
+    res = client.get("/api/sessions/?user_id=userP&limit=2")
+    assert res.status_code == 200
+    page = res.json()
+    assert [s["id"] for s in page["items"]] == created[:2]
+    assert page["next_cursor"]
+
+    seen = [s["id"] for s in page["items"]]
+    while page["next_cursor"]:
+        page = client.get("/api/sessions/", params={"user_id": "userP", "limit": 2, "cursor": page["next_cursor"]}).json()
+        seen.extend(s["id"] for s in page["items"])
+    assert seen == created
+
+
+def test_list_sessions_invalid_cursor_returns_400():
+    res = client.get("/api/sessions/?cursor=not-a-cursor")
+    assert res.status_code == 400
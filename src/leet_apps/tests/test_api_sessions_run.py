@@ -1,7 +1,11 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from src.leet_apps.api.sessions import router as sessions_router
+from src.leet_apps.api import search
+from src.leet_apps.api.providers import FakeProvider
+from src.leet_apps.api.sessions import ResearchSessionUpdate, execute_research_session, update_session, router as sessions_router
 from src.leet_apps.api.search import router as search_router
 
 app = FastAPI()
@@ -62,3 +66,99 @@ def test_sources_for_unknown_session_returns_404():
 def test_infographic_for_unknown_session_returns_404():
     res = client.get("/api/sessions/nonexistent/infographic")
     assert res.status_code == 404
+
+
+def test_run_session_in_background_reports_job_progress():
+    import time
+    from src.leet_apps.api.jobs import router as jobs_router
+
+    bg_app = FastAPI()
+    bg_app.include_router(sessions_router)
+    bg_app.include_router(jobs_router)
+
+    with TestClient(bg_app) as bg_client:
+        session_id = bg_client.post("/api/sessions/", json={"user_id": "u-bg", "prompt": "solar storage"}).json()["id"]
+
+        res = bg_client.post(f"/api/sessions/{session_id}/run?background=true")
+        assert res.status_code == 202
+        data = res.json()
+        assert data["session"]["status"] in ("pending", "running", "completed")
+        job_id = data["job"]["id"]
+
+        job = None
+        for _ in range(100):
+            job = bg_client.get(f"/api/jobs/{job_id}").json()
+            if job["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.01)
+        assert job["status"] == "completed"
+        assert job["session_id"] == session_id
+        assert bg_client.get(f"/api/sessions/{session_id}").json()["status"] == "completed"
+        assert len(bg_client.get(f"/api/sessions/{session_id}/sources").json()) >= 1
+
+        assert bg_client.get("/api/jobs/unknown").status_code == 404
+
+
+def test_full_job_queue_leaves_session_and_chat_untouched(monkeypatch):
+    from fastapi import HTTPException
+    from src.leet_apps.api import jobs as jobs_module
+    from src.leet_apps.api.chat import router as chat_router
+    from src.leet_apps.api.ratelimit import research_limiter
+    from src.leet_apps.api.storage import get_storage
+
+    session_id = client.post("/api/sessions/", json={"user_id": "u-full", "prompt": "wind farms"}).json()["id"]
+    client.post(f"/api/sessions/{session_id}/run")
+    assert client.get(f"/api/sessions/{session_id}").json()["status"] == "completed"
+
+    def full(*args, **kwargs):
+        raise HTTPException(status_code=503, detail="Job queue is full, retry later")
+
+    monkeypatch.setattr(jobs_module, "submit", full)
+    research_limiter.reset()
+    assert client.post(f"/api/sessions/{session_id}/run?background=true").status_code == 503
+    assert client.get(f"/api/sessions/{session_id}").json()["status"] == "completed"
+
+    chat_app = FastAPI()
+    chat_app.include_router(chat_router)
+    chat_client = TestClient(chat_app)
+    sessions_before = len(client.get("/api/sessions/?user_id=u-full").json())
+    res = chat_client.post("/api/chat/send?background=true", json={"user_id": "u-full", "prompt": "offshore costs"})
+    assert res.status_code == 503
+    res = chat_client.post("/api/chat/send?background=true", json={"user_id": "u-full", "prompt": "more", "session_id": session_id})
+    assert res.status_code == 503
+    assert len(client.get("/api/sessions/?user_id=u-full").json()) == sessions_before
+    assert get_storage().list_messages(session_id) == []
+
+
+def test_export_infographic_serves_rendered_svg_and_png():
+    session_id = client.post("/api/sessions/", json={"user_id": "u-export", "prompt": "solar storage"}).json()["id"]
+    client.post(f"/api/sessions/{session_id}/run")
+
+    svg = client.get(f"/api/sessions/{session_id}/export/infographic?format=svg")
+    assert svg.status_code == 200
+    assert "solar storage" in svg.text
+
+    png = client.get(f"/api/sessions/{session_id}/export/infographic?format=png&width=200")
+    assert png.status_code == 200
+    assert png.headers["content-type"] == "image/png"
+    assert png.content[16:24] == (200).to_bytes(4, "big") + (150).to_bytes(4, "big")
+    assert png.headers["x-raster-backend"] in ("cairosvg", "builtin")
+
+
+def test_edits_made_while_a_run_is_in_flight_are_kept():
+    session_id = client.post("/api/sessions/", json={"user_id": "u-run", "prompt": "edited mid run"}).json()["id"]
+
+    async def scenario():
+        run = asyncio.ensure_future(execute_research_session(session_id))
+        await asyncio.sleep(0.02)
+        await update_session(session_id, ResearchSessionUpdate(topic="mine", tags=["keep-me"]))
+        return await run
+
+    previous = search.set_providers([FakeProvider("slow-edit", latency=0.1)])
+    try:
+        result = asyncio.run(scenario())
+    finally:
+        search.set_providers(previous)
+    stored = client.get(f"/api/sessions/{session_id}").json()
+    assert (stored["status"], stored["tags"], stored["topic"]) == ("completed", ["keep-me"], "mine")
+    assert result["session"].tags == ["keep-me"]
@@ -0,0 +1,56 @@
+import json
+
+from src.leet_apps.api import ratelimit, storage as storage_module
+from src.leet_apps.benchmarks import suite
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert suite.percentile(values, 0) == 1.0
+    assert suite.percentile(values, 50) == 2.5
+    assert suite.percentile(values, 100) == 4.0
+    assert suite.percentile([], 99) == 0.0
+
+
+def test_seeding_is_deterministic():
+    config = suite.SeedConfig(users=3, sessions=10, messages=4, sources=2, seed=7)
+    a, b = storage_module.InMemoryStorage(), storage_module.InMemoryStorage()
+    ids = suite.seed(a, config)
+    assert ids == suite.seed(b, config)
+    assert [s.dict() for s in a.query_sessions(limit=100)] == [s.dict() for s in b.query_sessions(limit=100)]
+    assert len(a.list_messages(ids["session_id"])) == 4
+    assert len(a.get_sources(ids["session_id"])) == 2
+
+
+def test_small_run_covers_every_scenario_and_restores_state(tmp_path):
+    previous = storage_module.get_storage()
+    rates = [(l.rate, l.burst) for l in ratelimit.limiters()]
+    report = suite.run(suite.SeedConfig(users=2, sessions=6, messages=3, sources=2), iterations=2, warmup=0)
+
+    assert storage_module.get_storage() is previous
+    assert [(l.rate, l.burst) for l in ratelimit.limiters()] == rates
+    assert set(report["results"]) == set(suite.scenarios(None, {"session_id": "x"}))
+    for result in report["results"].values():
+        assert result["iterations"] == 2
+        assert 0 < result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
+    json.dumps(report)
+
+
+def test_compare_flags_regressions_beyond_threshold(tmp_path):
+    def report(p50, p99):
+        return {"results": {"list_sessions.page": {"p50_ms": p50, "p99_ms": p99}}}
+
+    rows = suite.compare(report(1.1, 2.0), report(1.0, 2.0), threshold=0.25)
+    assert rows == [{"name": "list_sessions.page", "p50_ratio": 1.1, "p99_ratio": 1.0, "regressed": False}]
+    assert suite.compare(report(1.0, 3.0), report(1.0, 2.0), threshold=0.25)[0]["regressed"]
+    assert suite.compare(report(1.0, 1.0), {"results": {}}) == []
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": {"list_sessions.page": {"p50_ms": 1e-6, "p99_ms": 1e-6}}}))
+    out = tmp_path / "results.json"
+    argv = ["--users", "1", "--sessions", "3", "--messages", "1", "--sources", "1", "--iterations", "2", "--warmup", "0",
+            "--only", "list_sessions.page", "--json", str(out), "--baseline", str(baseline)]
+    assert suite.main(argv) == 1
+    written = json.loads(out.read_text())
+    assert list(written["results"]) == ["list_sessions.page"]
+    assert written["comparison"]["scenarios"][0]["regressed"]
@@ -0,0 +1,83 @@
+from src.leet_apps.api.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_by_entry_count():
+    cache = TTLCache(max_entries=2, ttl_seconds=100, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a becomes most recently used
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_by_byte_budget():
+    cache = TTLCache(max_entries=100, max_bytes=10, size_of=len, clock=FakeClock())
+    cache.set("a", "xxxx")
+    cache.set("b", "yyyy")
+    cache.set("c", "zzzz")
+    assert len(cache) == 2 and "a" not in cache
+    assert cache.bytes == 8
+
+
+def test_ttl_expiry_and_sweep():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=10, sweep_interval=5, clock=clock)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2)
+    clock.now = 2
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+    cache.set("other", 3, ttl=1)
+    clock.now = 4
+    assert cache.sweep() == 1
+    assert len(cache) == 1
+
+    # Writes trigger a sweep once sweep_interval has elapsed
+    clock.now = 20
+    cache.set("fresh", 4)
+    assert len(cache) == 1
+    stats = cache.stats()
+    assert stats["expirations"] == 3
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_sweeper_task_runs_from_startup_until_shutdown():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.leet_apps.api import search
+
+    app = FastAPI()
+    app.include_router(search.router)
+    with TestClient(app):
+        task = search._cache._sweeper_task
+        assert task is not None and not task.done()
+    assert task.cancelled()
+    assert search._cache._sweeper_task is None
+
+
+def test_sweeper_removes_expired_entries_without_writes():
+    import asyncio
+
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=10, sweep_interval=0.01, clock=clock)
+    cache.set("a", 1)
+    clock.now = 11
+
+    async def run():
+        cache.start_sweeper()
+        await asyncio.sleep(0.05)
+        await cache.stop_sweeper()
+
+    asyncio.run(run())
+    assert len(cache) == 0 and cache.stats()["expirations"] == 1
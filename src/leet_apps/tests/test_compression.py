@@ -0,0 +1,101 @@
+import gzip
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import compression
+from src.leet_apps.api.infographics import _images, _infographics, router as infographics_router
+
+app = FastAPI()
+app.include_router(infographics_router)
+
+
+@app.get("/big")
+async def big():
+    return [{"id": i, "text": "highly compressible " * 4} for i in range(100)]
+
+
+@app.get("/small")
+async def small():
+    return {"ok": True}
+
+
+@app.get("/binary")
+async def binary():
+    return Response(b"\x00" * 4096, media_type="application/octet-stream")
+
+
+@app.get("/stream")
+async def stream():
+    def lines():
+        for i in range(50):
+            yield json.dumps({"i": i, "pad": "x" * 50}) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+compression.install_compression(app)
+client = TestClient(app)
+
+
+def test_negotiate_prefers_server_order_and_honours_q_values():
+    assert compression.negotiate(None) is None
+    assert compression.negotiate("gzip") == "gzip"
+    assert compression.negotiate("gzip;q=0") is None
+    assert compression.negotiate("identity") is None
+    assert compression.negotiate("*", available=["br", "gzip"]) == "br"
+    assert compression.negotiate("gzip, br;q=0.5", available=["br", "gzip"]) == "gzip"
+    assert compression.negotiate("gzip, br, zstd", available=["br", "zstd", "gzip"]) == "br"
+
+
+def test_large_json_is_compressed_small_and_binary_are_not():
+    res = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["vary"] == "Accept-Encoding"
+    assert int(res.headers["content-length"]) < len(json.dumps(res.json()))
+    assert len(res.json()) == 100
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/binary", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_streaming_responses_are_compressed_incrementally():
+    res = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert "content-length" not in res.headers
+    assert [json.loads(line)["i"] for line in res.text.splitlines()] == list(range(50))
+
+
+def test_infographic_svg_variants_are_precomputed_and_served():
+    inf_id = client.post("/api/infographics/generate", json={"prompt": "Compress me"}).json()["id"]
+    blob_key = _infographics[inf_id]["blob"]
+    assert compression.variant_key(blob_key, "gzip") in _images  # stored at generation time
+
+    with client.stream("GET", f"/api/infographics/{inf_id}/image", headers={"Accept-Encoding": "gzip"}) as res:
+        raw = b"".join(res.iter_raw())
+        assert res.headers["content-encoding"] == "gzip"
+        etag = res.headers["etag"]
+    assert gzip.decompress(raw).startswith(b"<?xml")
+
+    plain = client.get(f"/api/infographics/{inf_id}/image", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != etag
+    assert plain.content == gzip.decompress(raw)
+
+
+@app.get("/tagged")
+async def tagged():
+    return Response(json.dumps(["compressible " * 20] * 20), media_type="application/json", headers={"ETag": '"v1"'})
+
+
+def test_vary_on_every_compressible_response_and_compressed_etags_are_weak():
+    assert client.get("/big", headers={"Accept-Encoding": "identity"}).headers["vary"] == "Accept-Encoding"
+    assert client.get("/small", headers={"Accept-Encoding": "gzip"}).headers["vary"] == "Accept-Encoding"
+    assert "vary" not in client.get("/binary", headers={"Accept-Encoding": "gzip"}).headers
+
+    plain = client.get("/tagged", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+    assert plain.headers["etag"] == '"v1"'
+    assert compressed.headers["content-encoding"] == "gzip" and compressed.headers["etag"] == 'W/"v1"'
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api.events import EventBus
+from src.leet_apps.api.sessions import router as sessions_router
+
+app = FastAPI()
+app.include_router(sessions_router)
+
+client = TestClient(app)
+
+
+def _parse(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_events_stream_replays_pipeline_progress():
+    session_id = client.post("/api/sessions/", json={"user_id": "u-sse", "prompt": "grid batteries"}).json()["id"]
+    client.post(f"/api/sessions/{session_id}/run")
+
+    res = client.get(f"/api/sessions/{session_id}/events")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = _parse(res.text)
+    types = [e[1] for e in events]
+    assert types[:2] == ["session.running", "search.started"]
+    assert types.count("source") >= 1
+    assert types[-2:] == ["infographic.rendered", "session.completed"]
+    assert events[-1][2]["session"]["status"] == "completed"
+
+    # Resume after a given event id
+    resumed = _parse(client.get(f"/api/sessions/{session_id}/events", headers={"Last-Event-ID": str(events[-2][0])}).text)
+    assert [e[1] for e in resumed] == ["session.completed"]
+
+
+def test_events_for_unknown_session_returns_404():
+    assert client.get("/api/sessions/nonexistent/events").status_code == 404
+
+
+def test_slow_subscriber_is_disconnected_with_overflow():
+    bus = EventBus(subscriber_queue_max=2)
+
+    async def run():
+        stream = bus.stream("s", keepalive=1)
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)  # subscriber registered, waiting for live events
+        for i in range(5):
+            bus.publish("s", "source", {"index": i})
+        frames = [await first]
+        async for frame in stream:
+            frames.append(frame)
+        return frames
+
+    frames = asyncio.run(run())
+    events = _parse(b"".join(frames).decode())
+    assert [e[1] for e in events] == ["source", "source", "overflow"]
+    assert events[-1][2] == {"resume_from": 2}
+    assert bus.subscriber_count("s") == 0
+
+
+def test_history_starts_over_when_a_run_starts():
+    bus = EventBus()
+    for type in ("session.queued", "session.running", "session.completed", "session.queued", "session.running"):
+        bus.publish("s", type)
+    assert [(e.id, e.type) for e in bus.history("s")] == [(4, "session.queued"), (5, "session.running")]
+
+
+def test_subscriber_during_a_rerun_sees_the_live_run():
+    from src.leet_apps.api import search
+    from src.leet_apps.api.providers import FakeProvider
+    from src.leet_apps.api.sessions import execute_research_session
+    from src.leet_apps.api import events as events_module
+
+    session_id = client.post("/api/sessions/", json={"user_id": "u-sse", "prompt": "tidal lagoons"}).json()["id"]
+    previous = search.set_providers([FakeProvider("slow-sse", latency=0.05)])
+
+    async def run():
+        await execute_research_session(session_id)
+        first_run_last_id = events_module.bus.history(session_id)[-1].id
+        rerun = asyncio.ensure_future(execute_research_session(session_id))
+        await asyncio.sleep(0.01)  # second run under way
+        frames = [frame async for frame in events_module.bus.stream(session_id, keepalive=1)]
+        await rerun
+        return first_run_last_id, frames
+
+    try:
+        first_run_last_id, frames = asyncio.run(run())
+    finally:
+        search.set_providers(previous)
+    events = _parse(b"".join(frames).decode())
+    assert events[0][0] > first_run_last_id
+    types = [e[1] for e in events]
+    assert types[0] == "session.running"
+    assert types.count("session.completed") == 1 and types[-1] == "session.completed"
+    assert "source" in types
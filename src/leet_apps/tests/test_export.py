@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import export as export_module
+from src.leet_apps.api.messages import Message, router as messages_router
+from src.leet_apps.api.sessions import ResearchSession, router as sessions_router
+from src.leet_apps.api.storage import InMemoryStorage
+
+app = FastAPI()
+app.include_router(messages_router)
+app.include_router(sessions_router)
+
+client = TestClient(app)
+
+BASE = datetime(2026, 2, 1)
+
+
+def _populated_storage(sessions=3, messages=5):
+    storage = InMemoryStorage()
+    for i in range(sessions):
+        session = ResearchSession(id=f"s{i}", user_id="bulk", prompt=f"p{i}", status="completed", created_at=BASE + timedelta(days=i))
+        storage.save_session(session)
+        for j in range(messages):
+            storage.append_message(Message(id=f"m{i}-{j}", session_id=session.id, role="user", content=f"c{j}", created_at=BASE + timedelta(days=i, minutes=j)))
+        storage.set_sources(session.id, [{"title": "t", "url": f"https://s/{i}", "snippet": "x"}])
+    storage.save_session(ResearchSession(id="other", user_id="someone-else", prompt="p", status="pending", created_at=BASE))
+    return storage
+
+
+def test_message_pages_cover_every_message_once():
+    storage = _populated_storage(sessions=1, messages=7)
+    ids = [m.id for m in export_module.iter_messages(storage, "s0", page_size=3)]
+    assert ids == [f"m0-{j}" for j in range(7)]
+
+
+def test_bulk_ndjson_streams_each_users_sessions_in_order():
+    storage = _populated_storage()
+    lines = [json.loads(line) for line in b"".join(export_module.export_user(storage, "bulk", "ndjson", page_size=2)).splitlines()]
+    assert [r["session_id"] for r in lines if r["type"] == "session"] == ["s0", "s1", "s2"]
+    assert sum(r["type"] == "message" for r in lines) == 15
+    assert all(r["session_id"] != "other" for r in lines)
+
+
+def test_bulk_json_stream_is_one_document():
+    storage = _populated_storage()
+    doc = json.loads(b"".join(export_module.export_user(storage, "bulk", "json-stream", page_size=2)))
+    assert doc["user_id"] == "bulk"
+    assert [s["session"]["id"] for s in doc["sessions"]] == ["s0", "s1", "s2"]
+    assert len(doc["sessions"][1]["messages"]) == 5
+    assert json.loads(b"".join(export_module.export_user(storage, "nobody", "json-stream"))) == {"user_id": "nobody", "sessions": []}
+
+
+def test_streamed_session_export_matches_buffered_export():
+    session_id = client.post("/api/sessions/", json={"user_id": "u-stream", "prompt": "stream me"}).json()["id"]
+    for i in range(3):
+        client.post("/api/messages/", json={"session_id": session_id, "role": "user", "content": f"m{i}"})
+
+    buffered = client.get(f"/api/sessions/{session_id}/export").json()
+    streamed = client.get(f"/api/sessions/{session_id}/export?format=json-stream")
+    assert streamed.headers["content-type"].startswith("application/json")
+    assert streamed.json() == buffered
+
+    ndjson = client.get(f"/api/sessions/{session_id}/export?format=ndjson")
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [r["type"] for r in records] == ["session", "message", "message", "message"]
+    assert records[0]["data"] == buffered["session"]
+
+    bulk = client.get("/api/sessions/export?user_id=u-stream")
+    assert [json.loads(line)["type"] for line in bulk.text.splitlines()][0] == "session"
+    assert client.get("/api/sessions/export").status_code == 422
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import fastjson
+from src.leet_apps.api.messages import Message
+from src.leet_apps.api.sessions import ResearchSession, router as sessions_router
+
+app = FastAPI()
+app.include_router(sessions_router)
+
+client = TestClient(app)
+
+
+def _message(i, micro=0):
+    return Message(id=f"fm{i}", session_id="fs", role="user", content=f"hello é {i}", created_at=datetime(2026, 1, 1, 0, 0, i, micro))
+
+
+def test_fragments_match_the_pydantic_encoding():
+    messages = [_message(1), _message(2, micro=1234)]
+    assert json.loads(fastjson.messages_array(messages)) == jsonable_encoder(messages)
+    session = ResearchSession(id="fs", user_id="u", prompt="p", status="pending", created_at=datetime(2026, 1, 1), updated_at=datetime(2026, 1, 2))
+    assert json.loads(fastjson.sessions_array([session])) == jsonable_encoder([session])
+    assert json.loads(fastjson.page(b"[]", None)) == {"items": [], "next_cursor": None}
+
+
+def test_messages_are_encoded_once_and_unversioned_sessions_never_cached():
+    fastjson.clear()
+    message = _message(3)
+    first = fastjson.fragment(fastjson.message_key(message), message)
+    hits = fastjson.stats()["hits"]
+    assert fastjson.fragment(fastjson.message_key(message), message) is first
+    assert fastjson.stats()["hits"] == hits + 1
+
+    session = ResearchSession(id="fs2", user_id="u", prompt="p", status="pending", created_at=datetime(2026, 1, 1))
+    assert fastjson.session_key(session) is None
+
+
+def test_sources_are_projected_to_source_fields():
+    session = ResearchSession(id="fs3", user_id="u", prompt="p", status="done", created_at=datetime(2026, 1, 1), updated_at=datetime(2026, 1, 1))
+    sources = [{"title": "t", "url": "https://t", "snippet": "s", "fetched_at": datetime(2026, 1, 1), "confidence": 0.5, "internal": 1}]
+    assert json.loads(fastjson.sources_array(session, sources)) == [
+        {"title": "t", "url": "https://t", "snippet": "s", "fetched_at": "2026-01-01T00:00:00", "confidence": 0.5}
+    ]
+
+
+def test_updated_session_is_not_served_stale():
+    session_id = client.post("/api/sessions/", json={"user_id": "u-fast", "prompt": "p"}).json()["id"]
+    assert client.get(f"/api/sessions/{session_id}").json()["topic"] is None
+    client.put(f"/api/sessions/{session_id}", json={"topic": "batteries"})
+    assert client.get(f"/api/sessions/{session_id}").json()["topic"] == "batteries"
+    assert client.get("/api/sessions/?user_id=u-fast").json()[0]["topic"] == "batteries"
+
+
+def test_resaved_message_is_not_served_stale():
+    from src.leet_apps.api import messages as messages_module
+
+    fastjson.clear()
+    message = Message(id="fm-resave", session_id="fs-resave", role="user", content="old", created_at=datetime(2026, 1, 1))
+    messages_module.add_message(message)
+    assert b'"content":"old"' in fastjson.messages_array(messages_module.messages_for_session("fs-resave"))
+    messages_module.add_message(message.model_copy(update={"content": "new"}))
+    body = json.loads(fastjson.messages_array(messages_module.messages_for_session("fs-resave")))
+    assert [m["content"] for m in body] == ["new"]
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import http_cache
+from src.leet_apps.api.infographics import router as infographics_router
+from src.leet_apps.api.messages import router as messages_router
+from src.leet_apps.api.sessions import router as sessions_router
+
+app = FastAPI()
+app.include_router(infographics_router)
+app.include_router(messages_router)
+app.include_router(sessions_router)
+
+client = TestClient(app)
+
+
+def test_etag_matching_uses_weak_comparison():
+    assert http_cache.etag_matches('"abc"', '"abc"')
+    assert http_cache.etag_matches('W/"abc"', '"abc"')
+    assert http_cache.etag_matches('"x", W/"abc"', 'W/"abc"')
+    assert http_cache.etag_matches("*", '"abc"')
+    assert not http_cache.etag_matches('"abd"', '"abc"')
+    assert not http_cache.etag_matches(None, '"abc"')
+
+
+def test_if_modified_since_has_second_resolution():
+    modified = datetime(2026, 3, 1, 12, 0, 0, 500000)
+    headers = http_cache.validators('W/"v"', http_cache.REVALIDATE, modified)
+    assert headers["Last-Modified"] == "Sun, 01 Mar 2026 12:00:00 GMT"
+    assert http_cache.not_modified(headers, if_modified_since=headers["Last-Modified"]).status_code == 304
+    earlier = http_cache.http_date(modified - timedelta(seconds=1))
+    assert http_cache.not_modified(headers, if_modified_since=earlier) is None
+    assert http_cache.not_modified(headers, if_modified_since="not a date") is None
+    # If-None-Match takes precedence over If-Modified-Since
+    assert http_cache.not_modified(headers, '"other"', headers["Last-Modified"]) is None
+
+
+def test_infographic_image_is_immutable_and_revalidates():
+    inf_id = client.post("/api/infographics/generate", json={"prompt": "Cache me"}).json()["id"]
+    res = client.get(f"/api/infographics/{inf_id}/image")
+    assert res.status_code == 200
+    assert res.headers["cache-control"] == http_cache.IMMUTABLE
+    etag = res.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    again = client.get(f"/api/infographics/{inf_id}/image", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    png = client.get(f"/api/infographics/{inf_id}/image?format=png&width=64")
+    assert png.headers["etag"] != etag
+    assert client.get(f"/api/infographics/{inf_id}/image?format=png&width=64", headers={"If-None-Match": png.headers["etag"]}).status_code == 304
+    assert client.get(f"/api/infographics/{inf_id}/image?format=png&width=65", headers={"If-None-Match": png.headers["etag"]}).status_code == 200
+
+
+def test_session_export_validators_follow_latest_change():
+    session_id = client.post("/api/sessions/", json={"user_id": "u-cache", "prompt": "export caching"}).json()["id"]
+    first = client.get(f"/api/sessions/{session_id}/export")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == http_cache.REVALIDATE
+    assert "last-modified" in first.headers
+    etag = first.headers["etag"]
+
+    assert client.get(f"/api/sessions/{session_id}/export", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/api/sessions/{session_id}/export", headers={"If-Modified-Since": first.headers["last-modified"]}).status_code == 304
+
+    client.post("/api/messages/", json={"session_id": session_id, "role": "user", "content": "follow-up"})
+    changed = client.get(f"/api/sessions/{session_id}/export", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["messages"][0]["content"] == "follow-up"
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.leet_apps.api.jobs import JobQueue
+
+
+def test_jobs_complete_or_fail_with_error():
+    queue = JobQueue(workers=2)
+
+    async def ok():
+        return {"value": 1}
+
+    async def boom():
+        raise RuntimeError("pipeline exploded")
+
+    async def run():
+        good = queue.submit("test", ok)
+        bad = queue.submit("test", boom)
+        await queue.join()
+        return good, bad
+
+    good, bad = asyncio.run(run())
+    assert good.status == "completed" and good.result == {"value": 1}
+    assert bad.status == "failed" and bad.error == "pipeline exploded"
+    assert good.finished_at >= good.started_at
+
+
+def test_full_queue_rejects_with_503():
+    queue = JobQueue(workers=1, max_queued=1)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    async def run():
+        queue.submit("test", slow)
+        await asyncio.sleep(0)  # the single worker picks up the first job
+        queue.submit("test", slow)
+        with pytest.raises(HTTPException) as exc:
+            queue.submit("test", slow)
+        await queue.join()
+        return exc.value
+
+    assert asyncio.run(run()).status_code == 503
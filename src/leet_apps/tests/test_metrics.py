@@ -0,0 +1,86 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import metrics
+from src.leet_apps.api.ratelimit import research_limiter
+from src.leet_apps.api.search import router as search_router
+from src.leet_apps.api.sessions import router as sessions_router
+
+app = FastAPI()
+app.include_router(sessions_router)
+app.include_router(search_router)
+metrics.instrument_app(app)
+
+client = TestClient(app)
+
+
+def _sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_histogram_buckets_are_cumulative_in_exposition():
+    h = metrics.Histogram("test_latency_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        h.observe(value, stage="a")
+    assert h.expose() == [
+        'test_latency_seconds_bucket{stage="a",le="0.1"} 2',
+        'test_latency_seconds_bucket{stage="a",le="1"} 3',
+        'test_latency_seconds_bucket{stage="a",le="+Inf"} 4',
+        'test_latency_seconds_sum{stage="a"} 3.65',
+        'test_latency_seconds_count{stage="a"} 4',
+    ]
+
+
+def test_registry_returns_existing_metric_and_rejects_conflicts():
+    c = metrics.counter("leet_test_events_total", "test", ("kind",))
+    assert metrics.counter("leet_test_events_total", "test", ("kind",)) is c
+    try:
+        metrics.gauge("leet_test_events_total", "test", ("kind",))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("conflicting registration accepted")
+
+
+def test_timed_iter_records_only_production_time():
+    before = metrics.stage_duration.count(stage="test.stream")
+    assert list(metrics.timed_iter("test.stream", [b"a", b"b"])) == [b"a", b"b"]
+    assert metrics.stage_duration.count(stage="test.stream") == before + 1
+
+
+def test_requests_are_labelled_by_route_template():
+    client.post("/api/sessions/", json={"user_id": "metrics-user", "prompt": "p"})
+    before = metrics.request_duration.count(method="GET", route="/api/sessions/{session_id}", status="404")
+    client.get("/api/sessions/does-not-exist-1")
+    client.get("/api/sessions/does-not-exist-2")
+    assert metrics.request_duration.count(method="GET", route="/api/sessions/{session_id}", status="404") == before + 2
+    client.get("/no/such/path")
+    assert metrics.request_duration.count(method="GET", route="unmatched", status="404") >= 1
+
+
+def test_metrics_endpoint_exposes_spans_caches_limits_and_stores():
+    from src.leet_apps.api.sessions import execute_research_session
+
+    session = client.post("/api/sessions/", json={"user_id": "metrics-user", "prompt": "metrics pipeline"}).json()
+    asyncio.run(execute_research_session(session["id"]))
+    client.get("/api/search/", params={"query": "metrics pipeline"})  # cache hit
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    for stage in ("research", "research.search", "research.infographic", "research.store", "search"):
+        assert _sample(text, f'leet_stage_duration_seconds_count{{stage="{stage}"}}') >= 1
+    assert _sample(text, 'leet_cache_hits_total{cache="search"}') >= 1
+    assert 0 < _sample(text, 'leet_cache_hit_ratio{cache="search"}') <= 1
+    assert _sample(text, "leet_research_runs_in_progress") == 0
+    assert _sample(text, f'leet_rate_limit_rejected_total{{limiter="{research_limiter.name}"}}') is not None
+    assert _sample(text, 'leet_store_records{kind="sessions"}') >= 1
+    assert _sample(text, "leet_store_blob_bytes") > 0
+    # each family is declared once, even when several collectors contribute samples
+    assert text.count("# TYPE leet_cache_hits_total ") == 1
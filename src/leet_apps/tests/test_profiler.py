@@ -0,0 +1,75 @@
+from collections import Counter
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import profiler, search
+from src.leet_apps.api.chat import router as chat_router
+from src.leet_apps.api.providers import FakeProvider
+from src.leet_apps.api.ratelimit import research_limiter
+from src.leet_apps.api.sessions import router as sessions_router
+
+app = FastAPI()
+app.include_router(chat_router)
+app.include_router(sessions_router)
+profiler.install_profiler(app, slow_ms=50)
+
+client = TestClient(app, headers={"X-Admin-Token": "secret"})
+
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch):
+    monkeypatch.setenv("LEET_ADMIN_TOKEN", "secret")
+
+
+def test_collapsed_output_is_flamegraph_ready():
+    samples = Counter({"a:f;a:g": 3, "a:f": 1})
+    assert profiler.collapsed(samples) == "a:f;a:g 3\na:f 1\n"
+    assert profiler.watched("/api/sessions/abc/run")
+    assert profiler.watched("/api/chat/send")
+    assert not profiler.watched("/api/sessions/abc")
+
+
+def test_slow_research_request_is_profiled_and_served():
+    client.delete("/api/admin/profiles/")
+    research_limiter.reset()
+    previous = search.set_providers([FakeProvider("slow", latency=0.15)])
+    try:
+        res = client.post("/api/chat/send", json={"user_id": "u-prof", "prompt": "profiled slow query"})
+    finally:
+        search.set_providers(previous)
+    assert res.status_code == 200
+
+    listed = client.get("/api/admin/profiles/").json()
+    assert len(listed) == 1
+    profile = listed[0]
+    assert profile["path"] == "/api/chat/send"
+    assert profile["duration_ms"] >= 150
+    assert profile["sample_count"] > 0
+    assert "samples" not in profile
+
+    detail = client.get(f"/api/admin/profiles/{profile['id']}").json()
+    # The request spent its time awaiting the provider
+    waiting = [s for s in detail["top_stacks"] if s["stack"][-1] == "[await]"]
+    assert waiting and any("chat:send_and_run" in s["stack"] for s in waiting)
+
+    text = client.get(f"/api/admin/profiles/{profile['id']}/collapsed").text
+    assert text.splitlines()[0].rsplit(" ", 1)[1].isdigit()
+    assert client.get("/api/admin/profiles/nope").status_code == 404
+
+
+def test_fast_requests_are_not_kept_and_admin_token_is_enforced(monkeypatch):
+    client.delete("/api/admin/profiles/")
+    research_limiter.reset()
+    assert client.post("/api/chat/send", json={"user_id": "u-prof", "prompt": "profiled fast query"}).status_code == 200
+    assert client.get("/api/admin/profiles/").json() == []
+
+    assert client.get("/api/admin/profiles/").status_code == 200
+    assert client.get("/api/admin/profiles/", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.delete("/api/admin/profiles/", headers={"X-Admin-Token": ""}).status_code == 403
+
+    # no token configured: closed to everyone
+    monkeypatch.delenv("LEET_ADMIN_TOKEN")
+    assert client.get("/api/admin/profiles/").status_code == 403
+    assert client.delete("/api/admin/profiles/").status_code == 403
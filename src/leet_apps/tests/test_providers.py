@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from src.leet_apps.api.providers import (
+    FakeProvider,
+    MockProvider,
+    ProvidersUnavailable,
+    canonicalize_url,
+    gather_sources,
+)
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTPS://Example.com:443/a/?utm_source=x&b=2&a=1#frag") == "https://example.com/a?a=1&b=2"
+    assert canonicalize_url("http://example.com:8080/") == "http://example.com:8080"
+
+
+def test_fan_out_runs_providers_concurrently_and_dedupes():
+    shared = ["https://shared.test/page"]
+    providers = [
+        FakeProvider("a", results=2, latency=0.05, shared_urls=shared, confidence=0.4),
+        FakeProvider("b", results=2, latency=0.05, shared_urls=["https://SHARED.test/page/"], confidence=0.8),
+    ]
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await gather_sources("q", providers)
+        return results, loop.time() - start
+
+    results, elapsed = asyncio.run(run())
+    assert elapsed < 0.1  # sequential calls would take at least 0.1s
+    urls = [r["url"] for r in results]
+    assert len(urls) == 5
+    assert urls[2] == "https://shared.test/page"
+    assert results[2]["confidence"] == 0.8
+
+
+def test_slow_and_failing_providers_yield_partial_results():
+    providers = [
+        FakeProvider("slow", latency=1.0, timeout=0.05),
+        FakeProvider("broken", failure_rate=1.0),
+        FakeProvider("ok", results=1),
+    ]
+    streamed = []
+    results = asyncio.run(gather_sources("q", providers, on_source=streamed.append))
+    assert [r["url"] for r in results] == ["https://ok.fake.test/q/0"]
+    assert streamed == results
+    assert providers[0].stats["timeouts"] == 1
+    assert providers[1].stats["errors"] == 1
+
+
+def test_all_providers_failing_raises():
+    with pytest.raises(ProvidersUnavailable):
+        asyncio.run(gather_sources("q", [FakeProvider("x", failure_rate=1.0)]))
+
+
+def test_provider_concurrency_is_bounded():
+    provider = FakeProvider("limited", latency=0.02, concurrency=1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(gather_sources(f"q{i}", [provider]) for i in range(3)))
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.06
+
+
+def test_mock_provider_keeps_demo_results():
+    provider = MockProvider("web", title="Overview of {q}", url="https://example.com/{slug}", snippet="s {q}", confidence=0.9)
+    [result] = asyncio.run(provider.search("ev trends"))
+    assert result["url"] == "https://example.com/ev-trends"
+    assert result["confidence"] == 0.9
+
+
+def test_provider_calls_stop_when_the_caller_goes_away():
+    slow = FakeProvider("slow-cancel", latency=1.0, timeout=5, concurrency=1)
+    fast = FakeProvider("fast-cancel", results=1)
+
+    def boom(source):
+        raise RuntimeError("client disconnected")
+
+    async def run():
+        search = asyncio.ensure_future(gather_sources("q", [slow]))
+        await asyncio.sleep(0.01)
+        search.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await search
+        with pytest.raises(RuntimeError):
+            await gather_sources("q", [fast, slow], on_source=boom)
+        others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        # the slow provider's slot is free again
+        start = asyncio.get_running_loop().time()
+        async with slow._semaphore():
+            waited = asyncio.get_running_loop().time() - start
+        return others, waited
+
+    others, waited = asyncio.run(run())
+    assert others == []
+    assert waited < 0.1
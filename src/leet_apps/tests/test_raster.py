@@ -0,0 +1,141 @@
+import asyncio
+import struct
+import zlib
+
+import pytest
+
+from src.leet_apps.api import raster, svg_templates
+
+SVG = svg_templates.render(
+    "stats_v1", "Raster test", "bars", [{"title": "a", "url": "https://a", "snippet": "s"}],
+    [{"label": "x", "value": 1}, {"label": "y", "value": 2}],
+).encode("utf-8")
+
+
+def _decode(png):
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", png[16:24])
+    idat_len = struct.unpack(">I", png[33:37])[0]
+    raw = zlib.decompress(png[41:41 + idat_len])
+    stride = width * 3 + 1
+    assert len(raw) == stride * height
+    return width, height, raw, stride
+
+
+def _pixel(decoded, x, y):
+    width, height, raw, stride = decoded
+    i = y * stride + 1 + x * 3
+    return tuple(raw[i:i + 3])
+
+
+def test_encode_png_roundtrip():
+    decoded = _decode(raster.encode_png(2, 1, bytes([255, 0, 0, 0, 0, 255])))
+    assert decoded[:2] == (2, 1)
+    assert _pixel(decoded, 0, 0) == (255, 0, 0) and _pixel(decoded, 1, 0) == (0, 0, 255)
+
+
+@pytest.mark.skipif(raster.cairosvg is not None, reason="checks the built-in rasterizer")
+def test_fallback_draws_template_shapes():
+    decoded = _decode(raster.rasterize(SVG))
+    assert decoded[:2] == (800, 600)
+    assert _pixel(decoded, 5, 5) == (255, 255, 255)
+    # the larger stat is a full-width bar starting at x=240 (group offset 40 + 200)
+    assert _pixel(decoded, 600, 180) == (0x3B, 0x82, 0xF6)
+    # title text is drawn as dark blocks on its baseline
+    assert _pixel(decoded, 42, 55) == (0, 0, 0)
+
+
+def test_output_size_from_width_or_dpi():
+    assert raster.output_size(SVG, width=400)[:2] == (400, 300)
+    assert raster.output_size(SVG, dpi=192)[:2] == (1600, 1200)
+    assert raster.output_size(SVG, width=200, dpi=300)[:2] == (200, 150)
+    with pytest.raises(raster.RasterError):
+        raster.output_size(SVG, dpi=96 * 10)
+    with pytest.raises(raster.RasterError):
+        raster.output_size(b"<svg")
+
+
+def test_render_png_coalesces_and_caches():
+    raster.clear_cache()
+
+    async def scenario():
+        first = await asyncio.gather(*[raster.render_png("svg-key", SVG, width=320) for _ in range(4)])
+        renders = raster.stats()["renders"]
+        again = await raster.render_png("svg-key", SVG, dpi=96 * 320 / 800)
+        return first, again, renders
+
+    try:
+        first, again, renders = asyncio.run(scenario())
+    finally:
+        raster.shutdown()
+    assert all(png == first[0] for png in first)
+    assert again == first[0]
+    assert raster.stats()["renders"] == renders
+    assert raster.stats()["coalesced"] >= 3
+    assert _decode(first[0])[:2] == (320, 240)
+
+
+def test_render_png_parses_each_svg_once(monkeypatch):
+    raster.clear_cache()
+    parses = []
+    intrinsic_size = raster._intrinsic_size
+    monkeypatch.setattr(raster, "_intrinsic_size", lambda svg: parses.append(svg) or intrinsic_size(svg))
+
+    async def scenario():
+        for width in (320, 320, 640, None):
+            await raster.render_png("parse-key", SVG, width=width)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        raster.shutdown()
+    assert len(parses) == 1
+
+
+def test_app_shutdown_stops_the_worker_pool():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.leet_apps.api.infographics import router as infographics_router
+
+    app = FastAPI()
+    app.include_router(infographics_router)
+    with TestClient(app):
+        raster._get_executor()
+        assert raster._executor is not None
+    assert raster._executor is None
+
+
+def test_abandoned_render_failure_is_retrieved(monkeypatch):
+    import gc
+
+    raster.clear_cache()
+
+    async def failing_render(key, svg, width):
+        await asyncio.sleep(0.01)
+        raise raster.RasterError("boom")
+
+    monkeypatch.setattr(raster, "_render", failing_render)
+    unhandled = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        waiter = asyncio.ensure_future(raster.render_png("abandoned-key", SVG, width=100))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0.05)
+        assert raster.stats()["inflight"] == 0
+        gc.collect()
+
+    asyncio.run(scenario())
+    assert unhandled == []
+
+
+def test_worker_pool_does_not_fork(monkeypatch):
+    monkeypatch.setattr(raster, "RASTER_WORKERS", 1)
+    raster.shutdown()
+    try:
+        executor = raster._get_executor()
+        assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        assert executor.submit(raster.rasterize, SVG, 80).result(timeout=60)[:8] == b"\x89PNG\r\n\x1a\n"
+    finally:
+        raster.shutdown()
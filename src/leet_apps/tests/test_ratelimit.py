@@ -0,0 +1,64 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api.ratelimit import TokenBucketLimiter, rate_limit, user_id
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter("t-burst", rate=1, burst=3, clock=clock)
+    assert [limiter.allow("k") for _ in range(4)] == [True, True, True, False]
+    assert limiter.acquire("k") == 1.0
+    clock.now = 1.0
+    assert limiter.allow("k")
+    assert not limiter.allow("k")
+    assert limiter.stats()["rejected"] == 3
+
+
+def test_idle_keys_are_evicted_and_key_count_is_bounded():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter("t-idle", rate=1, burst=2, max_keys=3, clock=clock)
+    for k in ("a", "b", "c", "d"):
+        limiter.allow(k)
+    assert len(limiter) == 3
+
+    clock.now = 10.0  # every bucket has refilled completely
+    limiter.allow("e")
+    assert len(limiter) == 1
+
+
+def test_dependency_returns_429_with_retry_after_per_user():
+    limiter = TokenBucketLimiter("t-dep", rate=0.01, burst=1)
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(rate_limit(limiter, key=user_id))])
+    async def limited():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/limited", headers={"X-User-Id": "alice"}).status_code == 200
+    res = client.get("/limited", headers={"X-User-Id": "alice"})
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+    # A different user has an independent bucket
+    assert client.get("/limited", headers={"X-User-Id": "bob"}).status_code == 200
+
+
+def test_discarded_limiters_are_forgotten():
+    import gc
+
+    from src.leet_apps.api import ratelimit
+
+    limiter = TokenBucketLimiter("t-discarded", rate=1, burst=1)
+    assert limiter in ratelimit.limiters()
+    del limiter
+    gc.collect()
+    assert "t-discarded" not in [l.name for l in ratelimit.limiters()]
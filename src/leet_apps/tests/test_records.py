@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+from src.leet_apps.api.messages import Message
+from src.leet_apps.api.records import MessageRecord, RecordTable, SessionRecord, from_epoch_us, to_epoch_us
+from src.leet_apps.api.sessions import ResearchSession
+from src.leet_apps.api.storage import InMemoryStorage
+
+BASE = datetime(2026, 1, 1, 8, 30, 15, 123456)
+
+
+def _session(i, **fields):
+    return ResearchSession(id=f"r{i}", user_id="u1", prompt=f"prompt {i}", status="completed", created_at=BASE, **fields)
+
+
+def test_epoch_microseconds_round_trip():
+    assert from_epoch_us(to_epoch_us(BASE)) == BASE
+    aware = datetime(2026, 1, 1, 10, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert from_epoch_us(to_epoch_us(aware)) == datetime(2026, 1, 1, 8, 30)
+
+
+def test_records_rebuild_equal_models():
+    session = _session(1, topic="energy", tags=["EV", "grid"], updated_at=BASE + timedelta(seconds=1))
+    assert SessionRecord(session).to_model() == session
+    assert SessionRecord(_session(2)).to_model() == _session(2)
+    message = Message(id="m1", session_id="r1", role="user", content="hi", created_at=BASE)
+    assert MessageRecord(message).to_model() == message
+
+
+def test_repeated_strings_are_shared():
+    a = SessionRecord(_session(1, tags=["energy"]))
+    b = SessionRecord(_session(2, tags=["".join(["ener", "gy"])]))
+    assert a.user_id is b.user_id and a.status is b.status and a.tags[0] is b.tags[0]
+
+
+def test_record_table_reads_copies_and_writes_back():
+    table = RecordTable(SessionRecord)
+    table["r1"] = _session(1)
+    session = table["r1"]
+    session.status = "failed"
+    assert table["r1"].status == "completed"  # reads are copies until saved
+    table["r1"] = session
+    assert table.get("r1").status == "failed" and table.get("missing") is None
+    assert "r1" in table and len(table) == 1 and list(table) == ["r1"]
+    del table["r1"]
+    assert not table
+
+
+def test_memory_backend_keeps_models_at_the_boundary():
+    storage = InMemoryStorage()
+    storage.save_session(_session(1, tags=["ev"]))
+    storage.append_message(Message(id="m2", session_id="r1", role="assistant", content="b", created_at=BASE + timedelta(seconds=1)))
+    storage.append_message(Message(id="m1", session_id="r1", role="user", content="a", created_at=BASE))
+    assert isinstance(storage.sessions.records["r1"], SessionRecord)
+    assert storage.query_sessions(tags=["EV"]) == [_session(1, tags=["ev"])]
+    assert [m.id for m in storage.list_messages("r1")] == ["m1", "m2"]
+    assert [m.id for m in storage.list_messages("r1", after=(BASE, "m1"))] == ["m2"]
+
+
+def test_writes_through_storage_tables_keep_indexes_current():
+    import pytest
+
+    from src.leet_apps.api.users import User
+
+    storage = InMemoryStorage()
+    storage.sessions["r1"] = _session(1, tags=["ev"], topic="lithium mining")
+    assert [s.id for s in storage.query_sessions(tags=["ev"])] == ["r1"]
+    assert [s.id for s, _ in storage.search_sessions("lithium")] == ["r1"]
+    storage.messages.by_id["m1"] = Message(id="m1", session_id="r1", role="user", content="cobalt", created_at=BASE)
+    assert [m.id for m in storage.list_messages("r1")] == ["m1"]
+    assert [s.id for s, _ in storage.search_sessions("cobalt")] == ["r1"]
+
+    with pytest.raises(KeyError):
+        storage.sessions["other"] = _session(2)
+    with pytest.raises(TypeError):
+        del storage.sessions["r1"]
+
+    storage.users["u1"] = User(id="u1", email="u1@example.com", name="U", created_at=BASE)
+    assert storage.get_user("u1").name == "U"
+    storage.users.clear()
+    assert storage.list_users() == []
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from src.leet_apps.api.session_index import SessionIndex
+from src.leet_apps.api.sessions import ResearchSession
+
+BASE = datetime(2026, 1, 1)
+
+
+def _session(i, user_id="u1", tags=None):
+    return ResearchSession(
+        id=f"s{i}",
+        user_id=user_id,
+        prompt=f"prompt {i}",
+        status="pending",
+        created_at=BASE + timedelta(days=i),
+        tags=tags or [],
+    )
+
+
+def test_query_orders_by_created_at_and_filters_user():
+    index = SessionIndex()
+    for i in (3, 1, 2):
+        index.add(_session(i))
+    index.add(_session(4, user_id="u2"))
+    assert index.query() == ["s1", "s2", "s3", "s4"]
+    assert index.query(user_id="u1") == ["s1", "s2", "s3"]
+    assert index.query(user_id="missing") == []
+
+
+def test_query_date_range_is_inclusive():
+    index = SessionIndex()
+    for i in range(5):
+        index.add(_session(i))
+    assert index.query(start_date=BASE + timedelta(days=1), end_date=BASE + timedelta(days=3)) == ["s1", "s2", "s3"]
+
+
+def test_query_tags_requires_all_and_ignores_case():
+    index = SessionIndex()
+    index.add(_session(1, tags=["EV", "market"]))
+    index.add(_session(2, tags=["ev"]))
+    index.add(_session(3, user_id="u2", tags=["Market", "ev"]))
+    assert index.query(tags=["ev"]) == ["s1", "s2", "s3"]
+    assert index.query(tags=[" MARKET ", "ev"]) == ["s1", "s3"]
+    assert index.query(user_id="u1", tags=["market"]) == ["s1"]
+    assert index.query(tags=["unknown"]) == []
+
+
+def test_readding_session_replaces_entry():
+    index = SessionIndex()
+    session = _session(1, tags=["a"])
+    index.add(session)
+    session.tags = ["b"]
+    index.add(session)
+    assert len(index) == 1
+    assert index.query(tags=["a"]) == []
+    assert index.query(tags=["b"]) == ["s1"]
+
+    index.remove("s1")
+    assert "s1" not in index
+    assert index.query() == []
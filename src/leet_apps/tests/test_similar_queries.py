@@ -0,0 +1,74 @@
+import asyncio
+
+from src.leet_apps.api import search, similar_queries
+from src.leet_apps.api.providers import FakeProvider
+from src.leet_apps.api.sessions import ResearchSessionCreate, create_session, execute_research_session
+from src.leet_apps.api.similar_queries import SimilarQueryIndex, terms
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_terms_expand_aliases_and_plurals():
+    assert terms("EV market trends") == {"electric", "vehicle", "market", "trend"}
+    assert terms("the business of AI") == {"business", "artificial", "intelligence"}
+
+
+def test_lookup_matches_similar_prompts_only():
+    index = SimilarQueryIndex(threshold=0.75)
+    index.add("electric vehicle market trends 2026", "s1")
+    session_id, similarity = index.lookup("EV market trends")
+    assert session_id == "s1" and similarity == 0.8
+    assert index.lookup("EV market trends 2025") is None  # conflicting year
+    assert index.lookup("EV market trends 2026")[0] == "s1"
+    assert index.lookup("solar panel prices") is None
+    assert index.stats()["hits"] == 2 and index.stats()["misses"] == 2
+
+
+def test_entries_expire_are_evicted_and_discarded():
+    clock = FakeClock()
+    index = SimilarQueryIndex(threshold=0.75, ttl_seconds=60, max_entries=2, clock=clock)
+    index.add("offshore wind permitting", "s1")
+    clock.now = 61
+    assert index.lookup("offshore wind permitting") is None
+    assert len(index) == 0
+
+    index.add("offshore wind permitting", "s1")
+    index.add("grid storage economics", "s2")
+    index.add("heat pump adoption", "s3")
+    assert len(index) == 2
+    assert index.lookup("offshore wind permitting") is None
+    index.discard("s2")
+    assert index.lookup("grid storage economics") is None
+    assert index.lookup("heat pump adoption")[0] == "s3"
+
+
+def test_zero_threshold_disables_reuse():
+    index = SimilarQueryIndex(threshold=0)
+    index.add("offshore wind permitting", "s1")
+    assert len(index) == 0 and index.lookup("offshore wind permitting") is None
+
+
+def test_research_run_reuses_sources_of_similar_prompt():
+    similar_queries.clear()
+    provider = FakeProvider("similar")
+    previous = search.set_providers([provider])
+    try:
+        first = asyncio.run(create_session(ResearchSessionCreate(user_id="u-sim", prompt="Electric vehicle charging networks")))
+        first_run = asyncio.run(execute_research_session(first.id))
+        assert first_run["reused_sources_from"] is None
+        calls = provider.stats["calls"]
+
+        second = asyncio.run(create_session(ResearchSessionCreate(user_id="u-sim", prompt="EV charging network")))
+        second_run = asyncio.run(execute_research_session(second.id))
+    finally:
+        search.set_providers(previous)
+        similar_queries.clear()
+    assert provider.stats["calls"] == calls
+    assert second_run["reused_sources_from"] == {"session_id": first.id, "similarity": 1.0}
+    assert [s["url"] for s in second_run["sources"]] == [s["url"] for s in first_run["sources"]]
@@ -0,0 +1,90 @@
+import json
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from src.leet_apps.api import storage as storage_module
+from src.leet_apps.api.source_store import SourceStore, source_id
+
+FETCHED = datetime(2026, 1, 1, 12, 0)
+
+
+def _source(url, confidence=0.5, **fields):
+    return {"title": "Battery prices", "url": url, "snippet": "Pack prices fell.", "fetched_at": FETCHED, "confidence": confidence, **fields}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield storage_module.InMemoryStorage()
+    else:
+        storage = storage_module.SQLiteStorage(str(tmp_path / "sources.db"))
+        yield storage
+        storage.close()
+
+
+def test_canonical_urls_share_an_id():
+    assert source_id("https://Example.com/a/?utm_source=x") == source_id("https://example.com/a")
+    assert source_id("https://example.com/a") != source_id("https://example.com/b")
+
+
+def test_sessions_share_records_and_read_back_what_they_stored(backend):
+    first = [_source("https://example.com/a"), {"title": "No link", "snippet": "inline"}]
+    second = [
+        _source("https://example.com/a/?utm_source=feed", confidence=0.9, snippet="Other snippet"),
+        _source("https://example.com/b"),
+    ]
+    backend.set_sources("s1", first)
+    backend.set_sources("s2", second)
+    assert backend.get_sources("s1") == first
+    assert backend.get_sources("s2") == second
+    assert list(backend.iter_sources("s2")) == second
+    assert backend.sizes()["sources"] == 2
+    assert backend.get_source_ids("s2") == {source_id("https://example.com/a"), source_id("https://example.com/b")}
+    assert backend.get_sources("missing") == []
+
+
+def test_records_are_released_with_their_last_reference(backend):
+    backend.set_sources("s1", [_source("https://example.com/a")])
+    backend.set_sources("s2", [_source("https://example.com/a", extra_field=[1, 2])])
+    backend.set_sources("s1", [_source("https://example.com/b")])
+    assert backend.sizes()["sources"] == 2
+    # s2 still reads its own copy, including the field the shared record lacks
+    assert backend.get_sources("s2") == [_source("https://example.com/a", extra_field=[1, 2])]
+    backend.set_sources("s2", [])
+    assert backend.sizes()["sources"] == 1
+    # Re-saving the same sources keeps the record alive
+    backend.set_sources("s1", backend.get_sources("s1"))
+    assert backend.get_sources("s1") == [_source("https://example.com/b")]
+
+
+def test_copies_with_fewer_fields_stay_exact():
+    store = SourceStore()
+    store.set("s1", [_source("https://example.com/a", extra_field="x")])
+    store.set("s2", [{"url": "https://example.com/a", "title": "Battery prices"}])
+    assert store.get("s2") == [{"url": "https://example.com/a", "title": "Battery prices"}]
+    assert len(store.records) == 1 and len(store) == 2
+
+
+def test_sqlite_migrates_per_session_copies(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    row = json.dumps({**_source("https://example.com/a"), "fetched_at": FETCHED.isoformat()})
+    conn.executescript(
+        f"""
+        CREATE TABLE sources (session_id TEXT NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL,
+                              PRIMARY KEY (session_id, position));
+        INSERT INTO sources VALUES ('s1', 0, '{row}'), ('s2', 0, '{row}');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    backend = storage_module.SQLiteStorage(path)
+    try:
+        assert backend.get_sources("s1") == backend.get_sources("s2") == [_source("https://example.com/a")]
+        assert backend.sizes()["sources"] == 1
+        assert not backend._query("SELECT 1 FROM sqlite_master WHERE name = 'sources'")
+    finally:
+        backend.close()
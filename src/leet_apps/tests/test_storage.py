@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import storage as storage_module
+from src.leet_apps.api.chat import router as chat_router
+from src.leet_apps.api.messages import Message, router as messages_router
+from src.leet_apps.api.sessions import ResearchSession, router as sessions_router
+from src.leet_apps.api.users import User, router as users_router
+
+app = FastAPI()
+app.include_router(chat_router)
+app.include_router(messages_router)
+app.include_router(sessions_router)
+app.include_router(users_router)
+
+client = TestClient(app)
+
+BASE = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    backend = storage_module.SQLiteStorage(str(tmp_path / "leet.db"))
+    previous = storage_module.set_storage(backend)
+    yield backend
+    storage_module.set_storage(previous)
+    backend.close()
+
+
+def _session(i, user_id="u1", tags=None, topic=None):
+    return ResearchSession(
+        id=f"s{i}", user_id=user_id, prompt=f"prompt {i}", status="pending",
+        created_at=BASE + timedelta(days=i), topic=topic, tags=tags or [],
+    )
+
+
+def test_sqlite_uses_wal_mode(sqlite_storage):
+    mode = sqlite_storage._query("PRAGMA journal_mode")[0][0]
+    assert mode.lower() == "wal"
+
+
+def test_sqlite_query_sessions_filters_and_keyset(sqlite_storage):
+    sqlite_storage.save_session(_session(1, tags=["EV"], topic="Electric Vehicles"))
+    sqlite_storage.save_session(_session(2, tags=["ev", "market"]))
+    sqlite_storage.save_session(_session(3, user_id="u2", tags=["ev"]))
+
+    assert [s.id for s in sqlite_storage.query_sessions()] == ["s1", "s2", "s3"]
+    assert [s.id for s in sqlite_storage.query_sessions(user_id="u1")] == ["s1", "s2"]
+    assert [s.id for s in sqlite_storage.query_sessions(tags=["EV", "Market"])] == ["s2"]
+    assert [s.id for s in sqlite_storage.query_sessions(topic="vehicle")] == ["s1"]
+    assert [s.id for s in sqlite_storage.query_sessions(start_date=BASE + timedelta(days=2))] == ["s2", "s3"]
+    assert [s.id for s in sqlite_storage.query_sessions(after=(BASE + timedelta(days=1), "s1"), limit=1)] == ["s2"]
+
+    updated = _session(2, tags=["other"])
+    updated.status = "completed"
+    sqlite_storage.save_session(updated)
+    assert sqlite_storage.get_session("s2").status == "completed"
+    assert [s.id for s in sqlite_storage.query_sessions(tags=["market"])] == []
+
+
+def test_sqlite_batch_rolls_back_on_error(sqlite_storage):
+    with pytest.raises(RuntimeError):
+        with sqlite_storage.batch():
+            sqlite_storage.save_user(User(id="u", email="u@example.com", name=None, created_at=BASE))
+            raise RuntimeError("boom")
+    assert sqlite_storage.get_user("u") is None
+
+
+def test_sqlite_state_is_shared_between_connections(sqlite_storage):
+    sqlite_storage.append_message(Message(id="m1", session_id="s", role="user", content="hi", created_at=BASE))
+    other = storage_module.SQLiteStorage(sqlite_storage.path)
+    try:
+        assert [m.id for m in other.list_messages("s")] == ["m1"]
+    finally:
+        other.close()
+
+
+def test_routers_run_against_sqlite_backend(sqlite_storage):
+    res = client.post("/api/chat/send", json={"user_id": "u-sql", "prompt": "heat pumps", "tags": ["Energy"]})
+    assert res.status_code == 200
+    session_id = res.json()["session"]["id"]
+
+    listed = client.get("/api/sessions/?tags=energy").json()
+    assert [s["id"] for s in listed] == [session_id]
+    assert client.get(f"/api/sessions/{session_id}").json()["status"] == "completed"
+    assert client.get(f"/api/sessions/{session_id}/sources").json() == res.json()["sources"]
+    assert client.get(f"/api/sessions/{session_id}/infographic").json()["session_id"] == session_id
+    assert len(client.get(f"/api/messages/session/{session_id}").json()) == 1
+
+    user = client.post("/api/users/", json={"email": "sql@example.com"}).json()
+    assert client.get(f"/api/users/{user['id']}").json()["email"] == "sql@example.com"
+    # Nothing leaked into the in-memory backend
+    assert session_id not in storage_module.memory_storage().sessions
+
+
+def test_sqlite_blobs_are_content_addressed(sqlite_storage):
+    sqlite_storage.put_blob("k1", b"<svg/>")
+    sqlite_storage.put_blob("k1", b"ignored")
+    for i in range(2):
+        sqlite_storage.save_infographic({"id": f"i{i}", "session_id": None, "blob": "k1", "created_at": BASE})
+    assert sqlite_storage.has_blob("k1") and not sqlite_storage.has_blob("k2")
+    assert sqlite_storage.get_image("i0") == sqlite_storage.get_image("i1") == b"<svg/>"
+    assert sqlite_storage.get_image("missing") is None
+    assert sqlite_storage._query("SELECT COUNT(*) AS n FROM blobs")[0]["n"] == 1
+
+
+def test_sqlite_migrates_files_from_before_blobs(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE sessions (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, prompt TEXT NOT NULL, status TEXT NOT NULL,
+                               created_at TEXT NOT NULL, topic TEXT, tags TEXT NOT NULL DEFAULT '[]');
+        CREATE TABLE infographics (id TEXT PRIMARY KEY, session_id TEXT, created_at TEXT NOT NULL, data TEXT NOT NULL);
+        CREATE TABLE images (id TEXT PRIMARY KEY, data BLOB NOT NULL);
+        INSERT INTO infographics VALUES ('old', NULL, '2026-01-01T00:00:00.000000', '{"id": "old"}');
+        INSERT INTO images VALUES ('old', X'3C7376672F3E');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    backend = storage_module.SQLiteStorage(path)
+    try:
+        assert backend.get_image("old") == b"<svg/>"
+        backend.save_session(_session(1))
+        assert backend.get_session("s1").updated_at is None
+    finally:
+        backend.close()
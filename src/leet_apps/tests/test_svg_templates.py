@@ -0,0 +1,81 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from src.leet_apps.api import svg_templates
+from src.leet_apps.api.svg_templates import TemplateError, compile_template
+
+NASTY = {"title": "R&D <2026>", "url": "https://x.test/?a=1&b='2'", "snippet": 'say "hi" & <bye>'}
+
+
+def test_compile_splits_literals_and_fields():
+    tpl = compile_template("a {x} {{b}} {!y}c", "t")
+    assert tpl.segments == ["a ", ("x", False), " {b} ", ("y", True), "c"]
+    assert tpl.fields == {"x", "y"}
+    assert tpl.render({"x": "<", "y": "<g/>"}) == "a &lt; {b} <g/>c"
+
+
+def test_unmatched_brace_and_missing_value_raise():
+    with pytest.raises(TemplateError):
+        compile_template("oops { here")
+    with pytest.raises(TemplateError):
+        compile_template("{x}").render({})
+
+
+def test_simple_v1_matches_previous_markup_for_plain_input():
+    sources = [{"title": f"t{i}", "url": f"https://s/{i}", "snippet": f"s{i}"} for i in range(8)]
+    svg = svg_templates.render("simple_v1", "Title", "Prompt text", sources)
+    assert "<text x='40' y='60' class='title'>Infographic: Title</text>" in svg
+    assert "<text x='0' y='120' class='body'>- t5: s5</text>" in svg
+    assert "t6: s6" not in svg
+    assert "<text x='0' y='68' class='source'>https://s/3</text>" in svg
+    assert "https://s/4<" not in svg
+
+
+@pytest.mark.parametrize("layout", sorted(svg_templates.LAYOUTS))
+def test_every_layout_escapes_and_is_well_formed(layout):
+    stats = [{"label": "A&B", "value": 3.0}, {"label": "<C>", "value": 12.5}, {"label": "zero", "value": 0}]
+    svg = svg_templates.render(layout, "R&D <report>", "what's \"new\" & next?", [NASTY] * 3, stats, ["x < y"])
+    ET.fromstring(svg.split("?>", 1)[1])
+    assert "R&amp;D &lt;report&gt;" in svg
+
+
+def test_stats_layouts_scale_to_largest_value():
+    stats = [{"label": "small", "value": 1}, {"label": "big", "value": 4}]
+    bars = svg_templates.render("stats_v1", "t", "p", stats=stats)
+    assert "width='480.0'" in bars and "width='120.0'" in bars
+    columns = svg_templates.render("chart_v1", "t", "p", stats=stats)
+    assert "height='260.0'" in columns and "height='65.0'" in columns
+
+
+def test_unknown_layout_raises_key_error():
+    with pytest.raises(KeyError):
+        svg_templates.render("nope_v9", "t", "p")
+
+
+@pytest.mark.parametrize("layout", sorted(svg_templates.LAYOUTS))
+def test_non_string_values_are_escaped(layout):
+    hostile = {"title": ["<script>alert(1)</script>"], "url": {"<a>": "&"}, "snippet": ("<b>",)}
+    svg = svg_templates.render(layout, "t", "p", [hostile] * 3, [{"label": ["<i>"], "value": 1}])
+    ET.fromstring(svg.split("?>", 1)[1])
+    assert "<script>" not in svg and "<a>" not in svg and "<b>" not in svg and "<i>" not in svg
+    assert compile_template("{n}{f}{b}").render({"n": 3, "f": 1.5, "b": True}) == "31.5True"
+
+
+@pytest.mark.parametrize("layout", sorted(svg_templates.LAYOUTS))
+def test_sources_drawn_matches_what_the_layout_draws(layout):
+    drawn = svg_templates.LAYOUTS[layout].sources_drawn
+    sources = [{"title": f"t{i}", "url": f"https://s/{i}", "snippet": f"s{i}"} for i in range(drawn + 1)]
+
+    def render(changed):
+        edited = [dict(s, title="changed", url="https://changed", snippet="changed") if i == changed else s for i, s in enumerate(sources)]
+        return svg_templates.render(layout, "t", "p", edited)
+
+    base = render(None)
+    assert render(drawn - 1) != base
+    assert render(drawn) == base
+
+
+def test_literals_are_rendered_verbatim_never_evaluated():
+    source = "'''\"\\n{!a}'),__import__('os').system('x')#{b}"
+    assert compile_template(source).render({"a": "<A>", "b": "<b>"}) == "'''\"\\n<A>'),__import__('os').system('x')#&lt;b&gt;"
@@ -0,0 +1,153 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.leet_apps.api import storage as storage_module, text_index
+from src.leet_apps.api.messages import Message
+from src.leet_apps.api.sessions import ResearchSession, router as sessions_router
+from src.leet_apps.api.text_index import TextIndex, tokenize
+
+app = FastAPI()
+app.include_router(sessions_router)
+
+client = TestClient(app)
+
+BASE = datetime(2026, 1, 1)
+
+
+def _session(i, prompt, user_id="u1", topic=None, tags=None):
+    return ResearchSession(
+        id=f"t{i}", user_id=user_id, prompt=prompt, status="completed", created_at=BASE + timedelta(minutes=i), topic=topic, tags=tags or []
+    )
+
+
+def _message(session_id, i, content):
+    return Message(id=f"{session_id}-m{i}", session_id=session_id, role="user", content=content, created_at=BASE + timedelta(seconds=i))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    storage = storage_module.InMemoryStorage() if request.param == "memory" else storage_module.SQLiteStorage(str(tmp_path / "fts.db"))
+    previous = storage_module.set_storage(storage)
+    yield storage
+    storage_module.set_storage(previous)
+    if request.param == "sqlite":
+        storage.close()
+
+
+def _seed(storage):
+    storage.save_session(_session(1, "Lithium battery recycling in Europe", topic="batteries"))
+    storage.save_session(_session(2, "Offshore wind permitting", user_id="u2"))
+    storage.save_session(_session(3, "Grid storage economics"))
+    storage.set_sources("t3", [{"title": "Battery storage costs fall", "snippet": "lithium iron phosphate prices", "url": "https://x.test"}])
+    storage.append_message(_message("t2", 1, "what about battery backup for turbines?"))
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("The cost of Li-ion batteries, in 2026!") == ["cost", "li", "ion", "batteries", "2026"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_fields_and_follows_updates(backend):
+    _seed(backend)
+    ranked = [s.id for s, _ in backend.search_sessions("battery")]
+    # prompt match first, then the source title, then the message
+    assert ranked == ["t1", "t3", "t2"]
+    assert [s.id for s, _ in backend.search_sessions("battery", user_id="u2")] == ["t2"]
+    assert [s.id for s, _ in backend.search_sessions("lithium", limit=1)] == ["t1"]
+    assert backend.search_sessions("the of") == []
+
+    # Replacing sources and editing the session swap their contribution
+    backend.set_sources("t3", [{"title": "Pumped hydro", "snippet": "reservoirs"}])
+    assert "t3" not in [s.id for s, _ in backend.search_sessions("battery")]
+    session = backend.get_session("t2")
+    session.prompt = "Hydro and wind"
+    backend.save_session(session)
+    assert [s.id for s, _ in backend.search_sessions("offshore")] == []
+    assert {s.id for s, _ in backend.search_sessions("hydro")} == {"t2", "t3"}
+    backend.append_message(_message("t1", 2, "also sodium chemistries"))
+    assert [s.id for s, _ in backend.search_sessions("sodium")] == ["t1"]
+
+
+def test_resaving_a_message_replaces_its_text(backend):
+    _seed(backend)
+    backend.save_session(_session(4, "Heat pumps"))
+    backend.append_message(_message("t4", 1, "battery backup for turbines?"))
+    before = dict((s.id, score) for s, score in backend.search_sessions("turbines"))
+
+    message = _message("t2", 1, "what about battery backup for turbines?")
+    backend.append_message(message)
+    backend.append_message(message)
+    assert dict((s.id, score) for s, score in backend.search_sessions("turbines")) == pytest.approx(before)
+    assert [m.id for m in backend.list_messages("t2")] == [message.id]
+
+    backend.append_message(message.model_copy(update={"content": "geothermal instead"}))
+    assert [s.id for s, _ in backend.search_sessions("turbines")] == ["t4"]
+    assert [s.id for s, _ in backend.search_sessions("geothermal")] == ["t2"]
+    assert [m.content for m in backend.list_messages("t2")] == ["geothermal instead"]
+
+
+def test_search_endpoint(backend):
+    _seed(backend)
+    res = client.get("/api/sessions/search", params={"q": "battery storage", "limit": 2})
+    assert res.status_code == 200
+    hits = res.json()
+    assert [h["session"]["id"] for h in hits] == ["t3", "t1"]
+    assert hits[0]["score"] >= hits[1]["score"] > 0
+    assert client.get("/api/sessions/search", params={"q": "   "}).status_code == 400
+    assert client.get("/api/sessions/search").status_code == 422
+
+
+def test_pruned_search_matches_exhaustive_scoring():
+    rng = random.Random(3)
+    vocabulary = [f"w{i}" for i in range(300)]
+    index = TextIndex()
+    for i in range(2000):
+        session = _session(i, " ".join(rng.choices(vocabulary, weights=range(300, 0, -1), k=12)))
+        index.set_session(session)
+    for query in ("w0 w1 w250", "w5 w7", "w299 w0", "w3"):
+        top = index.search(query, limit=10)
+        everything = index.search(query, limit=10_000)
+        assert [round(s, 9) for _, s in top] == [round(s, 9) for _, s in everything[:10]]
+
+
+def test_common_terms_use_champions_with_exact_scores(monkeypatch):
+    rng = random.Random(5)
+    index = TextIndex()
+    for i in range(600):
+        index.set_session(_session(i, "common " * rng.randint(1, 4) + f"filler{i}", user_id=f"u{i % 3}"))
+    exhaustive = dict(index.search("common", limit=600))
+
+    monkeypatch.setattr(text_index, "CHAMPION_MIN_POSTINGS", 100)
+    monkeypatch.setattr(text_index, "CHAMPIONS", 40)
+    top = index.search("common filler7", limit=10)
+    assert top[0][0] == "t7"  # the rare term still finds its document
+    for sid, score in top[1:]:
+        assert score == pytest.approx(exhaustive[sid])
+    best = sorted(exhaustive.values(), reverse=True)[:9]
+    assert [s for _, s in top[1:]] == pytest.approx(best)
+
+    # a user filter walks the user's sessions instead and stays exact
+    filtered = index.search("common", user_id="u1", limit=5)
+    expected = sorted((s for sid, s in exhaustive.items() if int(sid[1:]) % 3 == 1), reverse=True)[:5]
+    assert [s for _, s in filtered] == pytest.approx(expected)
+
+
+def test_sqlite_backfills_index_for_existing_files(tmp_path):
+    path = str(tmp_path / "old.db")
+    backend = storage_module.SQLiteStorage(path)
+    _seed(backend)
+    backend.close()
+    conn = sqlite3.connect(path)
+    conn.executescript("DROP TABLE session_search; DELETE FROM search_docs;")
+    conn.close()
+
+    backend = storage_module.SQLiteStorage(path)
+    try:
+        assert [s.id for s, _ in backend.search_sessions("battery")] == ["t1", "t3", "t2"]
+    finally:
+        backend.close()